@@ -1,5 +1,5 @@
 from django.contrib import admin
-from book_clubs.models import User, Club, Membership, Application, Book, Rating, Meeting, MeetingRecommendation, Message
+from book_clubs.models import User, Club, Membership, Application, Book, Rating, Meeting, MeetingRecommendation, Message, UserRecommendation, RecommendationJob
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -49,6 +49,18 @@ class MeetingRecommendationAdmin(admin.ModelAdmin):
         'id', 'meeting', 'book'
     ]
 
+@admin.register(UserRecommendation)
+class UserRecommendationAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'user', 'book', 'rank', 'score', 'model_version'
+    ]
+
+@admin.register(RecommendationJob)
+class RecommendationJobAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'meeting', 'status', 'attempts', 'run_after', 'updated_at'
+    ]
+
 @admin.register(Message)
 class Message(admin.ModelAdmin):
     list_display = [
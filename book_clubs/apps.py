@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BookClubsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'book_clubs'
+
+    def ready(self):
+        from . import signals
@@ -10,9 +10,9 @@ class ClubCreationForm(forms.ModelForm):
         """Form options"""
 
         model = Club
-        fields = ['name', 'description']
+        fields = ['name', 'description', 'recommendation_strategy']
         widgets = {'description' : forms.Textarea()}
-        labels = {'name' : 'Name', 'description' : 'Description'}
+        labels = {'name' : 'Name', 'description' : 'Description', 'recommendation_strategy' : 'Book recommendations'}
 
 class LogInForm(forms.Form):
     username = forms.CharField(label = 'Username')
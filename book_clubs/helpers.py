@@ -1,10 +1,11 @@
 import random
-from surprise import dump
 from django.core.exceptions import ObjectDoesNotExist
 from django.urls import reverse
 from django.shortcuts import redirect
+from django.http import JsonResponse
 from django.contrib import messages as msgs
 from .models import User, Club, Membership, Application, Book, Meeting
+from .recommender import registry, precomputed, foldin, cache, catalogue, merge, ann, popularity, parallel, candidates, neighbours, aggregation
 
 def _membership_check(request, club_id):
     """Checks if current user is part of club with id being club_id."""
@@ -25,18 +26,48 @@ def _meeting_check(club, meeting_id):
     else:
         return True
 
-def _get_anti_test_set_for_user(train_set, test_subject):
-    """Gets anti test set of ratings for user."""
+def _get_anti_test_set_for_user(train_set, test_subject, candidate_items = None):
+    """
+        Gets anti test set of ratings for user.
+        If candidate_items, a list of inner item ids, is given only those items are included.
+    """
     fill = train_set.global_mean
     anti_testset = []
     u = train_set.to_inner_uid(test_subject)
     user_items = set([j for (j, _) in train_set.ur[u]])
+
+    if (candidate_items == None):
+        candidate_items = train_set.all_items()
+
     anti_testset += [(train_set.to_raw_uid(u), train_set.to_raw_iid(i), fill) for
-                             i in train_set.all_items() if
+                             i in candidate_items if
                              i not in user_items]
 
     return anti_testset
 
+def _rank_with_anti_test_set(algo, member_id, candidate_items = None):
+    """
+        Ranks every book that the member has not rated by predicting them one by one.
+        Used for algorithms that can not be scored with array operations.
+        If candidate_items, a list of inner item ids, is given only those books are ranked.
+        Returns a list of book_isbns, or an empty list if the member is unknown to algo.
+    """
+    return [book_isbn for (book_isbn, _) in _score_with_anti_test_set(algo, member_id, candidate_items)]
+
+def _score_with_anti_test_set(algo, member_id, candidate_items = None):
+    """
+        Ranks books in the same way as _rank_with_anti_test_set, but returns
+        a list of (book_isbn, estimated_rating) pairs.
+    """
+    try:
+        test_set = _get_anti_test_set_for_user(algo.trainset, member_id, candidate_items)
+    except ValueError:
+        return []
+
+    user_recommendations = [(book_isbn, estimated_rating) for (_, book_isbn, _, estimated_rating, _) in algo.test(test_set)]
+    user_recommendations.sort(key=lambda x: x[1], reverse=True)
+    return user_recommendations
+
 def login_prohibited(function):
     """Redirects to user_page view if current user is logged in."""
     def wrapper(request):
@@ -47,6 +78,16 @@ def login_prohibited(function):
 
     return wrapper
 
+def api_login_required(function):
+    """Responds with a JSON error and status 401 if current user is not logged in."""
+    def wrapper(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return function(request, *args, **kwargs)
+        else:
+            return JsonResponse({'error' : 'Authentication required.'}, status = 401)
+
+    return wrapper
+
 def club_requirements(function):
     """
         Used to check if current user accessing club
@@ -160,6 +201,151 @@ def club_and_join_meeting_requirements(function):
 
     return wrapper
 
+def _to_inner_iids(model, candidate_set):
+    """Returns the inner ids of the candidate books that model knows, or None if there is no candidate_set."""
+    if (candidate_set == None):
+        return None
+
+    if (model.item_model != None):
+        inner_iids = model.item_model.to_inner_iids(candidate_set.book_isbns)
+        return inner_iids[inner_iids >= 0]
+
+    inner_iids = []
+
+    for book_isbn in candidate_set.book_isbns:
+        try:
+            inner_iids.append(model.algo.trainset.to_inner_iid(book_isbn))
+        except ValueError:
+            pass
+
+    return inner_iids
+
+def _get_excluded_items(model, used_book_isbns):
+    """
+        Returns a boolean array that is True for the items of the model that
+        are not in the catalogue or have been used, or None if the model
+        has no FactorModel or NeighbourModel.
+    """
+    if (model.item_model == None):
+        return None
+
+    excluded_items = ~catalogue.index.model_mask(model.item_model)
+    used_items = model.item_model.to_inner_iids(list(used_book_isbns))
+    excluded_items[used_items[used_items >= 0]] = True
+    return excluded_items
+
+def _get_group_recommendations(model, all_member_ids, used_book_isbns, recommendations_limit, strategy):
+    """
+        Ranks the books in the catalogue that have not been used in a meeting
+        of a club by the group score of its members under strategy, scoring
+        the whole club with one matrix product. If candidate sources are
+        configured, only the books they give for the club are scored.
+        Returns the book_isbns of the best recommendations_limit books, or
+        those of the popularity fallback ranking if no member can be scored.
+    """
+    ranking = aggregation.rank_club(
+        model.factors,
+        all_member_ids,
+        strategy,
+        k = recommendations_limit,
+        excluded_items = _get_excluded_items(model, used_book_isbns),
+        member_ratings = foldin.get_member_ratings(all_member_ids),
+        candidate_items = _to_inner_iids(model, candidates.generate(model, all_member_ids))
+    )
+
+    if (ranking == None):
+        return popularity.fallback_candidates(
+            model.item_model,
+            used_book_isbns,
+            catalogue.index.model_mask(model.item_model),
+            recommendations_limit
+        )
+
+    return [str(book_isbn) for book_isbn in model.factors.item_raw_ids[ranking[0]]]
+
+def _get_club_candidates(model, all_member_ids, used_book_isbns, recommendations_limit):
+    """
+        Ranks the books of each member of a club, and returns for each member
+        a list of the best ranked book_isbns that are in the catalogue and
+        have not been used in a meeting of the club. The lists are cut to the
+        most books that merging recommendations_limit recommendations can reach,
+        which is one for every pick and every duplicate skipped, and for SVD
+        models only that many books are selected from each member's scores.
+        If the model has an item index, only the candidates it retrieves
+        for each member are scored. If candidate sources are configured, only
+        the books they give for the club are scored. Large clubs are scored
+        by a pool of worker processes. Item-based KNN models are scored from
+        the neighbour lists of each member's rated books. Members that the
+        model can not score are given the candidates of its popularity
+        fallback ranking instead.
+    """
+    precomputed_rankings = precomputed.get_rankings(all_member_ids, model.version)
+    online_member_ids = [member_id for member_id in all_member_ids if member_id not in precomputed_rankings]
+    depth = 2 * recommendations_limit
+    candidate_set = None
+
+    if online_member_ids:
+        candidate_set = candidates.generate(model, all_member_ids)
+
+    excluded_items = _get_excluded_items(model, used_book_isbns)
+
+    if (model.factors != None):
+        online_rankings = parallel.rank_members(
+            model,
+            online_member_ids,
+            foldin.get_member_ratings(online_member_ids),
+            k = depth,
+            excluded_items = excluded_items,
+            total_candidates = ann.total_candidates(),
+            candidate_items = _to_inner_iids(model, candidate_set)
+        )
+    elif (model.neighbours != None):
+        online_rankings = neighbours.rank_members(
+            model.neighbours,
+            online_member_ids,
+            foldin.get_member_ratings(online_member_ids),
+            k = depth,
+            excluded_items = excluded_items,
+            candidate_items = _to_inner_iids(model, candidate_set)
+        )
+    else:
+        online_rankings = [
+            _rank_with_anti_test_set(model.algo, member_id, _to_inner_iids(model, candidate_set))
+            for member_id in online_member_ids
+        ]
+
+    online_rankings = dict(zip(online_member_ids, online_rankings))
+    fallback_candidates = None
+    all_candidates = []
+
+    for member_id in all_member_ids:
+        member_candidates = []
+
+        if ((member_id in online_rankings) and (online_rankings[member_id] is None)):
+            if (fallback_candidates == None):
+                fallback_candidates = popularity.fallback_candidates(
+                    model.item_model,
+                    used_book_isbns,
+                    catalogue.index.model_mask(model.item_model),
+                    depth
+                )
+
+            all_candidates.append(fallback_candidates)
+            continue
+
+        for book_isbn in precomputed_rankings.get(member_id, online_rankings.get(member_id)):
+            if (len(member_candidates) >= depth):
+                break
+
+            book_isbn = str(book_isbn)
+
+            if ((book_isbn not in used_book_isbns) and catalogue.index.contains(book_isbn)):
+                member_candidates.append(book_isbn)
+
+        all_candidates.append(member_candidates)
+
+    return all_candidates
+
 def get_recommendations_for_club(club_id, recommendations_limit):
     """
         Used to retrieve recommendations for a club for book selection.
@@ -167,76 +353,64 @@ def get_recommendations_for_club(club_id, recommendations_limit):
         Each book is based on a single member's prefernce, so each member's
         top predictions are used instead of the average of each book.
         Books that are already used in a meeting are not recommended again.
-        Returns None if total members in a club are zero or below.
+        Members with precomputed recommendations for the current model
+        version are not scored again. Members that are new to the model,
+        or have rated books since it was trained, are folded in from their ratings.
+        Members take turns from a random member when there are more members
+        than recommendations, so that every member is recommended for over time.
+        The candidates of each member are cached for the club's members,
+        used books and the model version, so they are not ranked again
+        until one of these, the ratings of its members, or the books in
+        the system, change.
+        A club without members is recommended the books of the model's
+        popularity fallback ranking, or no books if it has none.
+        Clubs with a recommendation strategy other than members taking turns
+        are recommended the books with the best group score of their members
+        under that strategy instead, for SVD models.
+        Returns None if no recommender model is available.
     """
-    try:
-        (predictions, algo) = dump.load('book_clubs/recommender_algorithm')
-    except:
+    model = registry.get_model()
+
+    if (model == None):
         return None
 
-    recommendations = []
+    catalogue.index.refresh()
     club = Club.objects.get(id = club_id)
     all_member_ids = list(club.members.all().values_list('id', flat = True))
+    used_book_isbns = set(Book.objects.filter(meeting__club = club).values_list('isbn', flat = True))
     total_members = len(all_member_ids)
     randomizer = 0
 
     if (total_members > recommendations_limit):
         randomizer = random.randint(0, total_members - 1)
-        i = randomizer
-    elif(total_members > 0):
-        members = total_members
-    else:
-        return None
-
-    all_recommendations = []
-
-    for member_id in all_member_ids:
-        user_recommendations = []
-
-        try:
-            test_set = _get_anti_test_set_for_user(algo.trainset, member_id)
-            predictions = algo.test(test_set)
-
-            for user_id, book_isbn, actual_rating, estimated_rating, _ in predictions:
-                user_recommendations.append((book_isbn, estimated_rating))
-
-            user_recommendations.sort(key=lambda x: x[1], reverse=True)
-        except ValueError:
-            pass
-
-        all_recommendations.append(user_recommendations)
-
-    all_book_isbns = list(Book.objects.all().values_list('isbn', flat = True))
-    used_book_isbns = list(Book.objects.filter(meeting__club = club).values_list('isbn', flat = True))
-    i = randomizer
-    j = [0] * total_members
-
-    while (len(recommendations) < recommendations_limit):
-        checks_passed = False
+    elif (total_members <= 0):
+        if (model.item_model == None):
+            return []
 
-        while (not checks_passed):
-            while (len(all_recommendations[i]) <= j[i]):
-                all_recommendations.remove(all_recommendations[i])
-                j.pop(i)
+        return popularity.fallback_candidates(
+            model.item_model,
+            used_book_isbns,
+            catalogue.index.model_mask(model.item_model),
+            recommendations_limit
+        )
 
-                if (len(all_recommendations) <= 0):
-                    return recommendations
+    strategy = club.recommendation_strategy
 
-                if (i >= len(all_recommendations)):
-                    i = 0
+    if ((strategy != Club.RecommendationStrategies.ROUND_ROBIN) and (model.factors != None)):
+        cache_key = cache.make_key(club.id, all_member_ids, used_book_isbns, model.version, recommendations_limit, strategy)
+        recommendations = cache.get(cache_key)
 
-            checks_passed = True
-            book_isbn = all_recommendations[i][j[i]][0]
+        if (recommendations == None):
+            recommendations = _get_group_recommendations(model, all_member_ids, used_book_isbns, recommendations_limit, strategy)
+            cache.set(cache_key, recommendations)
 
-            if ((book_isbn in used_book_isbns) or (book_isbn in recommendations) or (not (book_isbn in all_book_isbns))):
-                j[i] = j[i] + 1
-                checks_passed = False
+        return recommendations
 
-        recommendations.append(all_recommendations[i][j[i]][0])
-        i = i + 1
+    cache_key = cache.make_key(club.id, all_member_ids, used_book_isbns, model.version, recommendations_limit)
+    all_recommendations = cache.get(cache_key)
 
-        if (i >= len(all_recommendations)):
-            i = 0
-            j = [x+1 for x in j]
+    if (all_recommendations == None):
+        all_recommendations = _get_club_candidates(model, all_member_ids, used_book_isbns, recommendations_limit)
+        cache.set(cache_key, all_recommendations)
 
-    return recommendations
+    return merge.round_robin_merge(all_recommendations, recommendations_limit, start = randomizer)
@@ -0,0 +1,67 @@
+import random
+import timeit
+from django.core.management.base import BaseCommand
+from book_clubs.recommender.merge import round_robin_merge
+
+def _legacy_merge(all_recommendations, recommendations_limit):
+    """The merge loop get_recommendations_for_club used before the merge engine."""
+    recommendations = []
+    all_recommendations = list(all_recommendations)
+    i = 0
+    j = [0] * len(all_recommendations)
+
+    while (len(recommendations) < recommendations_limit):
+        checks_passed = False
+
+        while (not checks_passed):
+            while (len(all_recommendations[i]) <= j[i]):
+                all_recommendations.pop(i)
+                j.pop(i)
+
+                if (len(all_recommendations) <= 0):
+                    return recommendations
+
+                if (i >= len(all_recommendations)):
+                    i = 0
+
+            checks_passed = True
+            book_isbn = all_recommendations[i][j[i]]
+
+            if (book_isbn in recommendations):
+                j[i] = j[i] + 1
+                checks_passed = False
+
+        recommendations.append(all_recommendations[i][j[i]])
+        i = i + 1
+
+        if (i >= len(all_recommendations)):
+            i = 0
+            j = [x+1 for x in j]
+
+    return recommendations
+
+class Command(BaseCommand):
+    """Times the round robin merge against the merge loop it replaced."""
+
+    help = 'Benchmarks merging member recommendations for clubs of different sizes.'
+
+    CLUB_SIZES = [5, 50, 500]
+    LIMIT = 8
+    TOTAL_BOOKS = 1000
+    REPEATS = 200
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type = int, default = Command.LIMIT, help = 'Recommendations merged per club.')
+        parser.add_argument('--total-books', type = int, default = Command.TOTAL_BOOKS, help = 'Books candidates are drawn from.')
+        parser.add_argument('--repeats', type = int, default = Command.REPEATS, help = 'Merges timed per club size.')
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+        repeats = options['repeats']
+        generator = random.Random(0)
+
+        for club_size in Command.CLUB_SIZES:
+            candidates = [generator.sample(range(options['total_books']), 2 * limit) for _ in range(club_size)]
+            legacy_time = timeit.timeit(lambda: _legacy_merge(candidates, limit), number = repeats) / repeats
+            merge_time = timeit.timeit(lambda: round_robin_merge(candidates, limit), number = repeats) / repeats
+            print(f'{club_size} members: legacy {legacy_time * 1e6:.1f}us, round robin {merge_time * 1e6:.1f}us')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from book_clubs.models import Club
+from book_clubs.recommender import candidates, registry
+
+class Command(BaseCommand):
+    """Reports how many candidate books each configured source gives a club."""
+
+    help = 'Prints the contribution of each RECOMMENDER_CANDIDATES source to the candidates of a club.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('club_id', type = int, help = 'Id of the club.')
+
+    def handle(self, *args, **options):
+        model = registry.get_model()
+
+        if (model == None):
+            raise CommandError('No recommender model could be loaded.')
+
+        try:
+            club = Club.objects.get(id = options['club_id'])
+        except Club.DoesNotExist:
+            raise CommandError(f'There is no club with id {options["club_id"]}.')
+
+        candidate_set = candidates.generate(model, list(club.members.values_list('id', flat = True)))
+
+        if (candidate_set == None):
+            print('No candidate sources are configured, every book is scored.')
+            return
+
+        print(f'{len(candidate_set)} candidates for {club.name}:')
+
+        for line in candidate_set.report():
+            print(line)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from book_clubs.recommender import training
+from book_clubs.recommender.rating_matrix import RatingMatrix
+
+class Command(BaseCommand):
+    """Saves the ratings as a sparse rating matrix that training and evaluation load in one read."""
+
+    help = 'Saves the Rating table, or a Book-Crossing ratings CSV file, as a rating matrix directory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help = 'Path of the rating matrix directory to save, which is replaced if it exists.')
+        parser.add_argument('--csv', help = 'Book-Crossing ratings CSV file to read instead of the Rating table.')
+        parser.add_argument('--books', help = 'Book-Crossing books CSV file, ratings of books missing from it are skipped.')
+        parser.add_argument('--every-nth', type = int, default = 0, help = 'Keep one rating in every this many CSV rows.')
+        parser.add_argument('--chunk-size', type = int, default = training.CHUNK_SIZE, help = 'Ratings read per database round trip.')
+
+    def handle(self, *args, **options):
+        if options['csv']:
+            rating_matrix = RatingMatrix.from_csv(options['csv'], options['books'], options['every_nth'])
+        elif (options['books'] or options['every_nth']):
+            raise CommandError('--books and --every-nth only apply to --csv.')
+        else:
+            rating_matrix = RatingMatrix.from_database(options['chunk_size'])
+
+        rating_matrix.save(options['path'])
+        print(f'Saved {len(rating_matrix)} ratings of {rating_matrix.n_users} users and {rating_matrix.n_items} items to {options["path"]}.')
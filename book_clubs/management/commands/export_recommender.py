@@ -0,0 +1,31 @@
+import datetime
+from surprise import dump
+from django.core.management.base import BaseCommand, CommandError
+from book_clubs.recommender import quantization
+from book_clubs.recommender.factors import FactorModel
+
+class Command(BaseCommand):
+    """Exports a surprise dump of an SVD recommender as a memory-mappable directory."""
+
+    help = 'Exports a surprise SVD dump as a directory of .npy arrays that workers memory-map.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help = 'Path of the surprise dump.')
+        parser.add_argument('directory', help = 'Directory to export the model to. A model already exported there is replaced without rewriting its files.')
+        parser.add_argument('--quantize', choices = quantization.DTYPES, help = 'Dtype to store the factors as, int8 factors being scaled per row.')
+        parser.add_argument('--model-version', help = 'Version of the exported model, defaults to the current time.')
+
+    def handle(self, *args, **options):
+        (_, algo) = dump.load(options['source'])
+
+        if not FactorModel.supports(algo):
+            raise CommandError('Only SVD recommender models can be exported.')
+
+        version = options['model_version'] or datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d%H%M%S')
+        factors = FactorModel.from_algo(algo)
+
+        if options['quantize']:
+            factors = factors.quantize(options['quantize'])
+
+        factors.save(options['directory'], meta = {'version' : version})
+        print(f'Exported model version {version} to {options["directory"]}, with {factors.factor_dtype} factors taking {factors.factor_nbytes} bytes.')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from book_clubs.recommender import registry, precomputed
+
+class Command(BaseCommand):
+    """Precomputes the top recommendations of every user known to the recommender model."""
+
+    help = 'Fills the UserRecommendation table from the current recommender model.'
+
+    LIMIT = 50
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type = int, default = Command.LIMIT, help = 'Recommendations stored per user.')
+        parser.add_argument('--batch-size', type = int, default = Command.BATCH_SIZE, help = 'Users scored at a time.')
+
+    def handle(self, *args, **options):
+        model = registry.get_model()
+
+        if (model == None):
+            raise CommandError('No recommender model could be loaded.')
+
+        if (model.factors == None):
+            raise CommandError('Only SVD recommender models can be precomputed.')
+
+        total_users = precomputed.precompute(model, options['limit'], options['batch_size'])
+        print(f'Recommendations precomputed for {total_users} users with model version {model.version}.')
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from book_clubs.recommender import registry
+from book_clubs.recommender.store import ModelStore, StoreError
+
+class Command(BaseCommand):
+    """Makes a trained model version the one that is served."""
+
+    help = 'Publishes a model version saved in RECOMMENDER_MODELS_DIR, which workers then swap to without restarting.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', help = 'Version of the model to publish.')
+
+    def handle(self, *args, **options):
+        store = ModelStore(settings.RECOMMENDER_MODELS_DIR)
+        version = options['version']
+
+        try:
+            registry.load_artifact(store.version_path(version))
+        except Exception as error:
+            raise CommandError(f'Model version {version} can not be loaded: {error}')
+
+        try:
+            store.publish(version)
+        except StoreError as error:
+            raise CommandError(str(error))
+
+        print(f'Published model version {version}.')
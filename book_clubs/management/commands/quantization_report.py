@@ -0,0 +1,42 @@
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from book_clubs.recommender import quantization, registry
+from book_clubs.recommender.factors import FactorModel
+
+class Command(BaseCommand):
+    """Reports how much quantizing the factors of an SVD model changes its rankings."""
+
+    help = 'Compares the top-N rankings of a float64 SVD model with copies of it whose factors are quantized.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help = 'Model directory to compare, defaults to the served model.')
+        parser.add_argument('--n', type = int, default = 10, help = 'Length of the rankings that are compared.')
+        parser.add_argument('--users', type = int, default = 1000, help = 'Number of users sampled from the model.')
+        parser.add_argument('--dtypes', nargs = '+', choices = quantization.DTYPES, default = ['float16', 'int8'], help = 'Dtypes to quantize the factors to.')
+        parser.add_argument('--seed', type = int, default = 0, help = 'Seed of the user sample.')
+
+    def handle(self, *args, **options):
+        if options['path']:
+            model = FactorModel.load(options['path'])
+        else:
+            loaded = registry.get_model()
+            model = None if (loaded == None) else loaded.factors
+
+        if (model == None):
+            raise CommandError('No SVD recommender model could be loaded.')
+
+        if (model.factor_dtype != 'float64'):
+            raise CommandError(f'The model factors are already stored as {model.factor_dtype}, a float64 model is needed to compare against.')
+
+        total_users = min(options['users'], model.n_users)
+        inner_uids = np.sort(np.random.default_rng(options['seed']).choice(model.n_users, total_users, replace = False))
+        print(f'float64: {model.factor_nbytes} bytes of factors, {model.n_users} users, {model.n_items} items')
+
+        for dtype in options['dtypes']:
+            quantized = model.quantize(dtype)
+            report = quantization.compare_rankings(model, quantized, options['n'], inner_uids)
+            print(
+                f'{dtype}: {quantized.factor_nbytes} bytes ({model.factor_nbytes / quantized.factor_nbytes:.1f}x smaller), '
+                f'top-{options["n"]} overlap mean {report["mean_overlap"]:.4f} min {report["min_overlap"]:.4f} over {report["users"]} users, '
+                f'rating error mean {report["mean_error"]:.5f} max {report["max_error"]:.5f}'
+            )
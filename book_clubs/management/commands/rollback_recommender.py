@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from book_clubs.recommender.store import ModelStore, StoreError
+
+class Command(BaseCommand):
+    """Serves a previously published model version again."""
+
+    help = 'Rolls the current model of RECOMMENDER_MODELS_DIR back to the version published before it, or to a given version.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', dest = 'version', help = 'Previously published version to roll back to.')
+        parser.add_argument('--list', action = 'store_true', help = 'List the published versions instead of rolling back.')
+
+    def handle(self, *args, **options):
+        store = ModelStore(settings.RECOMMENDER_MODELS_DIR)
+
+        if options['list']:
+            current = store.current()
+
+            for (version, entry) in store.manifest()['versions'].items():
+                marker = '*' if (version == current) else ' '
+                print(f'{marker} {version} published {entry["published_at"]}')
+
+            return
+
+        try:
+            version = store.rollback(options['version'])
+        except StoreError as error:
+            raise CommandError(str(error))
+
+        print(f'Rolled back to model version {version}.')
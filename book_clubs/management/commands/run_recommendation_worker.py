@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from book_clubs.recommender import jobs, parallel
+
+class Command(BaseCommand):
+    """Runs queued meeting recommendation jobs."""
+
+    help = 'Claims and runs queued meeting recommendation jobs.'
+
+    SLEEP = 2.0
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action = 'store_true', help = 'Run the jobs that are due, then exit.')
+        parser.add_argument('--sleep', type = float, default = Command.SLEEP, help = 'Seconds to wait when the queue is empty.')
+
+    def handle(self, *args, **options):
+        # Large clubs are scored by a pool of processes forked from this one, which runs no other threads
+        parallel.enable()
+
+        try:
+            if options['once']:
+                print(f'Recommendation jobs run: {jobs.run_due_jobs()}')
+                return
+
+            while True:
+                if not jobs.run_due_jobs():
+                    time.sleep(options['sleep'])
+        finally:
+            parallel.shutdown()
+            parallel.enable(False)
@@ -0,0 +1,53 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from book_clubs.recommender import quantization, training
+from book_clubs.recommender.store import ModelStore, StoreError
+from book_clubs.recommender.rating_matrix import RatingMatrix
+
+class Command(BaseCommand):
+    """Trains the recommender model on the ratings stored in the database."""
+
+    help = 'Fits the configured recommender algorithm on the Rating table and saves a versioned model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help = 'Directory to save the model in, defaults to a new version directory in RECOMMENDER_MODELS_DIR.')
+        parser.add_argument('--model-version', help = 'Version of the trained model, defaults to the current time.')
+        parser.add_argument('--chunk-size', type = int, default = training.CHUNK_SIZE, help = 'Ratings read per database round trip.')
+        parser.add_argument('--ratings', help = 'Rating matrix directory saved by export_ratings to train on instead of the Rating table.')
+        parser.add_argument('--quantize', choices = quantization.DTYPES, help = 'Dtype to store the factors of SVD models as, int8 factors being scaled per row.')
+        parser.add_argument('--publish', action = 'store_true', help = 'Make the trained model the current version of RECOMMENDER_MODELS_DIR.')
+
+    def handle(self, *args, **options):
+        version = options['model_version'] or training.new_version()
+
+        if (options['publish'] and options['output']):
+            raise CommandError('Only models saved in RECOMMENDER_MODELS_DIR can be published, --output can not be used with --publish.')
+
+        directory = options['output'] or os.path.join(settings.RECOMMENDER_MODELS_DIR, version)
+
+        if ((not options['output']) and os.path.exists(directory)):
+            raise CommandError(f'Model version {version} already exists in {settings.RECOMMENDER_MODELS_DIR}, versions can not be trained again.')
+
+        rating_matrix = None
+
+        if options['ratings']:
+            rating_matrix = RatingMatrix.load(options['ratings'])
+
+        try:
+            meta = training.train(directory, version, options['chunk_size'], rating_matrix, options['quantize'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        print(f'Trained model version {meta["version"]} saved to {directory}.')
+        print(f'Ratings: {meta["ratings"]}, users: {meta["users"]}, items: {meta["items"]}')
+        peak_memory = 'unknown' if (meta['peak_memory'] == None) else f'{meta["peak_memory"] / (1024 * 1024):.1f}MB'
+        print(f'Fit time: {meta["fit_seconds"]:.2f}s, peak memory: {peak_memory}')
+
+        if options['publish']:
+            try:
+                ModelStore(settings.RECOMMENDER_MODELS_DIR).publish(version)
+            except StoreError as error:
+                raise CommandError(str(error))
+
+            print(f'Published model version {version}.')
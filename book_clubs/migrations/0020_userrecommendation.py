@@ -0,0 +1,30 @@
+# Generated by Django 3.2.5 on 2026-10-18 15:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_clubs', '0019_auto_20220405_1424'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRecommendation',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField()),
+                ('model_version', models.CharField(max_length=100)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='book_clubs.book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'rank'],
+                'unique_together': {('user', 'model_version', 'rank')},
+            },
+        ),
+    ]
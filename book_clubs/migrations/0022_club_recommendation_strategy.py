@@ -0,0 +1,18 @@
+# Generated by Django 3.2.5 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book_clubs', '0021_recommendationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='club',
+            name='recommendation_strategy',
+            field=models.IntegerField(blank=True, choices=[(0, 'Members take turns'), (1, 'Average'), (2, 'Least misery'), (3, 'Most pleasure'), (4, 'Fairness')], default=0),
+        ),
+    ]
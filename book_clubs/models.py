@@ -81,10 +81,26 @@ class Club(models.Model):
     # for example no longer used as an index and starts from 1 instead.
     MEETING_CYCLE_DEFAULT = 0
 
+    # Used to set or check how the preferences of members are combined into recommendations for the club.
+    class RecommendationStrategies(models.IntegerChoices):
+
+        ROUND_ROBIN = 0, 'Members take turns'
+        AVERAGE = 1, 'Average'
+        LEAST_MISERY = 2, 'Least misery'
+        MOST_PLEASURE = 3, 'Most pleasure'
+        FAIRNESS = 4, 'Fairness'
+
     id = models.AutoField(primary_key = True)
     name = models.CharField(max_length = 50, blank = False)
     description = models.CharField(max_length = 1000, blank = True)
 
+    # The strategy of the club according to RecommendationStrategies.
+    recommendation_strategy = models.IntegerField(
+        blank = True,
+        choices = RecommendationStrategies.choices,
+        default = RecommendationStrategies.ROUND_ROBIN
+    )
+
     meeting_cycle = models.IntegerField(
         null = False,
         blank = True,
@@ -348,6 +364,51 @@ class MeetingRecommendation(models.Model):
 
         unique_together = [['meeting', 'book']]
 
+class RecommendationJob(models.Model):
+
+    """
+        The model for a queued job that fills in the recommendations of a meeting.
+        Jobs are claimed and run by the run_recommendation_worker command,
+        and are retried until max_attempts is reached.
+    """
+
+    # Used to set or check the status of a job.
+    class Statuses(models.IntegerChoices):
+
+        PENDING = 0, 'Pending'
+        RUNNING = 1, 'Running'
+        DONE = 2, 'Done'
+        FAILED = 3, 'Failed'
+
+    MAX_ATTEMPTS_DEFAULT = 3
+
+    id = models.AutoField(primary_key = True)
+    meeting = models.OneToOneField('Meeting', on_delete = models.CASCADE, blank = False, related_name = 'recommendation_job')
+    recommendations_limit = models.PositiveIntegerField(blank = False)
+    status = models.IntegerField(blank = False, choices = Statuses.choices, default = Statuses.PENDING)
+    attempts = models.PositiveIntegerField(blank = False, default = 0)
+    max_attempts = models.PositiveIntegerField(blank = False, default = MAX_ATTEMPTS_DEFAULT)
+    last_error = models.TextField(blank = True)
+
+    # The job is not claimed before this time, which is used to delay retries.
+    run_after = models.DateTimeField(default = timezone.now, blank = False)
+    updated_at = models.DateTimeField(auto_now = True)
+
+    class Meta:
+
+        """Model options."""
+
+        ordering = ['run_after', 'id']
+        indexes = [models.Index(fields = ['status', 'run_after'])]
+
+    def status_label(self):
+        """Return status as label."""
+        return RecommendationJob.Statuses(self.status).label
+
+    def is_pending(self):
+        """Checks if the job has not finished yet."""
+        return self.status in (RecommendationJob.Statuses.PENDING, RecommendationJob.Statuses.RUNNING)
+
 class Message(models.Model):
     """The data model for sending messages in the meeting chat."""
 
@@ -360,3 +421,25 @@ class Message(models.Model):
     def post_time_visual_output(self):
         """Outputs the post time as more appealing."""
         return f'{self.post_time.hour} : {self.post_time.minute}'
+
+class UserRecommendation(models.Model):
+
+    """
+        The model for storing a precomputed recommendation of a book for a user.
+        Rank orders a user's recommendations, starting from 1 for the best,
+        and model_version is the version of the recommender model that produced it.
+    """
+
+    id = models.AutoField(primary_key = True)
+    user = models.ForeignKey('User', on_delete = models.CASCADE, blank = False)
+    book = models.ForeignKey('Book', on_delete = models.CASCADE, blank = False)
+    rank = models.PositiveIntegerField(blank = False)
+    score = models.FloatField(blank = False)
+    model_version = models.CharField(max_length = 100, blank = False)
+
+    class Meta:
+
+        """Model options."""
+
+        ordering = ['user', 'rank']
+        unique_together = [['user', 'model_version', 'rank']]
@@ -0,0 +1,84 @@
+import numpy as np
+from book_clubs.models import Club
+from . import foldin, scoring
+
+# Weight of the spread of the members' normalized scores of an item, which the fairness strategy subtracts from their mean.
+FAIRNESS_WEIGHT = 1.0
+
+Strategies = Club.RecommendationStrategies
+
+def aggregate(scores, strategy):
+    """
+        Combines a (members x items) matrix of estimated ratings into the
+        group score of each item according to strategy, one of
+        Club.RecommendationStrategies other than ROUND_ROBIN.
+        AVERAGE is the mean rating of the members, LEAST_MISERY the lowest
+        rating of any member, and MOST_PLEASURE the highest. FAIRNESS
+        normalizes each member's ratings to their mean and spread over
+        the items, so that every member weighs the same, and takes the mean
+        of the normalized ratings less FAIRNESS_WEIGHT times their spread,
+        which favours items that members agree on.
+    """
+    if (strategy == Strategies.AVERAGE):
+        return scores.mean(axis = 0)
+
+    if (strategy == Strategies.LEAST_MISERY):
+        return scores.min(axis = 0)
+
+    if (strategy == Strategies.MOST_PLEASURE):
+        return scores.max(axis = 0)
+
+    if (strategy == Strategies.FAIRNESS):
+        spreads = scores.std(axis = 1, keepdims = True)
+        spreads[spreads == 0] = 1
+        normalized = (scores - scores.mean(axis = 1, keepdims = True)) / spreads
+        return normalized.mean(axis = 0) - FAIRNESS_WEIGHT * normalized.std(axis = 0)
+
+    raise ValueError(f'Scores can not be aggregated with strategy {strategy}.')
+
+def rank_club(model, member_ids, strategy, k = None, excluded_items = None, member_ratings = None, candidate_items = None):
+    """
+        Ranks items for a club of the members with member_ids by their group
+        score under strategy, computed from one matrix product of the
+        stacked UserVectors of the members with the item factors of model,
+        a FactorModel. Items with True in the boolean array excluded_items,
+        and items that every member has rated, are left out, as they are
+        when members take turns. Members are folded in from member_ratings
+        in the same way as scoring.rank_members, and members that can not
+        be scored are left out of the group.
+        If candidate_items, an array of item inner ids, is given only those
+        items are scored. Returns a pair of an int32 array of the best k item
+        inner ids, best first, and a float32 array of their group scores,
+        or None if no member can be scored.
+    """
+    vectors = [vector for vector in foldin.member_vectors(model, member_ids, member_ratings or {}) if (vector != None)]
+
+    if not vectors:
+        return None
+
+    if (candidate_items is not None):
+        candidate_items = np.unique(np.asarray(candidate_items, dtype = np.int64))
+
+    scores = scoring.score_vectors(
+        model,
+        np.array([vector.bias for vector in vectors]),
+        np.vstack([vector.factors for vector in vectors]),
+        candidate_items
+    )
+    group_scores = aggregate(scores, strategy)
+    left_out = np.bincount(
+        np.concatenate([np.unique(vector.rated_items) for vector in vectors]).astype(np.int64),
+        minlength = model.n_items
+    ) == len(vectors)
+
+    if (excluded_items is not None):
+        left_out |= excluded_items
+
+    if (candidate_items is not None):
+        group_scores[left_out[candidate_items]] = -np.inf
+    else:
+        group_scores[left_out] = -np.inf
+
+    columns = scoring.top_items(group_scores[np.newaxis, :], k)[0]
+    items = columns if (candidate_items is None) else candidate_items[columns]
+    return (items.astype(np.int32), group_scores[columns].astype(np.float32))
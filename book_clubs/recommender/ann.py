@@ -0,0 +1,126 @@
+import os
+import numpy as np
+from django.conf import settings
+
+# Items assigned to clusters at a time while building an index.
+CHUNK_SIZE = 10000
+
+class ItemIndex:
+
+    """
+        An inverted file index over the items of a FactorModel, used to find
+        the items a user is likely to rate highest without scoring them all.
+        Each item is held as its factors with its bias appended, so that the
+        inner product with a user's factors followed by a one is the item's
+        part of the estimated rating. One more coordinate gives every item
+        vector the same norm, so that the items closest to a query, which
+        has zero in that coordinate, are the items with the highest inner
+        product. Items are clustered with k-means, and a search only visits
+        the clusters whose centroids are closest to the query.
+        The items of cluster c are list_items[list_indptr[c] : list_indptr[c + 1]].
+    """
+
+    # The arrays saved by save, each in a .npy file of the same name.
+    ARRAYS = ['centroids', 'list_indptr', 'list_items']
+
+    def __init__(self, centroids, list_indptr, list_items):
+        self.centroids = centroids
+        self.list_indptr = list_indptr
+        self.list_items = list_items
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @staticmethod
+    def item_vectors(model):
+        """Returns the item factors of model with the item biases and the norm completing coordinate appended."""
+        vectors = np.hstack([model.item_vectors(), np.asarray(model.item_biases)[:, None]])
+        squared_norms = (vectors ** 2).sum(axis = 1)
+        return np.hstack([vectors, np.sqrt(squared_norms.max() - squared_norms)[:, None]])
+
+    @staticmethod
+    def query_vectors(user_factors):
+        """Returns user factors with a one and a zero appended, to be matched against item_vectors."""
+        user_factors = np.atleast_2d(user_factors)
+        return np.hstack([user_factors, np.ones((len(user_factors), 1)), np.zeros((len(user_factors), 1))])
+
+    @classmethod
+    def build(cls, model, n_lists = None, iterations = 10, seed = 0):
+        """
+            Builds an index over the items of model with n_lists clusters,
+            which defaults to the square root of the number of items.
+            The clusters are found with iterations rounds of k-means.
+        """
+        vectors = cls.item_vectors(model).astype(np.float32)
+
+        if (n_lists == None):
+            n_lists = int(np.sqrt(len(vectors)))
+
+        n_lists = max(1, min(n_lists, len(vectors)))
+        generator = np.random.default_rng(seed)
+        centroids = vectors[generator.choice(len(vectors), n_lists, replace = False)]
+        assignments = _nearest_centroids(vectors, centroids)
+
+        for _ in range(iterations):
+            order = np.argsort(assignments, kind = 'stable')
+            counts = np.bincount(assignments, minlength = n_lists)
+            filled = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            centroids[filled] = np.add.reduceat(vectors[order], starts) / counts[filled, None]
+            assignments = _nearest_centroids(vectors, centroids)
+
+        list_items = np.argsort(assignments, kind = 'stable').astype(np.int32)
+        list_indptr = np.zeros(n_lists + 1, dtype = np.int64)
+        list_indptr[1:] = np.cumsum(np.bincount(assignments, minlength = n_lists))
+        return cls(centroids, list_indptr, list_items)
+
+    def search(self, query_vector, total_candidates):
+        """
+            Returns the inner ids of at least total_candidates items, or every
+            item if there are fewer, taken from the clusters whose centroids
+            are closest to query_vector.
+        """
+        distances = (self.centroids ** 2).sum(axis = 1) - (2 * (self.centroids @ query_vector))
+        list_order = np.argsort(distances, kind = 'stable')
+        list_sizes = np.diff(self.list_indptr)[list_order]
+        total_lists = int(np.searchsorted(np.cumsum(list_sizes), total_candidates)) + 1
+        return np.concatenate([
+            self.list_items[self.list_indptr[c] : self.list_indptr[c + 1]] for c in list_order[:total_lists]
+        ])
+
+    @classmethod
+    def is_saved_in(cls, directory):
+        """Checks if directory holds a saved ItemIndex."""
+        return all(os.path.isfile(_array_path(directory, name)) for name in cls.ARRAYS)
+
+    def save(self, directory):
+        """Saves the index as .npy files in directory."""
+        for name in ItemIndex.ARRAYS:
+            np.save(_array_path(directory, name), np.ascontiguousarray(getattr(self, name)))
+
+    @classmethod
+    def load(cls, directory, mmap_mode = 'r'):
+        """Loads an index saved in directory, memory-mapping its arrays with mmap_mode."""
+        return cls(**{name : np.load(_array_path(directory, name), mmap_mode = mmap_mode) for name in cls.ARRAYS})
+
+def _array_path(directory, name):
+    return os.path.join(directory, 'ann_' + name + '.npy')
+
+def _nearest_centroids(vectors, centroids):
+    """Returns the index of the centroid closest to each of vectors."""
+    assignments = np.empty(len(vectors), dtype = np.int64)
+    centroid_norms = (centroids ** 2).sum(axis = 1)
+
+    for start in range(0, len(vectors), CHUNK_SIZE):
+        chunk = vectors[start : start + CHUNK_SIZE]
+        assignments[start : start + CHUNK_SIZE] = np.argmin(centroid_norms - (2 * (chunk @ centroids.T)), axis = 1)
+
+    return assignments
+
+def total_candidates():
+    """
+        Returns the number of candidates fetched from the index for each user
+        before they are scored exactly, or None if every item should be scored.
+    """
+    return settings.RECOMMENDER_ANN.get('candidates')
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from operator import itemgetter
+from book_clubs import helpers
+from book_clubs.models import Club, Meeting, Membership
+from . import aggregation, ann, catalogue, foldin, merge, neighbours, popularity, registry, scoring
+from .jobs import RecommendationsUnavailable
+
+def _score_users(model, user_ids, depth):
+    """
+        Ranks the best depth books in the catalogue for every user in user_ids
+        in one pass. Returns a dict from user id to a list of (book_isbn, score)
+        pairs, best first, or None for users that the model can not score.
+    """
+    member_ratings = foldin.get_member_ratings(user_ids)
+    item_model = model.item_model
+
+    if (item_model == None):
+        rankings = {}
+
+        for user_id in user_ids:
+            ranking = [
+                (str(book_isbn), float(score))
+                for (book_isbn, score) in helpers._score_with_anti_test_set(model.algo, user_id)
+                if catalogue.index.contains(str(book_isbn))
+            ]
+            rankings[user_id] = ranking[:depth] or None
+
+        return rankings
+
+    excluded_items = ~catalogue.index.model_mask(item_model)
+
+    if (model.factors != None):
+        item_rankings = scoring.rank_member_items(
+            model.factors, user_ids, member_ratings, depth, excluded_items, ann.total_candidates()
+        )
+    else:
+        item_rankings = neighbours.rank_member_items(model.neighbours, user_ids, member_ratings, depth, excluded_items)
+
+    return {
+        user_id : None if (ranking == None) else list(zip(item_model.item_raw_ids[ranking[0]].tolist(), ranking[1].tolist()))
+        for (user_id, ranking) in zip(user_ids, item_rankings)
+    }
+
+def _fallback(model, used_book_isbns, total_books):
+    """Returns (book_isbn, None) pairs of the popularity fallback, which has no scores."""
+    if (model.item_model == None):
+        return []
+
+    book_isbns = popularity.fallback_candidates(
+        model.item_model,
+        used_book_isbns,
+        catalogue.index.model_mask(model.item_model),
+        total_books
+    )
+    return [(book_isbn, None) for book_isbn in book_isbns]
+
+def _rank_group(model, member_ids, used_book_isbns, k, strategy):
+    """Returns (book_isbn, group score) pairs of the best k books for a club under strategy, or None if no member can be scored."""
+    excluded_items = helpers._get_excluded_items(model, used_book_isbns)
+    ranking = aggregation.rank_club(model.factors, member_ids, strategy, k, excluded_items, foldin.get_member_ratings(member_ids))
+
+    if (ranking == None):
+        return None
+
+    return list(zip(model.factors.item_raw_ids[ranking[0]].tolist(), ranking[1].tolist()))
+
+def recommend(club_ids, user_ids, k):
+    """
+        Recommends k books for each club in club_ids and each user in user_ids,
+        scoring every user involved, including the members of the clubs,
+        with one pass over the model. Returns the model version and two dicts,
+        for clubs and for users, from id to a list of (book_isbn, score) pairs,
+        best first. Clubs are recommended from their members' rankings in the
+        same way as get_recommendations_for_club, starting from the first
+        member so the result is repeatable, and without books used in their
+        meetings. Clubs with a recommendation strategy other than members
+        taking turns are given the books with the best group score under it
+        instead, for SVD models, scored with one matrix product per club.
+        Users and members that the model can not score are given the
+        books of the popularity fallback, with a score of None.
+        Raises RecommendationsUnavailable if there is no model.
+    """
+    model = registry.get_model()
+
+    if (model == None):
+        raise RecommendationsUnavailable('No recommender model is available.')
+
+    catalogue.index.refresh()
+    club_members = defaultdict(list)
+    used_book_isbns = defaultdict(set)
+
+    for (club_id, member_id) in Membership.objects.filter(club_id__in = club_ids).order_by('id').values_list('club_id', 'member_id'):
+        club_members[club_id].append(member_id)
+
+    for (club_id, book_isbn) in Meeting.objects.filter(club_id__in = club_ids).exclude(chosen_book = None).values_list('club_id', 'chosen_book_id'):
+        used_book_isbns[club_id].add(book_isbn)
+
+    strategies = {}
+
+    if (model.factors != None):
+        strategies = dict(Club.objects.filter(id__in = club_ids).exclude(
+            recommendation_strategy = Club.RecommendationStrategies.ROUND_ROBIN
+        ).values_list('id', 'recommendation_strategy'))
+
+    all_user_ids = sorted(set(user_ids).union(*[club_members[club_id] for club_id in club_ids if club_id not in strategies]))
+    depth = (2 * k) + max([len(book_isbns) for book_isbns in used_book_isbns.values()], default = 0)
+    rankings = _score_users(model, all_user_ids, depth)
+
+    user_recommendations = {
+        user_id : rankings[user_id][:k] if (rankings[user_id] != None) else _fallback(model, set(), k)
+        for user_id in user_ids
+    }
+    club_recommendations = {}
+
+    for club_id in club_ids:
+        used = used_book_isbns[club_id]
+
+        if (club_id in strategies):
+            club_recommendations[club_id] = (
+                _rank_group(model, club_members[club_id], used, k, strategies[club_id])
+                or _fallback(model, used, k)
+            )
+            continue
+        fallback = None
+        candidate_lists = []
+
+        for member_id in club_members[club_id]:
+            if (rankings[member_id] == None):
+                if (fallback == None):
+                    fallback = _fallback(model, used, 2 * k)
+
+                candidate_lists.append(fallback)
+            else:
+                candidate_lists.append([pair for pair in rankings[member_id] if pair[0] not in used][:2 * k])
+
+        if candidate_lists:
+            club_recommendations[club_id] = merge.round_robin_merge(candidate_lists, k, key = itemgetter(0))
+        else:
+            club_recommendations[club_id] = _fallback(model, used, k)
+
+    return (model.version, club_recommendations, user_recommendations)
@@ -0,0 +1,73 @@
+import hashlib
+import uuid
+from django.core.cache import caches
+
+# The alias of the Django cache that club recommendations are stored in.
+CACHE_ALIAS = 'recommendations'
+
+GENERATION_KEY = 'generation'
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+def _club_generation_key(club_id):
+    return f'generation:club:{club_id}'
+
+def _new_generation():
+    """
+        Returns a new generation. Generations are random rather than
+        counted, so that two processes moving to a new generation at the
+        same time, or an evicted generation, never give an old one again.
+    """
+    return uuid.uuid4().hex
+
+def get_generations(club_id):
+    """
+        Returns the current generation of the whole cache and of the club
+        with club_id, read in one round trip to the cache backend. Every
+        entry is keyed by the generations it was stored in, so moving to a
+        new generation invalidates the entries of every club or of one
+        club, which are then evicted by the cache backend.
+    """
+    keys = [GENERATION_KEY, _club_generation_key(club_id)]
+    generations = _cache().get_many(keys)
+
+    for key in keys:
+        if key not in generations:
+            _cache().add(key, _new_generation(), timeout = None)
+            generations[key] = _cache().get(key)
+
+    return (generations[keys[0]], generations[keys[1]])
+
+def invalidate():
+    """Moves the whole cache to a new generation."""
+    _cache().set(GENERATION_KEY, _new_generation(), timeout = None)
+
+def invalidate_clubs(club_ids):
+    """Moves each club with one of club_ids to a new generation."""
+    _cache().set_many({_club_generation_key(club_id) : _new_generation() for club_id in club_ids}, timeout = None)
+
+def make_key(club_id, member_ids, used_book_isbns, model_version, recommendations_limit, strategy = None):
+    """
+        Returns the cache key for the club with club_id and member_ids that
+        has used used_book_isbns, and is recommended for with strategy if given.
+    """
+    parts = [
+        *get_generations(club_id),
+        str(club_id),
+        str(model_version),
+        str(recommendations_limit),
+        str(strategy),
+        ','.join(str(member_id) for member_id in sorted(member_ids)),
+        ','.join(sorted(used_book_isbns))
+    ]
+
+    return 'club:' + hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+def get(key):
+    """Returns the candidate lists or group recommendations stored under key, or None if there are none."""
+    return _cache().get(key)
+
+def set(key, candidate_lists):
+    """Stores the candidate lists, or group recommendations, of a club under key."""
+    _cache().set(key, candidate_lists)
@@ -0,0 +1,153 @@
+from django.conf import settings
+from django.db.models import Count
+from django.utils.module_loading import import_string
+from book_clubs.models import Rating
+
+class CandidateSource:
+
+    """
+        A source of candidate books for a club, which narrows the books
+        that are scored for its members. Generate returns at most limit
+        book_isbns, best first. Name identifies the source in reports.
+    """
+
+    name = None
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def generate(self, model, member_ids):
+        raise NotImplementedError
+
+class PopularSource(CandidateSource):
+
+    """
+        The books with the most ratings, read from the popularity rankings
+        of the model, or counted from the Rating table for models without them.
+    """
+
+    name = 'popular'
+    ranking = 'popular'
+
+    def generate(self, model, member_ids):
+        item_model = model.item_model
+
+        if ((item_model != None) and (item_model.popularity != None)):
+            items = item_model.popularity.ranking(self.ranking)[:self.limit]
+            return [str(book_isbn) for book_isbn in item_model.item_raw_ids[items]]
+
+        return self.generate_from_ratings()
+
+    def generate_from_ratings(self):
+        return list(
+            Rating.objects.values('book')
+            .annotate(total = Count('id'))
+            .order_by('-total', 'book')
+            .values_list('book', flat = True)[:self.limit]
+        )
+
+class RecentSource(PopularSource):
+
+    """
+        The books rated most recently. Books have no creation time, so
+        recency is that of their ratings, weighted as in the popularity
+        rankings of the model, or the books of the latest ratings otherwise.
+    """
+
+    name = 'recent'
+    ranking = 'recent'
+
+    def generate_from_ratings(self):
+        book_isbns = {}
+
+        for book_isbn in Rating.objects.order_by('-id').values_list('book', flat = True).iterator():
+            if (len(book_isbns) >= self.limit):
+                break
+
+            book_isbns.setdefault(book_isbn, None)
+
+        return list(book_isbns)
+
+class CoRatedSource(CandidateSource):
+
+    """
+        The books rated by the most users who have rated a book that a
+        member of the club has rated, leaving out the books the members
+        have rated themselves.
+    """
+
+    name = 'co_rated'
+
+    def generate(self, model, member_ids):
+        member_books = Rating.objects.filter(user_id__in = member_ids).values('book')
+        co_raters = Rating.objects.filter(book__in = member_books).exclude(user_id__in = member_ids).values('user')
+
+        return list(
+            Rating.objects.filter(user__in = co_raters)
+            .exclude(book__in = member_books)
+            .values('book')
+            .annotate(total = Count('user', distinct = True))
+            .order_by('-total', 'book')
+            .values_list('book', flat = True)[:self.limit]
+        )
+
+class CandidateSet:
+
+    """
+        The candidate books of a club, in the order their sources gave them,
+        with contributions holding how many books each source added that
+        no earlier source had given.
+    """
+
+    def __init__(self):
+        self.book_isbns = []
+        self.contributions = {}
+        self._seen = set()
+
+    def add(self, source_name, book_isbns):
+        added = 0
+
+        for book_isbn in book_isbns:
+            if book_isbn not in self._seen:
+                self._seen.add(book_isbn)
+                self.book_isbns.append(book_isbn)
+                added = added + 1
+
+        self.contributions[source_name] = self.contributions.get(source_name, 0) + added
+
+    def __len__(self):
+        return len(self.book_isbns)
+
+    def __contains__(self, book_isbn):
+        return book_isbn in self._seen
+
+    def report(self):
+        """Returns a line for each source with the number and share of candidates it added."""
+        return [
+            f'{name}: {added} ({(100 * added / max(len(self), 1)):.1f}%)'
+            for (name, added) in self.contributions.items()
+        ]
+
+def get_sources():
+    """Returns the sources configured in RECOMMENDER_CANDIDATES, in order."""
+    return [
+        import_string(options['source'])(options['limit'])
+        for options in settings.RECOMMENDER_CANDIDATES
+    ]
+
+def generate(model, member_ids):
+    """
+        Returns the CandidateSet of a club with member_ids from the configured
+        sources, or None if there are no sources and every book should be scored.
+    """
+    sources = get_sources()
+
+    if not sources:
+        return None
+
+    candidate_set = CandidateSet()
+
+    for source in sources:
+        candidate_set.add(source.name, source.generate(model, member_ids))
+
+    return candidate_set
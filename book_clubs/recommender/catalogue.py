@@ -0,0 +1,217 @@
+import itertools
+import threading
+import uuid
+import weakref
+import numpy as np
+from django.core.cache import caches
+from book_clubs.models import Book
+from . import cache
+
+LOG_KEY = 'catalogue'
+
+# Seconds a change to the catalogue is kept in the shared change log. A process
+# that has not refreshed its index for longer builds it again from the Book table.
+CHANGE_TIMEOUT = 24 * 60 * 60
+
+# Changes read from the shared change log per round trip to the cache.
+CHANGE_BATCH_SIZE = 100
+
+def _cache():
+    return caches[cache.CACHE_ALIAS]
+
+def _change_key(epoch, position):
+    return f'catalogue:{epoch}:{position}'
+
+def _log_state():
+    """
+        Returns the epoch of the shared change log of the catalogue and the
+        position of its last change, starting a new log if there is none.
+        A new epoch, which is random, makes every process build its index again.
+    """
+    state = _cache().get(LOG_KEY)
+
+    if (state == None):
+        _cache().add(LOG_KEY, (uuid.uuid4().hex, 0), timeout = None)
+        state = _cache().get(LOG_KEY)
+
+    return state
+
+def _publish(book_isbn, in_catalogue):
+    """
+        Appends a change to the shared change log, which adds the book with
+        book_isbn to the catalogue if in_catalogue or removes it otherwise.
+        Each change takes the first free position after the last one, so two
+        processes changing the catalogue at the same time never overwrite
+        each other's change.
+    """
+    (epoch, position) = _log_state()
+    position += 1
+
+    while not _cache().add(_change_key(epoch, position), (book_isbn, in_catalogue), timeout = CHANGE_TIMEOUT):
+        position += 1
+
+    _cache().set(LOG_KEY, (epoch, position), timeout = None)
+
+class CatalogueIndex:
+
+    """
+        An index of the ISBNs of every book in the catalogue, built once per
+        process. Each ISBN is given a dense integer id, and whether the book
+        with that id is still in the catalogue is held in a boolean array.
+        Books saved or deleted in this process update the index in place,
+        and the change is appended to a change log shared by all processes
+        through the cache. Once per request, refresh applies the changes
+        made since the index was last refreshed. The index is only built
+        again from the Book table when changes are missing from the log,
+        or fixtures have been loaded. Lookups only use the index of the
+        process, without a round trip to the cache.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._valid = np.zeros(0, dtype = bool)
+        self._epoch = None
+        self._applied = 0
+        self._changes = 0
+        self._model_masks = weakref.WeakKeyDictionary()
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        """
+            Applies the changes to the catalogue made since the index was
+            last refreshed, in this or another process, or builds the index
+            again if they can not all be read. Called once at the start of
+            every request that looks books up in the index. When nothing has
+            changed it takes a single round trip to the cache.
+        """
+        with self._lock:
+            if (self._epoch == None):
+                self._build()
+                return
+
+            keys = [LOG_KEY, _change_key(self._epoch, self._applied + 1)]
+            values = _cache().get_many(keys)
+            (epoch, position) = values.get(LOG_KEY) or (None, 0)
+
+            if (epoch != self._epoch):
+                self._build()
+            elif (keys[1] in values):
+                self._apply_log(values[keys[1]])
+            elif (position > self._applied):
+                # A change that was made is no longer in the log
+                self._build()
+
+    def _apply_log(self, first_change):
+        """Applies first_change, the change after the last one applied, and the changes that follow it in the log."""
+        changes = [first_change]
+
+        while changes:
+            for (book_isbn, in_catalogue) in changes:
+                self._apply(book_isbn, in_catalogue)
+                self._applied += 1
+
+            keys = [_change_key(self._epoch, self._applied + offset) for offset in range(1, CHANGE_BATCH_SIZE + 1)]
+            values = _cache().get_many(keys)
+            changes = [values[key] for key in itertools.takewhile(lambda key: key in values, keys)]
+
+    def _ensure_built(self):
+        """Builds the index if it has not been built."""
+        if (self._epoch == None):
+            self.refresh()
+
+    def _build(self):
+        """Builds the index from the Book table, after the changes of the shared change log so far."""
+        (epoch, position) = _log_state()
+        ids = {}
+
+        for book_isbn in Book.objects.values_list('isbn', flat = True).iterator():
+            ids[book_isbn] = len(ids)
+
+        self._ids = ids
+        self._valid = np.ones(len(ids), dtype = bool)
+        self._epoch = epoch
+        self._applied = position
+        self._changes += 1
+
+    def reset(self):
+        """Makes the index build itself again when it is next used."""
+        with self._lock:
+            self._epoch = None
+    def __len__(self):
+        self._ensure_built()
+        return int(self._valid.sum())
+
+    def contains(self, book_isbn):
+        """Checks if the book with book_isbn is in the catalogue."""
+        self._ensure_built()
+        book_id = self._ids.get(book_isbn)
+        return ((book_id != None) and bool(self._valid[book_id]))
+
+    def mask(self, book_isbns):
+        """Returns a boolean array of whether each of book_isbns is in the catalogue."""
+        self._ensure_built()
+        book_ids = np.array([self._ids.get(str(book_isbn), -1) for book_isbn in book_isbns], dtype = np.int64)
+        in_catalogue = book_ids >= 0
+        in_catalogue[in_catalogue] = self._valid[book_ids[in_catalogue]]
+        return in_catalogue
+
+    def model_mask(self, model):
+        """
+            Returns a read-only boolean array of whether each item of a
+            FactorModel or NeighbourModel is in the catalogue. It is kept
+            for the model until the catalogue changes.
+        """
+        self._ensure_built()
+        (changes, in_catalogue) = self._model_masks.get(model, (None, None))
+
+        if (changes != self._changes):
+            in_catalogue = self.mask(model.item_raw_ids)
+            in_catalogue.flags.writeable = False
+            self._model_masks[model] = (self._changes, in_catalogue)
+
+        return in_catalogue
+
+    def _apply(self, book_isbn, in_catalogue):
+        """Adds the book with book_isbn to the index if in_catalogue, or removes it otherwise."""
+        book_id = self._ids.get(book_isbn)
+
+        if ((book_id != None) and (self._valid[book_id] == in_catalogue)):
+            return
+
+        if in_catalogue:
+            if (book_id == None):
+                book_id = len(self._ids)
+                self._ids[book_isbn] = book_id
+
+                if (book_id >= len(self._valid)):
+                    valid = np.zeros(max(2 * len(self._valid), 16), dtype = bool)
+                    valid[: len(self._valid)] = self._valid
+                    self._valid = valid
+
+            self._valid[book_id] = True
+        elif (book_id == None):
+            return
+        else:
+            self._valid[book_id] = False
+
+        self._changes += 1
+
+    def add(self, book_isbn):
+        """
+            Adds a book to the index after it has been saved, and appends the
+            change to the shared change log for the other processes.
+        """
+        with self._lock:
+            self._ensure_built()
+            self._apply(book_isbn, True)
+            _publish(book_isbn, True)
+
+    def discard(self, book_isbn):
+        """Removes a book from the index after it has been deleted, in the same way as add."""
+        with self._lock:
+            self._ensure_built()
+            self._apply(book_isbn, False)
+            _publish(book_isbn, False)
+
+# The catalogue index of the current process.
+index = CatalogueIndex()
@@ -0,0 +1,33 @@
+import os
+import shutil
+
+def save_directory(directory, write):
+    """
+        Calls write with a new hidden temporary directory next to directory,
+        then renames it to directory, so that an artifact is never read half
+        written. An artifact already saved in directory is moved aside and
+        removed rather than written over, as processes that have
+        memory-mapped its files would crash if they were rewritten under them.
+        The temporary directory is removed if write fails, and one left
+        behind by an earlier process with the same pid is removed first.
+    """
+    directory = os.path.normpath(directory)
+    (parent, name) = os.path.split(directory)
+    temporary_directory = os.path.join(parent, f'.{name}.{os.getpid()}.tmp')
+    old_directory = os.path.join(parent, f'.{name}.{os.getpid()}.old')
+    shutil.rmtree(temporary_directory, ignore_errors = True)
+    shutil.rmtree(old_directory, ignore_errors = True)
+    os.makedirs(temporary_directory)
+
+    try:
+        write(temporary_directory)
+
+        if os.path.exists(directory):
+            os.rename(directory, old_directory)
+            os.rename(temporary_directory, directory)
+            shutil.rmtree(old_directory)
+        else:
+            os.rename(temporary_directory, directory)
+    except BaseException:
+        shutil.rmtree(temporary_directory, ignore_errors = True)
+        raise
@@ -0,0 +1,319 @@
+import json
+import os
+import numpy as np
+from surprise import SVD
+from . import quantization
+from .ann import ItemIndex
+from .directories import save_directory
+from .popularity import PopularityRankings
+
+class FactorModel:
+
+    """
+        The fitted parameters of a matrix factorization recommender
+        held as NumPy arrays, so that predictions for many users and
+        items can be computed with array operations.
+        Inner ids index the rows of the factor and bias arrays, and
+        the raw ids of users and items are held in arrays indexed by inner id.
+        The items rated by each user in the trainset are held in CSR form,
+        rated_indptr[u] to rated_indptr[u + 1] being the slice of
+        rated_indices for the user with inner id u.
+        A FactorModel can be saved as a directory of .npy files, which
+        are memory-mapped read-only when loaded so that every process
+        on a host shares one copy of the arrays in the page cache.
+        An ItemIndex over the items, if one has been built, is saved and
+        loaded with the model as item_index, and so are the
+        PopularityRankings of the items as popularity.
+        The factors can be stored as float16 or int8 to save memory, int8
+        factors having a scale per row in user_scales and item_scales.
+        They are read through user_vectors, item_vectors and item_product,
+        which dequantize them.
+    """
+
+    # The arrays saved by save, each in a .npy file of the same name.
+    ARRAYS = [
+        'user_factors', 'item_factors', 'user_biases', 'item_biases',
+        'user_raw_ids', 'item_raw_ids', 'rated_indptr', 'rated_indices', 'user_order', 'item_order'
+    ]
+
+    # The scales of int8 factors, saved when there are any.
+    SCALE_ARRAYS = ['user_scales', 'item_scales']
+
+    META_FILE = 'meta.json'
+
+    def __init__(self, user_factors, item_factors, user_biases, item_biases,
+            global_mean, rating_scale, biased, user_raw_ids, item_raw_ids,
+            rated_indptr, rated_indices, user_order = None, item_order = None, meta = None, item_index = None, popularity = None,
+            user_scales = None, item_scales = None):
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.user_scales = user_scales
+        self.item_scales = item_scales
+        self.user_biases = user_biases
+        self.item_biases = item_biases
+        self.global_mean = float(global_mean)
+        self.rating_scale = (float(rating_scale[0]), float(rating_scale[1]))
+        self.biased = bool(biased)
+        self.user_raw_ids = user_raw_ids
+        self.item_raw_ids = item_raw_ids
+        self.rated_indptr = rated_indptr
+        self.rated_indices = rated_indices
+        self.meta = dict(meta or {})
+        self.item_index = item_index
+        self.popularity = popularity
+
+        if (user_order is None):
+            user_order = np.argsort(user_raw_ids, kind = 'stable')
+
+        self.user_order = user_order
+
+        if (item_order is None):
+            item_order = np.argsort(item_raw_ids, kind = 'stable')
+
+        self.item_order = item_order
+
+    @property
+    def n_users(self):
+        return len(self.user_raw_ids)
+
+    @property
+    def n_items(self):
+        return len(self.item_raw_ids)
+
+    @property
+    def factor_dtype(self):
+        """The name of the dtype that the factors are stored as."""
+        return self.item_factors.dtype.name
+
+    @property
+    def factor_nbytes(self):
+        """The number of bytes taken by the factors and their scales."""
+        arrays = [self.user_factors, self.item_factors, self.user_scales, self.item_scales]
+        return sum(array.nbytes for array in arrays if (array is not None))
+
+    def user_vectors(self, inner_uids):
+        """Returns the float64 factors of the users with inner_uids."""
+        return quantization.dequantize_rows(self.user_factors, self.user_scales, inner_uids)
+
+    def item_vectors(self, inner_iids = None):
+        """Returns the float64 factors of the items with inner_iids, or of every item."""
+        return quantization.dequantize_rows(self.item_factors, self.item_scales, inner_iids)
+
+    def item_product(self, user_factors, inner_iids = None):
+        """
+            Returns the dot products of user_factors with the factors of the
+            items with inner_iids, or of every item, as a (users x items) matrix.
+        """
+        return quantization.factor_product(user_factors, self.item_factors, self.item_scales, inner_iids)
+
+    def quantize(self, dtype):
+        """
+            Returns a copy of the model with its user and item factors stored
+            as dtype, one of quantization.DTYPES, sharing every other array.
+        """
+        (user_factors, user_scales) = quantization.quantize_rows(self.user_vectors(slice(None)), dtype)
+        (item_factors, item_scales) = quantization.quantize_rows(self.item_vectors(), dtype)
+        return FactorModel(
+            user_factors = user_factors,
+            item_factors = item_factors,
+            user_biases = self.user_biases,
+            item_biases = self.item_biases,
+            global_mean = self.global_mean,
+            rating_scale = self.rating_scale,
+            biased = self.biased,
+            user_raw_ids = self.user_raw_ids,
+            item_raw_ids = self.item_raw_ids,
+            rated_indptr = self.rated_indptr,
+            rated_indices = self.rated_indices,
+            user_order = self.user_order,
+            item_order = self.item_order,
+            meta = dict(self.meta, factor_dtype = dtype),
+            item_index = self.item_index,
+            popularity = self.popularity,
+            user_scales = user_scales,
+            item_scales = item_scales
+        )
+
+    @classmethod
+    def supports(cls, algo):
+        """Checks if algo is a fitted algorithm that can be held as a FactorModel."""
+        return isinstance(algo, SVD) and hasattr(algo, 'pu')
+
+    @classmethod
+    def from_algo(cls, algo):
+        """
+            Builds a FactorModel from a fitted surprise SVD algorithm.
+            Its popularity rankings weight every rating the same, as
+            the trainset does not record when ratings were made.
+        """
+        trainset = algo.trainset
+        user_raw_ids = np.array([trainset.to_raw_uid(u) for u in trainset.all_users()])
+        item_raw_ids = np.array([str(trainset.to_raw_iid(i)) for i in trainset.all_items()])
+        rated_indptr = np.zeros(trainset.n_users + 1, dtype = np.int64)
+        rated_indices = np.empty(trainset.n_ratings, dtype = np.int32)
+        position = 0
+
+        for u in trainset.all_users():
+            user_items = [j for (j, _) in trainset.ur[u]]
+            rated_indices[position : position + len(user_items)] = user_items
+            position = position + len(user_items)
+            rated_indptr[u + 1] = position
+
+        return cls(
+            user_factors = algo.pu,
+            item_factors = algo.qi,
+            user_biases = algo.bu,
+            item_biases = algo.bi,
+            global_mean = trainset.global_mean,
+            rating_scale = trainset.rating_scale,
+            biased = algo.biased,
+            user_raw_ids = user_raw_ids,
+            item_raw_ids = item_raw_ids,
+            rated_indptr = rated_indptr,
+            rated_indices = rated_indices,
+            popularity = PopularityRankings.build(
+                trainset.n_items,
+                [i for i in trainset.all_items() for _ in trainset.ir[i]],
+                [r for i in trainset.all_items() for (_, r) in trainset.ir[i]]
+            )
+        )
+
+    def to_inner_uids(self, raw_uids):
+        """
+            Converts raw user ids to inner ids.
+            Users that are unknown to the model are given an inner id of -1.
+        """
+        return _to_inner_ids(self.user_raw_ids, self.user_order, raw_uids)
+
+    def to_inner_iids(self, raw_iids):
+        """
+            Converts raw item ids, which are book ISBNs, to inner ids.
+            Items that are unknown to the model are given an inner id of -1.
+        """
+        return _to_inner_ids(self.item_raw_ids, self.item_order, raw_iids)
+
+    def rated_items(self, inner_uid):
+        """Returns the inner ids of the items rated by the user in the trainset."""
+        return self.rated_indices[self.rated_indptr[inner_uid] : self.rated_indptr[inner_uid + 1]]
+
+    @classmethod
+    def is_saved_in(cls, directory):
+        """Checks if directory holds a saved FactorModel."""
+        return os.path.isfile(os.path.join(directory, cls.META_FILE))
+
+    def save(self, directory, meta = None):
+        """
+            Saves the model as .npy files in directory, with its scalar
+            parameters and meta in a JSON file that is written last.
+            The files are written to a temporary directory that then replaces
+            directory, leaving any model saved there before unchanged on disk.
+        """
+        self.meta.update(meta or {})
+        save_directory(directory, self._write)
+
+    def _write(self, directory):
+        for name in FactorModel.ARRAYS:
+            np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(getattr(self, name)))
+
+        for name in FactorModel.SCALE_ARRAYS:
+            if (getattr(self, name) is not None):
+                np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(getattr(self, name)))
+
+        if (self.item_index != None):
+            self.item_index.save(directory)
+
+        if (self.popularity != None):
+            self.popularity.save(directory)
+
+        with open(os.path.join(directory, FactorModel.META_FILE), 'w') as meta_file:
+            json.dump({
+                'global_mean' : self.global_mean,
+                'rating_scale' : self.rating_scale,
+                'biased' : self.biased,
+                'meta' : self.meta
+            }, meta_file, indent = 2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode = 'r'):
+        """Loads a model saved in directory, memory-mapping its arrays with mmap_mode."""
+        with open(os.path.join(directory, cls.META_FILE)) as meta_file:
+            parameters = json.load(meta_file)
+
+        arrays = {name : np.load(os.path.join(directory, name + '.npy'), mmap_mode = mmap_mode) for name in cls.ARRAYS}
+
+        for name in cls.SCALE_ARRAYS:
+            if os.path.exists(os.path.join(directory, name + '.npy')):
+                arrays[name] = np.load(os.path.join(directory, name + '.npy'), mmap_mode = mmap_mode)
+
+        item_index = None
+
+        if ItemIndex.is_saved_in(directory):
+            item_index = ItemIndex.load(directory, mmap_mode = mmap_mode)
+
+        popularity = None
+
+        if PopularityRankings.is_saved_in(directory):
+            popularity = PopularityRankings.load(directory, mmap_mode = mmap_mode)
+
+        return cls(
+            global_mean = parameters['global_mean'],
+            rating_scale = parameters['rating_scale'],
+            biased = parameters['biased'],
+            meta = parameters['meta'],
+            item_index = item_index,
+            popularity = popularity,
+            **arrays
+        )
+
+def _to_inner_ids(raw_ids, order, lookup_ids):
+    """
+        Finds the index of each of lookup_ids in raw_ids with a binary
+        search, order being the permutation that sorts raw_ids.
+        Ids that are not in raw_ids are given an index of -1.
+    """
+    lookup_ids = np.asarray(lookup_ids)
+    inner_ids = np.full(len(lookup_ids), -1, dtype = np.int64)
+
+    if ((len(lookup_ids) == 0) or (len(raw_ids) == 0)):
+        return inner_ids
+
+    (lookup_ids, convertible) = _convert_ids(lookup_ids, raw_ids.dtype)
+    positions = np.searchsorted(raw_ids, lookup_ids, sorter = order)
+    positions = np.minimum(positions, len(raw_ids) - 1)
+    candidates = order[positions]
+    found = (raw_ids[candidates] == lookup_ids) & convertible
+    inner_ids[found] = candidates[found]
+    return inner_ids
+
+def _convert_ids(lookup_ids, dtype):
+    """
+        Converts lookup_ids to the kind of dtype, so that they can be compared
+        with raw ids of dtype. Returns the converted ids and whether each id
+        converted without changing, as ids that change, such as 1.5 converted
+        to an integer, or text that is not a number, can not match a raw id.
+        Ids converted to strings are never truncated to the width of dtype.
+    """
+    if (lookup_ids.dtype.kind == dtype.kind):
+        return (lookup_ids, np.ones(len(lookup_ids), dtype = bool))
+
+    if (dtype.kind in 'US'):
+        return (lookup_ids.astype(str), np.ones(len(lookup_ids), dtype = bool))
+
+    try:
+        converted = lookup_ids.astype(dtype)
+        return (converted, converted.astype(lookup_ids.dtype) == lookup_ids)
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    converted = np.zeros(len(lookup_ids), dtype = dtype)
+    convertible = np.zeros(len(lookup_ids), dtype = bool)
+
+    for (position, lookup_id) in enumerate(lookup_ids.tolist()):
+        try:
+            converted[position] = lookup_id
+        except (TypeError, ValueError, OverflowError):
+            continue
+
+        convertible[position] = (converted[position] == lookup_id) or (str(converted[position]) == str(lookup_id))
+
+    return (converted, convertible)
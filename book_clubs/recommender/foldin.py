@@ -0,0 +1,123 @@
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+from book_clubs.models import Rating
+
+# Strength of the L2 regularization of folded in user biases and factors.
+REGULARIZATION = 0.1
+
+# Maximum number of folded in users that are cached per model.
+CACHE_SIZE = 10000
+
+# Folded in users of each model, dropped together with the model when it is replaced.
+_caches = weakref.WeakKeyDictionary()
+_cache_lock = threading.Lock()
+
+class UserVector:
+
+    """
+        The bias and latent factors that a user is scored with,
+        and the inner ids of the items that the user has rated.
+    """
+
+    def __init__(self, bias, factors, rated_items):
+        self.bias = bias
+        self.factors = factors
+        self.rated_items = rated_items
+
+def get_member_ratings(member_ids):
+    """Returns a dict from each member id to a list of their (book_isbn, rating) ratings."""
+    member_ratings = {member_id : [] for member_id in member_ids}
+
+    for (user_id, book_isbn, rating) in Rating.objects.filter(user_id__in = member_ids).values_list('user_id', 'book_id', 'rating'):
+        member_ratings[user_id].append((book_isbn, rating))
+
+    return member_ratings
+
+def fold_in(model, rated_items, ratings):
+    """
+        Solves for the bias and latent factors of a user from their ratings
+        of items with inner ids rated_items, keeping the item factors and
+        biases of model fixed. This is the regularized least squares problem
+        that training solves for a single user, so it needs no refitting.
+    """
+    item_factors = model.item_vectors(rated_items)
+    ratings = np.asarray(ratings, dtype = np.float64)
+
+    if model.biased:
+        design = np.hstack([np.ones((len(rated_items), 1)), item_factors])
+        targets = ratings - model.global_mean - model.item_biases[rated_items]
+    else:
+        design = item_factors
+        targets = ratings
+
+    solution = np.linalg.solve(
+        design.T @ design + REGULARIZATION * np.eye(design.shape[1]),
+        design.T @ targets
+    )
+
+    if model.biased:
+        return (solution[0], solution[1:])
+
+    return (0.0, solution)
+
+def _cached_fold_in(model, user_id, rated_items, ratings):
+    """Folds in a user, reusing the result while their ratings and the model are unchanged."""
+    key = (user_id, tuple(rated_items.tolist()), tuple(ratings))
+
+    with _cache_lock:
+        cache = _caches.setdefault(model, OrderedDict())
+
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+    result = fold_in(model, rated_items, ratings)
+
+    with _cache_lock:
+        cache[key] = result
+
+        while (len(cache) > CACHE_SIZE):
+            cache.popitem(last = False)
+
+    return result
+
+def member_vectors(model, member_ids, member_ratings):
+    """
+        Returns a list with the UserVector of each member, or None for
+        members that can not be scored. Members in the trainset are scored
+        with their trained factors, unless they have since rated books the
+        trainset does not hold them to have rated, in which case they are
+        folded in from all their ratings in member_ratings, as are members
+        unknown to the model. Ratings of books unknown to the model are ignored.
+    """
+    vectors = []
+    inner_uids = model.to_inner_uids(member_ids)
+
+    for (member_id, inner_uid) in zip(member_ids, inner_uids):
+        ratings = member_ratings.get(member_id, [])
+        rated_items = model.to_inner_iids([book_isbn for (book_isbn, _) in ratings])
+        known = rated_items >= 0
+        rated_items = rated_items[known]
+        ratings = [rating for ((_, rating), is_known) in zip(ratings, known) if is_known]
+
+        if (inner_uid >= 0):
+            trained_rated_items = model.rated_items(inner_uid)
+
+            if np.isin(rated_items, trained_rated_items).all():
+                vectors.append(UserVector(model.user_biases[inner_uid], model.user_vectors(inner_uid), trained_rated_items))
+                continue
+
+        if (len(rated_items) == 0):
+            vectors.append(None)
+            continue
+
+        (bias, factors) = _cached_fold_in(model, member_id, rated_items, ratings)
+
+        if (inner_uid >= 0):
+            rated_items = np.union1d(rated_items, trained_rated_items)
+
+        vectors.append(UserVector(bias, factors, rated_items))
+
+    return vectors
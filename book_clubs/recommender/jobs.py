@@ -0,0 +1,95 @@
+import datetime
+import traceback
+from django.db.models import F, Q
+from django.utils import timezone
+from book_clubs import helpers
+from book_clubs.models import MeetingRecommendation, RecommendationJob
+
+# Seconds before a failed job is retried, doubled after every attempt.
+RETRY_DELAY = 30
+
+# Seconds after which a running job is assumed to belong to a worker that died.
+RUNNING_TIMEOUT = 600
+
+class RecommendationsUnavailable(Exception):
+    """Raised when no recommender model is available to run a job with."""
+
+def enqueue_meeting_recommendations(meeting, recommendations_limit):
+    """Queues a job that fills in the recommendations of meeting."""
+    return RecommendationJob.objects.create(meeting = meeting, recommendations_limit = recommendations_limit)
+
+def recommendations_pending(meeting):
+    """Checks if the recommendations of meeting are still being generated."""
+    return RecommendationJob.objects.filter(
+        meeting = meeting,
+        status__in = [RecommendationJob.Statuses.PENDING, RecommendationJob.Statuses.RUNNING]
+    ).exists()
+
+def claim_next_job():
+    """
+        Claims the next job that is due, marking it as running.
+        A job is only claimed if its status is unchanged when it is updated,
+        so several workers can share the queue without locking rows.
+        Returns None if there are no due jobs.
+    """
+    now = timezone.now()
+    due = Q(status = RecommendationJob.Statuses.PENDING, run_after__lte = now)
+    stale = Q(status = RecommendationJob.Statuses.RUNNING, updated_at__lte = now - datetime.timedelta(seconds = RUNNING_TIMEOUT))
+
+    for job in RecommendationJob.objects.filter(due | stale)[:10]:
+        claimed = RecommendationJob.objects.filter(id = job.id, status = job.status, updated_at = job.updated_at).update(
+            status = RecommendationJob.Statuses.RUNNING,
+            attempts = F('attempts') + 1,
+            updated_at = now
+        )
+
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+    return None
+
+def run_job(job):
+    """
+        Generates the recommendations of the meeting of a claimed job and
+        inserts them in bulk. Failed jobs are queued again with a growing
+        delay until they reach their max_attempts.
+    """
+    try:
+        recommendations = helpers.get_recommendations_for_club(job.meeting.club_id, job.recommendations_limit)
+
+        if (recommendations == None):
+            raise RecommendationsUnavailable('No recommender model is available.')
+
+        MeetingRecommendation.objects.bulk_create(
+            [MeetingRecommendation(meeting_id = job.meeting_id, book_id = book_isbn) for book_isbn in recommendations],
+            ignore_conflicts = True
+        )
+    except Exception:
+        job.last_error = traceback.format_exc()
+
+        if (job.attempts < job.max_attempts):
+            job.status = RecommendationJob.Statuses.PENDING
+            job.run_after = timezone.now() + datetime.timedelta(seconds = RETRY_DELAY * (2 ** (job.attempts - 1)))
+        else:
+            job.status = RecommendationJob.Statuses.FAILED
+    else:
+        job.status = RecommendationJob.Statuses.DONE
+
+    job.save()
+    return job
+
+def run_due_jobs(max_jobs = None):
+    """Runs due jobs until there are none left, or max_jobs have run. Returns the number run."""
+    total_jobs = 0
+
+    while ((max_jobs == None) or (total_jobs < max_jobs)):
+        job = claim_next_job()
+
+        if (job == None):
+            break
+
+        run_job(job)
+        total_jobs = total_jobs + 1
+
+    return total_jobs
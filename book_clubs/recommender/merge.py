@@ -0,0 +1,40 @@
+from collections import deque
+
+def round_robin_merge(candidate_lists, limit, excluded = (), start = 0, key = None):
+    """
+        Merges the ranked candidate lists of several members into at most
+        limit recommendations. Members take turns, starting with the member
+        at index start, and each turn adds the member's best candidate that
+        is neither excluded nor already recommended. Members whose candidates
+        run out are dropped, so the merge ends when limit is reached or every
+        member has run out, after inspecting each candidate at most once.
+        Members are only visited once their first turn comes, so large clubs
+        merging few recommendations do not pay for every member.
+        If key is given, candidates are compared, and matched against
+        excluded, by key(candidate) instead of the candidate itself.
+    """
+    recommendations = []
+    seen = set(excluded)
+    total_lists = len(candidate_lists)
+    turns = deque()
+    first_turns = 0
+
+    while (len(recommendations) < limit):
+        if (first_turns < total_lists):
+            candidates = iter(candidate_lists[(start + first_turns) % total_lists])
+            first_turns = first_turns + 1
+        elif turns:
+            candidates = turns.popleft()
+        else:
+            break
+
+        for candidate in candidates:
+            candidate_key = candidate if (key == None) else key(candidate)
+
+            if candidate_key not in seen:
+                seen.add(candidate_key)
+                recommendations.append(candidate)
+                turns.append(candidates)
+                break
+
+    return recommendations
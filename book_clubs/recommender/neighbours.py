@@ -0,0 +1,290 @@
+import json
+import os
+import numpy as np
+from scipy import sparse
+from surprise import KNNBasic
+from .directories import save_directory
+from .factors import _to_inner_ids
+from .popularity import PopularityRankings
+
+# Items whose similarities are computed at a time while building neighbour lists.
+BLOCK_SIZE = 1000
+
+class NeighbourModel:
+
+    """
+        The top K most similar items of every item, used to serve item-based
+        KNN recommendations without an (items x items) similarity matrix.
+        The neighbours of the item with inner id i are the inner ids
+        neighbour_indices[neighbour_indptr[i] : neighbour_indptr[i + 1]],
+        with their similarities in the same slice of neighbour_similarities,
+        most similar first. Only neighbours with a positive similarity are kept.
+        A NeighbourModel is saved as a directory of .npy files in the same
+        way as a FactorModel, with its kind recorded in the meta file.
+    """
+
+    ARRAYS = ['item_raw_ids', 'item_order', 'neighbour_indptr', 'neighbour_indices', 'neighbour_similarities']
+
+    META_FILE = 'meta.json'
+
+    KIND = 'item_knn'
+
+    def __init__(self, item_raw_ids, neighbour_indptr, neighbour_indices, neighbour_similarities,
+            global_mean, rating_scale, item_order = None, meta = None, popularity = None):
+        self.item_raw_ids = item_raw_ids
+        self.neighbour_indptr = neighbour_indptr
+        self.neighbour_indices = neighbour_indices
+        self.neighbour_similarities = neighbour_similarities
+        self.global_mean = float(global_mean)
+        self.rating_scale = (float(rating_scale[0]), float(rating_scale[1]))
+        self.meta = dict(meta or {})
+        self.popularity = popularity
+
+        if (item_order is None):
+            item_order = np.argsort(item_raw_ids, kind = 'stable')
+
+        self.item_order = item_order
+
+    @property
+    def n_items(self):
+        return len(self.item_raw_ids)
+
+    @classmethod
+    def supports(cls, algo):
+        """Checks if algo is a fitted item-based KNNBasic algorithm that can be held as a NeighbourModel."""
+        return (isinstance(algo, KNNBasic) and hasattr(algo, 'sim') and not algo.sim_options.get('user_based', True))
+
+    @classmethod
+    def can_train(cls, algo):
+        """Checks if neighbour lists can be built for the unfitted algo without fitting it."""
+        return (
+            isinstance(algo, KNNBasic)
+            and not algo.sim_options.get('user_based', True)
+            and (algo.sim_options.get('name', 'msd') == 'cosine')
+        )
+
+    @classmethod
+    def from_algo(cls, algo, k):
+        """Builds a NeighbourModel keeping the k most similar items of a fitted item-based KNNBasic algorithm."""
+        trainset = algo.trainset
+        similarities = sparse.csr_matrix(np.asarray(algo.sim, dtype = np.float64))
+        similarities.setdiag(0)
+        (neighbour_indptr, neighbour_indices, neighbour_similarities) = _top_neighbours(similarities, k)
+        items = [i for i in trainset.all_items() for _ in trainset.ir[i]]
+        ratings = [r for i in trainset.all_items() for (_, r) in trainset.ir[i]]
+
+        return cls(
+            item_raw_ids = np.array([str(trainset.to_raw_iid(i)) for i in trainset.all_items()]),
+            neighbour_indptr = neighbour_indptr,
+            neighbour_indices = neighbour_indices,
+            neighbour_similarities = neighbour_similarities,
+            global_mean = trainset.global_mean,
+            rating_scale = trainset.rating_scale,
+            popularity = PopularityRankings.build(trainset.n_items, items, ratings)
+        )
+
+    @classmethod
+    def build(cls, rating_arrays, k, rating_scale = (0, 10), block_size = BLOCK_SIZE, min_support = 1):
+        """
+            Builds a NeighbourModel from RatingArrays with the cosine similarity
+            of surprise, which only sums over the users that rated both items.
+            Similarities are computed for block_size items at a time as sparse
+            products, and only the k neighbours of each item in the block are
+            kept before the next block is computed, so memory grows with the
+            number of co-rated item pairs in one block and the k neighbours
+            kept per item, not with items squared.
+        """
+        n_users = len(rating_arrays.user_raw_ids)
+        n_items = len(rating_arrays.item_raw_ids)
+        shape = (n_users, n_items)
+        coordinates = (rating_arrays.users, rating_arrays.items)
+        ratings = sparse.csc_matrix((rating_arrays.ratings.astype(np.float64), coordinates), shape = shape)
+        rated = sparse.csc_matrix((np.ones(len(rating_arrays)), coordinates), shape = shape)
+        squared_ratings = ratings.multiply(ratings).tocsc()
+        neighbour_counts = [np.zeros(1, dtype = np.int64)]
+        neighbour_indices = []
+        neighbour_similarities = []
+
+        for start in range(0, n_items, block_size):
+            end = min(start + block_size, n_items)
+            support = (rated[:, start:end].T @ rated).tocoo()
+            keep = (support.data >= min_support) & (support.row + start != support.col)
+            (rows, columns) = (support.row[keep], support.col[keep])
+            products = _values_at((ratings[:, start:end].T @ ratings).tocsr(), rows, columns)
+            squares_i = _values_at((squared_ratings[:, start:end].T @ rated).tocsr(), rows, columns)
+            squares_j = _values_at((rated[:, start:end].T @ squared_ratings).tocsr(), rows, columns)
+            denominators = np.sqrt(squares_i * squares_j)
+            similarities = np.divide(products, denominators, out = np.zeros_like(products), where = denominators > 0)
+            block = sparse.csr_matrix((similarities, (rows, columns)), shape = (end - start, n_items))
+            (block_indptr, block_indices, block_similarities) = _top_neighbours(block, k)
+            neighbour_counts.append(np.diff(block_indptr))
+            neighbour_indices.append(block_indices)
+            neighbour_similarities.append(block_similarities)
+
+        return cls(
+            item_raw_ids = rating_arrays.item_raw_ids,
+            neighbour_indptr = np.cumsum(np.concatenate(neighbour_counts)),
+            neighbour_indices = np.concatenate(neighbour_indices or [np.zeros(0, dtype = np.int32)]),
+            neighbour_similarities = np.concatenate(neighbour_similarities or [np.zeros(0, dtype = np.float32)]),
+            global_mean = float(np.mean(rating_arrays.ratings)),
+            rating_scale = rating_scale
+        )
+
+    def to_inner_iids(self, raw_iids):
+        """
+            Converts raw item ids, which are book ISBNs, to inner ids.
+            Items that are unknown to the model are given an inner id of -1.
+        """
+        return _to_inner_ids(self.item_raw_ids, self.item_order, raw_iids)
+
+    def neighbours(self, inner_iid):
+        """Returns the inner ids and similarities of the neighbours of an item."""
+        (start, end) = (self.neighbour_indptr[inner_iid], self.neighbour_indptr[inner_iid + 1])
+        return (self.neighbour_indices[start : end], self.neighbour_similarities[start : end])
+
+    @classmethod
+    def is_saved_in(cls, directory):
+        """Checks if directory holds a saved NeighbourModel."""
+        try:
+            with open(os.path.join(directory, cls.META_FILE)) as meta_file:
+                return (json.load(meta_file).get('kind') == cls.KIND)
+        except (OSError, ValueError):
+            return False
+
+    def save(self, directory, meta = None):
+        """
+            Saves the model as .npy files in directory, with its scalar
+            parameters and meta in a JSON file that is written last.
+            The files are written to a temporary directory that then replaces
+            directory, leaving any model saved there before unchanged on disk.
+        """
+        self.meta.update(meta or {})
+        save_directory(directory, self._write)
+
+    def _write(self, directory):
+        for name in NeighbourModel.ARRAYS:
+            np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(getattr(self, name)))
+
+        if (self.popularity != None):
+            self.popularity.save(directory)
+
+        with open(os.path.join(directory, NeighbourModel.META_FILE), 'w') as meta_file:
+            json.dump({
+                'kind' : NeighbourModel.KIND,
+                'global_mean' : self.global_mean,
+                'rating_scale' : self.rating_scale,
+                'meta' : self.meta
+            }, meta_file, indent = 2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode = 'r'):
+        """Loads a model saved in directory, memory-mapping its arrays with mmap_mode."""
+        with open(os.path.join(directory, cls.META_FILE)) as meta_file:
+            parameters = json.load(meta_file)
+
+        arrays = {name : np.load(os.path.join(directory, name + '.npy'), mmap_mode = mmap_mode) for name in cls.ARRAYS}
+        popularity = None
+
+        if PopularityRankings.is_saved_in(directory):
+            popularity = PopularityRankings.load(directory, mmap_mode = mmap_mode)
+
+        return cls(
+            global_mean = parameters['global_mean'],
+            rating_scale = parameters['rating_scale'],
+            meta = parameters['meta'],
+            popularity = popularity,
+            **arrays
+        )
+
+def _values_at(matrix, rows, columns):
+    """Returns the values of a sparse matrix at rows and columns, zero where nothing is stored."""
+    if (len(rows) == 0):
+        return np.zeros(0)
+
+    return np.asarray(matrix[rows, columns]).ravel()
+
+def _top_neighbours(similarities, k):
+    """
+        Keeps the k largest positive similarities of each row of a sparse
+        matrix, most similar first with ties in column order.
+        Returns the CSR indptr, indices and similarities of the kept neighbours.
+    """
+    similarities = similarities.tocsr()
+    similarities.sort_indices()
+    neighbour_indptr = np.zeros(similarities.shape[0] + 1, dtype = np.int64)
+    neighbour_indices = []
+    neighbour_similarities = []
+
+    for row in range(similarities.shape[0]):
+        (start, end) = (similarities.indptr[row], similarities.indptr[row + 1])
+        columns = similarities.indices[start : end]
+        values = similarities.data[start : end]
+        positive = values > 0
+        (columns, values) = (columns[positive], values[positive])
+        order = np.argsort(-values, kind = 'stable')[:k]
+        neighbour_indices.append(columns[order])
+        neighbour_similarities.append(values[order])
+        neighbour_indptr[row + 1] = neighbour_indptr[row] + len(order)
+
+    return (
+        neighbour_indptr,
+        np.concatenate(neighbour_indices or [np.zeros(0)]).astype(np.int32),
+        np.concatenate(neighbour_similarities or [np.zeros(0)]).astype(np.float32)
+    )
+
+def rank_members(model, raw_uids, member_ratings, k = None, excluded_items = None, candidate_items = None):
+    """
+        Ranks books for each user in raw_uids from their ratings in
+        member_ratings, a dict from user id to their (book_isbn, rating)
+        ratings. Each book that is a neighbour of a book the user rated is
+        estimated as the similarity weighted mean of the user's ratings of
+        the books it is a neighbour of, as in KNNBasic. Only the neighbour
+        lists of the user's rated books are read.
+        Returns a list with, for each user, an array of book ISBNs sorted by
+        estimated rating, best first, and cut to k if given. Items with True
+        in the boolean array excluded_items, and items not in candidate_items
+        if it is given, are left out. Users without ratings of books known to
+        the model are given None.
+    """
+    rankings = rank_member_items(model, raw_uids, member_ratings, k, excluded_items, candidate_items)
+    return [None if (ranking == None) else model.item_raw_ids[ranking[0]] for ranking in rankings]
+
+def rank_member_items(model, raw_uids, member_ratings, k = None, excluded_items = None, candidate_items = None):
+    """
+        Ranks items for users in the same way as rank_members, but returns
+        for each user a pair of an int32 array of item inner ids and a float32
+        array of their estimated ratings, or None if the user can not be scored.
+    """
+    rankings = []
+
+    for raw_uid in raw_uids:
+        ratings = member_ratings.get(raw_uid, [])
+        rated_items = model.to_inner_iids([book_isbn for (book_isbn, _) in ratings])
+        known = rated_items >= 0
+
+        if not known.any():
+            rankings.append(None)
+            continue
+
+        rated_items = rated_items[known]
+        ratings = np.array([rating for ((_, rating), is_known) in zip(ratings, known) if is_known], dtype = np.float64)
+        slices = [model.neighbours(item) for item in rated_items]
+        neighbours = np.concatenate([indices for (indices, _) in slices])
+        similarities = np.concatenate([values for (_, values) in slices]).astype(np.float64)
+        weights = np.repeat(ratings, [len(indices) for (indices, _) in slices])
+        (items, positions) = np.unique(neighbours, return_inverse = True)
+        estimates = np.bincount(positions, weights = similarities * weights) / np.bincount(positions, weights = similarities)
+        np.clip(estimates, model.rating_scale[0], model.rating_scale[1], out = estimates)
+        keep = ~np.isin(items, rated_items)
+
+        if (excluded_items is not None):
+            keep &= ~excluded_items[items]
+
+        if (candidate_items is not None):
+            keep &= np.isin(items, candidate_items)
+
+        (items, estimates) = (items[keep], estimates[keep])
+        order = np.argsort(-estimates, kind = 'stable')[:k]
+        rankings.append((items[order].astype(np.int32), estimates[order].astype(np.float32)))
+
+    return rankings
@@ -0,0 +1,153 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from django.conf import settings
+from . import registry, scoring
+
+class StaleModel(Exception):
+    """Raised in a worker whose recommender model is not the version it was asked to score with."""
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_enabled = False
+
+logger = logging.getLogger(__name__)
+
+def enable(enabled = True):
+    """
+        Lets the current process score large clubs with the worker pool.
+        Only the recommendation worker enables it, as forking a web server
+        process, which runs requests in other threads, can leave the
+        children with locks that are never released.
+    """
+    global _enabled
+    _enabled = enabled
+
+def _get_pool():
+    """
+        Returns the worker pool of the current process, starting it on first use.
+        Workers are forked where possible, so that they share the memory of
+        models the parent has already loaded until either writes to it.
+    """
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if ((_pool == None) or (_pool_pid != os.getpid())):
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('fork' if ('fork' in methods) else None)
+            _pool = ProcessPoolExecutor(max_workers = total_workers(), mp_context = context)
+            _pool_pid = os.getpid()
+
+        return _pool
+
+def shutdown():
+    """Stops the worker pool of the current process, if it has one."""
+    global _pool
+
+    with _pool_lock:
+        if ((_pool != None) and (_pool_pid == os.getpid())):
+            _pool.shutdown()
+
+        _pool = None
+
+def _discard_pool(pool):
+    """Forgets pool if it is the worker pool of the current process, so that a new one is started on next use."""
+    global _pool
+
+    with _pool_lock:
+        if (_pool is pool):
+            _pool = None
+
+    pool.shutdown(wait = False)
+
+def total_workers():
+    """
+        Returns the number of worker processes, which defaults to one less
+        than the number of cores, leaving one to the current process.
+    """
+    return settings.RECOMMENDER_PARALLEL.get('workers') or max((os.cpu_count() or 1) - 1, 1)
+
+def should_parallelize(total_members):
+    """
+        Checks if total_members members should be scored by the worker pool,
+        which is when the current process has enabled the pool and there
+        are at least RECOMMENDER_PARALLEL['threshold'] of them.
+    """
+    threshold = settings.RECOMMENDER_PARALLEL.get('threshold')
+    return (_enabled and (threshold != None) and (total_members >= threshold) and (total_workers() > 1))
+
+def _rank_in_worker(model_path, model_version, raw_uids, member_ratings, k, packed_excluded_items, total_candidates, candidate_items):
+    """Ranks a chunk of members in a worker, with the model of the worker's own registry."""
+    model = registry.get_registry(model_path).get()
+
+    if ((model == None) or (model.version != model_version) or (model.factors == None)):
+        raise StaleModel(f'Worker {os.getpid()} does not have model version {model_version}.')
+
+    excluded_items = None
+
+    if (packed_excluded_items is not None):
+        excluded_items = np.unpackbits(packed_excluded_items, count = model.factors.n_items).astype(bool)
+
+    return scoring.rank_member_items(model.factors, raw_uids, member_ratings, k, excluded_items, total_candidates, candidate_items)
+
+def rank_members(model, raw_uids, member_ratings = None, k = None, excluded_items = None, total_candidates = None, candidate_items = None):
+    """
+        Ranks members in the same way as scoring.rank_members. If there are
+        enough of them to parallelize, they are split between the worker pool.
+        Workers load the model from the same path
+        as the current process, memory-mapping its arrays, and send back
+        the item inner ids and estimated ratings of each member's ranking.
+        Members are ranked in the current process if the pool fails, or a
+        worker does not have the same model version.
+    """
+    member_ratings = member_ratings or {}
+
+    if not should_parallelize(len(raw_uids)):
+        return scoring.rank_members(model.factors, raw_uids, member_ratings, k, excluded_items, total_candidates, candidate_items)
+
+    packed_excluded_items = None
+
+    if (excluded_items is not None):
+        packed_excluded_items = np.packbits(excluded_items)
+
+    pool = None
+
+    try:
+        pool = _get_pool()
+        futures = [
+            pool.submit(
+                _rank_in_worker,
+                registry.get_registry().path,
+                model.version,
+                chunk,
+                {member_id : member_ratings[member_id] for member_id in chunk if member_id in member_ratings},
+                k,
+                packed_excluded_items,
+                total_candidates,
+                candidate_items
+            )
+            for chunk in _split(list(raw_uids), total_workers())
+        ]
+        rankings = [ranking for future in futures for ranking in future.result()]
+    except StaleModel as error:
+        logger.warning('Ranking %d members in-process: %s', len(raw_uids), error)
+        return scoring.rank_members(model.factors, raw_uids, member_ratings, k, excluded_items, total_candidates, candidate_items)
+    except Exception as error:
+        logger.exception('The worker pool failed, ranking %d members in-process.', len(raw_uids))
+
+        if (isinstance(error, BrokenProcessPool) and (pool != None)):
+            _discard_pool(pool)
+
+        return scoring.rank_members(model.factors, raw_uids, member_ratings, k, excluded_items, total_candidates, candidate_items)
+
+    return [None if (ranking == None) else model.factors.item_raw_ids[ranking[0]] for ranking in rankings]
+
+def _split(items, total_chunks):
+    """Splits items into at most total_chunks consecutive chunks of nearly equal size."""
+    chunk_size = -(-len(items) // total_chunks)
+    return [items[start : start + chunk_size] for start in range(0, len(items), chunk_size)]
@@ -0,0 +1,105 @@
+import os
+import numpy as np
+from django.conf import settings
+
+class PopularityRankings:
+
+    """
+        Rankings of every item of a FactorModel that do not depend on the user,
+        used for members the model can not score. Each ranking is an array of
+        item inner ids, best first:
+        popular ranks items by their number of ratings,
+        bayesian ranks items by their mean rating shrunk towards the global
+        mean by prior_weight ratings, which defaults to the mean number of
+        ratings per item,
+        recent ranks items by their number of ratings, each weighted by half
+        for every half_life ratings made after it.
+        Ties are ranked by inner id.
+    """
+
+    # The rankings saved by save, each in a .npy file.
+    KINDS = ['popular', 'bayesian', 'recent']
+
+    def __init__(self, popular, bayesian, recent):
+        self.popular = popular
+        self.bayesian = bayesian
+        self.recent = recent
+
+    @classmethod
+    def build(cls, n_items, items, ratings, rating_order = None, prior_weight = None, half_life = None):
+        """
+            Builds the rankings of n_items items from ratings of items, two
+            parallel arrays. The recency of ratings is given by rating_order,
+            higher being more recent, and if it is None every rating is
+            weighted the same.
+        """
+        items = np.asarray(items, dtype = np.int64)
+        ratings = np.asarray(ratings, dtype = np.float64)
+        counts = np.bincount(items, minlength = n_items).astype(np.float64)
+        sums = np.bincount(items, weights = ratings, minlength = n_items)
+
+        if (prior_weight == None):
+            prior_weight = counts.mean() if (n_items > 0) else 0
+
+        global_mean = ratings.mean() if (len(ratings) > 0) else 0
+        bayesian = (sums + (prior_weight * global_mean)) / np.maximum(counts + prior_weight, 1e-12)
+
+        if ((rating_order is None) or (len(ratings) == 0)):
+            recent = counts
+        else:
+            if (half_life == None):
+                half_life = settings.RECOMMENDER_FALLBACK['half_life']
+
+            age = np.argsort(np.argsort(-np.asarray(rating_order), kind = 'stable'), kind = 'stable')
+            recent = np.bincount(items, weights = 0.5 ** (age / half_life), minlength = n_items)
+
+        return cls(*[np.argsort(-scores, kind = 'stable').astype(np.int32) for scores in [counts, bayesian, recent]])
+
+    def ranking(self, kind):
+        """Returns the ranking of kind, one of KINDS."""
+        if kind not in PopularityRankings.KINDS:
+            raise ValueError(f'Unknown popularity ranking {kind}.')
+
+        return getattr(self, kind)
+
+    @classmethod
+    def is_saved_in(cls, directory):
+        """Checks if directory holds saved PopularityRankings."""
+        return all(os.path.isfile(_array_path(directory, kind)) for kind in cls.KINDS)
+
+    def save(self, directory):
+        """Saves the rankings as .npy files in directory."""
+        for kind in PopularityRankings.KINDS:
+            np.save(_array_path(directory, kind), np.ascontiguousarray(getattr(self, kind)))
+
+    @classmethod
+    def load(cls, directory, mmap_mode = 'r'):
+        """Loads rankings saved in directory, memory-mapping them with mmap_mode."""
+        return cls(**{kind : np.load(_array_path(directory, kind), mmap_mode = mmap_mode) for kind in cls.KINDS})
+
+def _array_path(directory, kind):
+    return os.path.join(directory, 'popularity_' + kind + '.npy')
+
+def fallback_candidates(model, used_book_isbns, in_catalogue, total_candidates):
+    """
+        Returns the first total_candidates book_isbns of the FactorModel or NeighbourModel's
+        RECOMMENDER_FALLBACK ranking that are not in used_book_isbns, and
+        whose inner id is True in the boolean array in_catalogue.
+        Only as much of the ranking as is needed is read.
+        Returns an empty list if the model has no popularity rankings.
+    """
+    if (model.popularity == None):
+        return []
+
+    candidates = []
+
+    for item in model.popularity.ranking(settings.RECOMMENDER_FALLBACK['ranking']):
+        if (len(candidates) >= total_candidates):
+            break
+
+        book_isbn = str(model.item_raw_ids[item])
+
+        if (in_catalogue[item] and (book_isbn not in used_book_isbns)):
+            candidates.append(book_isbn)
+
+    return candidates
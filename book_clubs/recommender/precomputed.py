@@ -0,0 +1,65 @@
+import numpy as np
+from django.db import transaction
+from book_clubs.models import User, UserRecommendation
+from . import cache, catalogue, scoring
+
+def get_rankings(user_ids, model_version):
+    """
+        Returns a dict from user id to the list of book_isbns precomputed
+        for that user by model_version, best first.
+        Users without precomputed recommendations are left out.
+    """
+    rankings = {}
+    rows = UserRecommendation.objects.filter(user_id__in = user_ids, model_version = model_version)
+
+    for (user_id, book_isbn) in rows.order_by('user_id', 'rank').values_list('user_id', 'book_id'):
+        rankings.setdefault(user_id, []).append(book_isbn)
+
+    return rankings
+
+def discard_rankings(user_id):
+    """
+        Deletes the precomputed recommendations of user_id, whose ratings
+        have changed since they were computed, so that the user is folded
+        in from their current ratings instead.
+    """
+    UserRecommendation.objects.filter(user_id = user_id).delete()
+
+def precompute(model, limit, batch_size = 1000):
+    """
+        Stores the top limit recommendations of every user of the trainset
+        of model that is also a user of the system, replacing the rows of any
+        previous model version. Users are scored batch_size at a time.
+        Returns the number of users that recommendations were stored for.
+    """
+    factors = model.factors
+    catalogue.index.refresh()
+    user_ids = np.array(User.objects.values_list('id', flat = True), dtype = np.int64)
+    inner_uids = factors.to_inner_uids(user_ids)
+    user_ids = user_ids[inner_uids >= 0]
+    inner_uids = inner_uids[inner_uids >= 0]
+    in_catalogue = catalogue.index.model_mask(factors)
+
+    with transaction.atomic():
+        UserRecommendation.objects.all().delete()
+
+        for start in range(0, len(inner_uids), batch_size):
+            batch = inner_uids[start : start + batch_size]
+            scores = scoring.mask_rated_items(factors, batch, scoring.score_users(factors, batch))
+            scores[:, ~in_catalogue] = -np.inf
+            user_recommendations = []
+
+            for (user_id, row, ranking) in zip(user_ids[start : start + batch_size], scores, scoring.top_items(scores, limit)):
+                for (rank, inner_iid) in enumerate(ranking, 1):
+                    user_recommendations.append(UserRecommendation(
+                        user_id = int(user_id),
+                        book_id = str(factors.item_raw_ids[inner_iid]),
+                        rank = rank,
+                        score = float(row[inner_iid]),
+                        model_version = model.version
+                    ))
+
+            UserRecommendation.objects.bulk_create(user_recommendations, batch_size = batch_size)
+
+    cache.invalidate()
+    return len(user_ids)
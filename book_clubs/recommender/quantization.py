@@ -0,0 +1,116 @@
+import numpy as np
+from . import scoring
+
+# Dtypes that the factors of a FactorModel can be stored as.
+DTYPES = ['float64', 'float32', 'float16', 'int8']
+
+# Largest magnitude of an int8 factor, which the largest factor of each row is scaled to.
+INT8_MAX = 127
+
+# Number of item rows that are dequantized at a time when scoring.
+BLOCK_SIZE = 65536
+
+def quantize_rows(factors, dtype):
+    """
+        Converts factors to dtype, which is one of DTYPES. Returns the
+        converted factors and, for int8, the float32 scale of each row,
+        which its factors are multiplied by to dequantize them, or None.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f'Factors can not be stored as {dtype}, only as one of {", ".join(DTYPES)}.')
+
+    factors = np.asarray(factors, dtype = np.float64)
+
+    if (dtype != 'int8'):
+        return (factors.astype(dtype), None)
+
+    scales = np.zeros(len(factors))
+
+    if (factors.shape[1] > 0):
+        scales = np.abs(factors).max(axis = 1) / INT8_MAX
+
+    scales[scales == 0] = 1
+    values = np.rint(factors / scales[:, np.newaxis]).astype(np.int8)
+    return (values, scales.astype(np.float32))
+
+def dequantize_rows(values, scales, rows = None):
+    """
+        Returns the float64 factors of values, or of its rows if given,
+        multiplied by scales if there are any. Float64 values are returned
+        without a copy.
+    """
+    if (rows is not None):
+        values = values[rows]
+
+        if (scales is not None):
+            scales = scales[rows]
+
+    factors = np.asarray(values, dtype = np.float64)
+
+    if (scales is not None):
+        factors = factors * np.asarray(scales, dtype = np.float64)[..., np.newaxis]
+
+    return factors
+
+def factor_product(user_factors, values, scales, rows = None):
+    """
+        Returns user_factors times the transposed factors of values, or of
+        its rows if given, dequantizing BLOCK_SIZE rows at a time so that
+        a float64 copy of every item's factors is never held in memory.
+        The scales of int8 rows are applied to the product of each block.
+    """
+    if ((values.dtype == np.float64) and (scales is None)):
+        if (rows is not None):
+            values = values[rows]
+
+        return user_factors @ values.T
+
+    total_rows = len(values) if (rows is None) else len(rows)
+    product = np.empty((len(user_factors), total_rows))
+
+    for start in range(0, total_rows, BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        block_rows = block if (rows is None) else rows[block]
+        product[:, block] = user_factors @ np.asarray(values[block_rows], dtype = np.float64).T
+
+        if (scales is not None):
+            product[:, block] *= scales[block_rows]
+
+    return product
+
+def compare_rankings(model, quantized, n, inner_uids, chunk_size = 256):
+    """
+        Compares the best n items that model and quantized, a quantized copy
+        of it, rank for the users with inner ids inner_uids, leaving out the
+        items each user rated. Returns a dict with the mean and lowest
+        fraction of each user's top n that both models share, and the mean
+        and largest absolute difference between their estimated ratings.
+    """
+    overlaps = []
+    total_error = 0.0
+    total_scores = 0
+    max_error = 0.0
+
+    for start in range(0, len(inner_uids), chunk_size):
+        chunk = np.asarray(inner_uids[start : start + chunk_size], dtype = np.int64)
+        scores = scoring.mask_rated_items(model, chunk, scoring.score_users(model, chunk))
+        quantized_scores = scoring.mask_rated_items(quantized, chunk, scoring.score_users(quantized, chunk))
+        rated = np.isneginf(scores)
+        errors = np.abs(scores[~rated] - quantized_scores[~rated])
+
+        if (len(errors) > 0):
+            total_error += errors.sum()
+            total_scores += len(errors)
+            max_error = max(max_error, float(errors.max()))
+
+        for (best, quantized_best) in zip(scoring.top_items(scores, n), scoring.top_items(quantized_scores, n)):
+            if (len(best) > 0):
+                overlaps.append(len(np.intersect1d(best, quantized_best)) / len(best))
+
+    return {
+        'users' : len(overlaps),
+        'mean_overlap' : float(np.mean(overlaps)) if overlaps else 1.0,
+        'min_overlap' : float(np.min(overlaps)) if overlaps else 1.0,
+        'mean_error' : float(total_error / max(1, total_scores)),
+        'max_error' : max_error
+    }
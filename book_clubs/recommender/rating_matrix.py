@@ -0,0 +1,224 @@
+import csv
+import os
+import numpy as np
+from scipy import sparse
+from .directories import save_directory
+
+class RatingMatrix:
+
+    """
+        Ratings held as a sparse (users x items) matrix, shared by training
+        and evaluation instead of each building its own per-rating
+        Python structures. Row u is the user user_raw_ids[u] and column i is
+        the book item_raw_ids[i], both sorted so raw ids are found with a
+        binary search. Ratings of zero, which are implicit ratings in the
+        Book-Crossing dataset, are stored explicitly.
+        Order holds, for each stored rating in CSR order, its position in the
+        source, which is the primary key for the Rating table and the row
+        for CSV files. It orders ratings by recency, and recovers the order
+        of the source when ratings are handed to surprise.
+    """
+
+    # The arrays saved by save, each as a .npy file of the matrix directory.
+    ARRAYS = ['user_raw_ids', 'item_raw_ids', 'indptr', 'indices', 'data', 'order']
+
+    def __init__(self, ratings, user_raw_ids, item_raw_ids, order):
+        self.ratings = ratings
+        self.user_raw_ids = user_raw_ids
+        self.item_raw_ids = item_raw_ids
+        self.order = order
+        self._csc = None
+
+    @property
+    def n_users(self):
+        return len(self.user_raw_ids)
+
+    @property
+    def n_items(self):
+        return len(self.item_raw_ids)
+
+    def __len__(self):
+        return self.ratings.nnz
+
+    @property
+    def csc(self):
+        """The ratings as a CSC matrix, to read the ratings of an item. It is built on first use."""
+        if (self._csc is None):
+            self._csc = self.ratings.tocsc()
+
+        return self._csc
+
+    @classmethod
+    def from_arrays(cls, raw_uids, raw_iids, ratings, order = None):
+        """
+            Builds a RatingMatrix from parallel arrays of raw user ids, raw item
+            ids and ratings. Order defaults to the position in the arrays.
+            If a user rated an item more than once only the last rating is kept.
+        """
+        (user_raw_ids, users) = np.unique(np.asarray(raw_uids), return_inverse = True)
+        (item_raw_ids, items) = np.unique(np.asarray(raw_iids), return_inverse = True)
+        ratings = np.asarray(ratings, dtype = np.float32)
+
+        if (order is None):
+            order = np.arange(len(ratings), dtype = np.int64)
+
+        (_, last) = np.unique((users * len(item_raw_ids) + items)[::-1], return_index = True)
+        last = len(ratings) - 1 - last
+        matrix = sparse.csr_matrix((ratings[last], (users[last], items[last])), shape = (len(user_raw_ids), len(item_raw_ids)))
+        matrix.sort_indices()
+        # CSR order is by user then item, which the (user, item) keys of last are sorted by.
+        return cls(matrix, user_raw_ids, item_raw_ids, np.asarray(order, dtype = np.int64)[last])
+
+    @classmethod
+    def from_rating_arrays(cls, rating_arrays):
+        """Builds a RatingMatrix from the RatingArrays of the Rating table."""
+        return cls.from_arrays(
+            rating_arrays.user_raw_ids[rating_arrays.users],
+            rating_arrays.item_raw_ids[rating_arrays.items],
+            rating_arrays.ratings,
+            rating_arrays.rating_ids
+        )
+
+    @classmethod
+    def from_database(cls, chunk_size = None):
+        """Builds a RatingMatrix from the Rating table, read in chunks of chunk_size rows."""
+        from .training import CHUNK_SIZE, load_ratings
+        return cls.from_rating_arrays(load_ratings(chunk_size or CHUNK_SIZE))
+
+    @classmethod
+    def from_csv(cls, ratings_path, books_path = None, every_nth = 0, encoding = 'Windows-1252'):
+        """
+            Builds a RatingMatrix from the Book-Crossing ratings CSV file, with
+            the same rows that the evaluation DataHandler loads. If books_path
+            is given, ratings of books missing from that CSV file are skipped.
+            If every_nth is above zero, a rating is kept when it is at least
+            every_nth rows after the last kept rating.
+        """
+        import pandas as pd
+
+        rows = pd.read_csv(
+            ratings_path, sep = ';', encoding = encoding, dtype = str,
+            keep_default_na = False, usecols = [0, 1, 2]
+        )
+        rows.columns = ['user', 'book', 'rating']
+        valid = np.ones(len(rows), dtype = bool)
+
+        if (books_path != None):
+            valid = rows['book'].isin(read_book_ids(books_path, encoding)).to_numpy()
+
+        positions = select_every_nth(valid, every_nth)
+        return cls.from_arrays(
+            rows['user'].to_numpy()[positions].astype(np.int64),
+            rows['book'].to_numpy()[positions].astype(str),
+            rows['rating'].to_numpy()[positions].astype(np.int64),
+            positions
+        )
+
+    def user_ratings(self, raw_uid, source_order = False):
+        """
+            Returns the raw item ids and ratings of a user, which are empty for
+            unknown users. They are sorted by item, or in the order of the
+            source if source_order.
+        """
+        position = np.searchsorted(self.user_raw_ids, raw_uid)
+
+        if ((position >= self.n_users) or (self.user_raw_ids[position] != raw_uid)):
+            return (self.item_raw_ids[:0], self.ratings.data[:0])
+
+        rows = np.arange(self.ratings.indptr[position], self.ratings.indptr[position + 1])
+
+        if source_order:
+            rows = rows[np.argsort(self.order[rows], kind = 'stable')]
+
+        return (self.item_raw_ids[self.ratings.indices[rows]], self.ratings.data[rows])
+
+    def to_rating_arrays(self):
+        """Returns the ratings as RatingArrays, in CSR order."""
+        from .training import RatingArrays
+        return RatingArrays(self._users(), self.ratings.indices.astype(np.int32, copy = False), self.ratings.data, self.user_raw_ids, self.item_raw_ids, self.order)
+
+    def _users(self):
+        """Returns the user index of each stored rating, in CSR order."""
+        return np.repeat(np.arange(self.n_users, dtype = np.int32), np.diff(self.ratings.indptr))
+
+    def to_dataframe(self):
+        """Returns the ratings as a pandas DataFrame of userID, itemID and rating columns, in source order."""
+        import pandas as pd
+        source_order = np.argsort(self.order, kind = 'stable')
+        return pd.DataFrame({
+            'userID' : self.user_raw_ids[self._users()[source_order]],
+            'itemID' : self.item_raw_ids[self.ratings.indices[source_order]],
+            'rating' : self.ratings.data[source_order]
+        })
+
+    def save(self, path):
+        """
+            Saves the matrix as a directory of .npy files at path, one for
+            each of ARRAYS, so that load can memory-map them. The directory
+            is written with save_directory, so a matrix is never read half
+            written, and a matrix already at path is replaced without writing
+            to files that processes may have memory-mapped.
+        """
+        save_directory(path, self._write)
+
+    def _write(self, path):
+        arrays = {
+            'user_raw_ids' : self.user_raw_ids,
+            'item_raw_ids' : self.item_raw_ids,
+            'indptr' : self.ratings.indptr,
+            'indices' : self.ratings.indices,
+            'data' : self.ratings.data,
+            'order' : self.order
+        }
+
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, name + '.npy'), arrays[name], allow_pickle = False)
+
+    @classmethod
+    def load(cls, path, mmap_mode = 'r'):
+        """
+            Loads a matrix saved by save. The arrays are memory-mapped with
+            mmap_mode, so loading reads no ratings until they are used, and
+            the CSR matrix is built on the mapped arrays without copying them.
+            A mmap_mode of None reads the arrays into memory instead.
+        """
+        arrays = {
+            name : np.load(os.path.join(path, name + '.npy'), mmap_mode = mmap_mode, allow_pickle = False)
+            for name in cls.ARRAYS
+        }
+        shape = (len(arrays['user_raw_ids']), len(arrays['item_raw_ids']))
+        matrix = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape = shape, copy = False)
+        return cls(matrix, arrays['user_raw_ids'], arrays['item_raw_ids'], arrays['order'])
+
+def read_book_ids(books_path, encoding = 'Windows-1252'):
+    """Returns the set of book ids in the Book-Crossing books CSV file, read as the DataHandler reads them."""
+    with open(books_path, newline = '', encoding = encoding) as csv_file:
+        book_reader = csv.reader(csv_file, delimiter = ';', quoting = csv.QUOTE_ALL)
+        next(book_reader)
+        return set(row[0] for row in book_reader)
+
+def select_every_nth(valid, every_nth):
+    """
+        Returns the positions of the rows the DataHandler keeps, given whether
+        each row is valid. A row is kept when it is valid and, if every_nth
+        is above one, it is at least every_nth rows after the last kept row,
+        the first row being one row after the start.
+    """
+    positions = np.flatnonzero(valid)
+
+    if (every_nth <= 1):
+        return positions
+
+    kept = []
+    next_position = every_nth - 1
+
+    while True:
+        index = np.searchsorted(positions, next_position)
+
+        if (index >= len(positions)):
+            break
+
+        kept.append(positions[index])
+        next_position = positions[index] + every_nth
+
+    return np.array(kept, dtype = np.int64)
@@ -0,0 +1,220 @@
+import logging
+import os
+import threading
+import numpy as np
+from surprise import dump
+from django.conf import settings
+from .factors import FactorModel
+from .neighbours import NeighbourModel
+from .store import ModelStore
+
+PAGE_SIZE = 4096
+
+logger = logging.getLogger(__name__)
+
+class LoadedModel:
+
+    """
+        A recommender model that has been loaded into the current process.
+        The version identifies the artifact it was loaded from.
+        Factors is set for algorithms that can be scored with array
+        operations, and neighbours for item-based KNN algorithms, which are
+        scored from sparse neighbour lists. Algo is None for models loaded
+        from a FactorModel or NeighbourModel directory.
+    """
+
+    def __init__(self, algo, version, factors = None, neighbours = None):
+        self.algo = algo
+        self.version = version
+        self.factors = factors
+        self.neighbours = neighbours
+
+        if ((factors == None) and FactorModel.supports(algo)):
+            self.factors = FactorModel.from_algo(algo)
+
+        if ((neighbours == None) and NeighbourModel.supports(algo)):
+            self.neighbours = NeighbourModel.from_algo(algo, settings.RECOMMENDER_NEIGHBOURS['k'])
+
+    @property
+    def item_model(self):
+        """The FactorModel or NeighbourModel that holds the items of the model, or None if there is neither."""
+        if (self.factors != None):
+            return self.factors
+
+        return self.neighbours
+
+    def warm(self):
+        """
+            Reads a byte of every page of the memory-mapped arrays of the
+            model and of its index and popularity rankings, so that the first
+            requests served by the model do not wait on the disk.
+        """
+        models = [self.item_model]
+
+        if (self.item_model != None):
+            models += [getattr(self.item_model, 'item_index', None), self.item_model.popularity]
+
+        for model in models:
+            for array in vars(model).values() if (model != None) else ():
+                if isinstance(array, np.ndarray) and (array.size > 0):
+                    flat = array.reshape(-1)
+                    flat[::max(1, PAGE_SIZE // flat.itemsize)].copy()
+
+def load_artifact(path, signature = None):
+    """
+        Loads the artifact at path, which is a surprise dump, or a directory
+        saved by FactorModel.save or NeighbourModel.save. The version of the
+        model is the one in the directory's meta, or signature if there is
+        none. The predictions of a surprise dump are not kept in memory.
+    """
+    if NeighbourModel.is_saved_in(path):
+        neighbours = NeighbourModel.load(path)
+        return LoadedModel(None, neighbours.meta.get('version', signature), neighbours = neighbours)
+
+    if os.path.isdir(path):
+        factors = FactorModel.load(path)
+        return LoadedModel(None, factors.meta.get('version', signature), factors)
+
+    (predictions, algo) = dump.load(path)
+    return LoadedModel(algo, signature)
+
+def is_artifact(path):
+    """Checks if path holds an artifact that load_artifact can load, rather than a model store."""
+    return (os.path.isfile(path) or FactorModel.is_saved_in(path) or NeighbourModel.is_saved_in(path))
+
+class ModelRegistry:
+
+    """
+        Loads the recommender artifact at path once per process and shares
+        it between requests. The artifact is either a surprise dump, a
+        directory saved by FactorModel.save whose arrays are memory-mapped,
+        or a ModelStore, whose current version is loaded. The artifact is
+        only loaded again when the store's current version changes, or the
+        modification time or size of the file on disk, or of the directory's
+        meta file, changes. A new model is loaded and warmed by one request
+        while the others keep being served the previous model, which is then
+        swapped for the new one.
+        If path is a store without a current version, or there is nothing
+        at path, the artifact at fallback_path is served instead if given.
+    """
+
+    def __init__(self, path, fallback_path = None):
+        self.path = path
+        self.fallback_path = fallback_path
+        self._model = None
+        self._signature = None
+        self._failed_signature = None
+        self._pointer = None
+        self._lock = threading.Lock()
+
+    def _artifact_path(self):
+        """
+            Returns the path of the artifact to serve, which is the current
+            version's directory if path is a store. The CURRENT file is only
+            read again when it has been replaced.
+        """
+        store = ModelStore(self.path)
+
+        try:
+            stat = os.stat(store.current_path)
+        except OSError:
+            if ((self.fallback_path != None) and not is_artifact(self.path)):
+                return self.fallback_path
+
+            return self.path
+
+        pointer_signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        if ((self._pointer == None) or (self._pointer[0] != pointer_signature)):
+            version = store.current()
+
+            if (version == None):
+                return None
+
+            self._pointer = (pointer_signature, store.version_path(version))
+
+        return self._pointer[1]
+
+    def _artifact_signature(self, path):
+        """Returns the signature of the artifact at path, or None if there is none."""
+        if (path == None):
+            return None
+
+        signature_path = path
+
+        if os.path.isdir(path):
+            signature_path = os.path.join(path, FactorModel.META_FILE)
+
+        try:
+            stat = os.stat(signature_path)
+        except OSError:
+            return None
+
+        return f'{path}:{stat.st_mtime_ns}-{stat.st_size}'
+
+    def _load(self, path, signature):
+        """Loads and warms the artifact at path."""
+        model = load_artifact(path, signature.rsplit(':', 1)[-1])
+        model.warm()
+        return model
+
+    def get(self):
+        """
+            Returns the current model, or None if no artifact could be loaded.
+            If a changed artifact can not be loaded, for example because it
+            is still being written, the previously loaded model is kept, and
+            loading is only tried again once the artifact changes again.
+            While another thread loads a changed artifact, the previous
+            model is returned instead of waiting for it.
+        """
+        path = self._artifact_path()
+        signature = self._artifact_signature(path)
+
+        if ((signature == None) or (signature == self._signature) or (signature == self._failed_signature)):
+            return self._model
+
+        if not self._lock.acquire(blocking = (self._model == None)):
+            return self._model
+
+        try:
+            if ((signature != self._signature) and (signature != self._failed_signature)):
+                try:
+                    self._model = self._load(path, signature)
+                except Exception:
+                    logger.exception('Could not load the recommender model at %s.', path)
+                    self._failed_signature = signature
+                else:
+                    self._signature = signature
+        finally:
+            self._lock.release()
+
+        return self._model
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_registry(path = None):
+    """
+        Returns the registry for path, which defaults to RECOMMENDER_MODEL_PATH.
+        The registry of RECOMMENDER_MODEL_PATH falls back to
+        RECOMMENDER_FALLBACK_MODEL_PATH.
+    """
+    if (path == None):
+        path = settings.RECOMMENDER_MODEL_PATH
+
+    path = str(path)
+
+    with _registries_lock:
+        if path not in _registries:
+            fallback_path = None
+
+            if ((path == str(settings.RECOMMENDER_MODEL_PATH)) and (settings.RECOMMENDER_FALLBACK_MODEL_PATH != None)):
+                fallback_path = str(settings.RECOMMENDER_FALLBACK_MODEL_PATH)
+
+            _registries[path] = ModelRegistry(path, fallback_path)
+
+        return _registries[path]
+
+def get_model():
+    """Returns the recommender model of the current process, or None if there is none."""
+    return get_registry().get()
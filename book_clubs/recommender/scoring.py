@@ -0,0 +1,141 @@
+import numpy as np
+from . import foldin
+
+def score_vectors(model, user_biases, user_factors, items = None):
+    """
+        Returns a (users x items) matrix of the ratings estimated by model
+        for users with user_biases and user_factors against every item, or
+        against the items with inner ids in items if given, computed with
+        one matrix multiplication, which dequantizes quantized item factors
+        block by block. Estimates are clipped into the rating scale in the
+        same way as surprise's predict.
+    """
+    item_biases = model.item_biases
+
+    if (items is not None):
+        item_biases = item_biases[items]
+
+    if model.biased:
+        scores = model.global_mean + np.asarray(user_biases)[:, np.newaxis]
+        scores = scores + item_biases[np.newaxis, :]
+        scores += model.item_product(user_factors, items)
+    else:
+        scores = model.item_product(user_factors, items)
+
+    np.clip(scores, model.rating_scale[0], model.rating_scale[1], out = scores)
+    return scores
+
+def score_users(model, inner_uids):
+    """Returns a (users x items) matrix of the ratings estimated by model for users in the trainset."""
+    inner_uids = np.asarray(inner_uids, dtype = np.int64)
+    return score_vectors(model, model.user_biases[inner_uids], model.user_vectors(inner_uids))
+
+def mask_rated_items(model, inner_uids, scores):
+    """Sets the scores of items that users have rated in the trainset to -inf, in place."""
+    for row, inner_uid in enumerate(inner_uids):
+        scores[row, model.rated_items(inner_uid)] = -np.inf
+
+    return scores
+
+def rank_members(model, raw_uids, member_ratings = None, k = None, excluded_items = None, total_candidates = None, candidate_items = None):
+    """
+        Ranks the items that each user in raw_uids has not rated.
+        Returns a list with, for each user, an array of book ISBNs sorted
+        by estimated rating, best first. If k is given only the best k items
+        of each user are selected, without sorting the whole catalogue.
+        Items with True in the boolean array excluded_items are left out.
+        If member_ratings, a dict from user id to their (book_isbn, rating)
+        ratings, is given, users that are unknown to the model or have rated
+        books since it was trained are folded in. Users that can not be
+        scored are given None instead of an array.
+        If candidate_items, an array of item inner ids, is given only those
+        items are scored. Otherwise, if total_candidates is given and the
+        model has an ItemIndex, only the items the index retrieves for each
+        user are scored, so the best k items are approximate.
+    """
+    rankings = rank_member_items(model, raw_uids, member_ratings, k, excluded_items, total_candidates, candidate_items)
+    return [None if (ranking == None) else model.item_raw_ids[ranking[0]] for ranking in rankings]
+
+def rank_member_items(model, raw_uids, member_ratings = None, k = None, excluded_items = None, total_candidates = None, candidate_items = None):
+    """
+        Ranks items for users in the same way as rank_members, but returns
+        for each user a pair of an int32 array of item inner ids and a float32
+        array of their estimated ratings, which are compact to send between processes.
+        Users that can not be scored are given None instead of a pair.
+    """
+    vectors = foldin.member_vectors(model, raw_uids, member_ratings or {})
+    rankings = [None] * len(raw_uids)
+    indices = [index for (index, vector) in enumerate(vectors) if (vector != None)]
+
+    if not indices:
+        return rankings
+
+    if ((candidate_items is None) and (total_candidates != None) and (model.item_index != None)):
+        for index in indices:
+            rankings[index] = _rank_candidates(model, vectors[index], k, excluded_items, total_candidates)
+
+        return rankings
+
+    if (candidate_items is not None):
+        candidate_items = np.unique(np.asarray(candidate_items, dtype = np.int64))
+
+    scores = score_vectors(
+        model,
+        np.array([vectors[index].bias for index in indices]),
+        np.vstack([vectors[index].factors for index in indices]),
+        candidate_items
+    )
+
+    if ((excluded_items is not None) and (candidate_items is not None)):
+        scores[:, excluded_items[candidate_items]] = -np.inf
+    elif (excluded_items is not None):
+        scores[:, excluded_items] = -np.inf
+
+    for (row, index) in enumerate(indices):
+        if (candidate_items is not None):
+            scores[row, np.isin(candidate_items, vectors[index].rated_items)] = -np.inf
+        else:
+            scores[row, vectors[index].rated_items] = -np.inf
+
+    for (row, (index, columns)) in enumerate(zip(indices, top_items(scores, k))):
+        items = columns if (candidate_items is None) else candidate_items[columns]
+        rankings[index] = (items.astype(np.int32), scores[row, columns].astype(np.float32))
+
+    return rankings
+
+def _rank_candidates(model, vector, k, excluded_items, total_candidates):
+    """Ranks the items that the model's ItemIndex retrieves for a user vector, scoring only those."""
+    candidates = model.item_index.search(model.item_index.query_vectors(vector.factors)[0], total_candidates)
+    candidates = np.setdiff1d(candidates, vector.rated_items)
+
+    if (excluded_items is not None):
+        candidates = candidates[~excluded_items[candidates]]
+
+    scores = score_vectors(model, [vector.bias], vector.factors[np.newaxis, :], candidates)[0]
+    ranking = top_items(scores[np.newaxis, :], k)[0]
+    return (candidates[ranking].astype(np.int32), scores[ranking].astype(np.float32))
+
+def top_items(scores, k = None):
+    """
+        Selects the k best scoring items of each row of scores, using a
+        partial selection instead of sorting whole rows. Returns a list with,
+        for each row, an array of item indices sorted by score, best first,
+        with ties in index order. Items scored -inf are left out.
+        If k is None every item of each row is sorted.
+    """
+    rankings = []
+
+    for row in scores:
+        if ((k != None) and (k < len(row))):
+            # argpartition splits ties at the kth score arbitrarily, so the ties kept are the ones with the lowest indices
+            kth_score = -np.partition(-row, k - 1)[k - 1]
+            better = np.flatnonzero(row > kth_score)
+            ties = np.flatnonzero(row == kth_score)[:k - len(better)]
+            candidates = np.sort(np.concatenate((better, ties)))
+        else:
+            candidates = np.arange(len(row))
+
+        candidates = candidates[np.argsort(-row[candidates], kind = 'stable')]
+        rankings.append(candidates[np.isfinite(row[candidates])])
+
+    return rankings
@@ -0,0 +1,150 @@
+import datetime
+import json
+import os
+import tempfile
+from .factors import FactorModel
+
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+class StoreError(Exception):
+    """Raised when a version can not be published or rolled back to."""
+
+def _write_atomic(path, text):
+    """
+        Writes text to a temporary file next to path and renames it over path,
+        so that readers see either the old or the new contents, never a part.
+    """
+    (handle, temporary_path) = tempfile.mkstemp(dir = os.path.dirname(path), prefix = '.' + os.path.basename(path) + '.')
+
+    try:
+        with os.fdopen(handle, 'w') as temporary_file:
+            temporary_file.write(text)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+
+        raise
+
+class ModelStore:
+
+    """
+        A directory of trained models, each saved in a subdirectory named by
+        its version. The manifest records every published version and the
+        order they were published in, and the CURRENT file names the version
+        that is served. Both files are replaced atomically, and a version is
+        only published once its meta file, which is written last, exists,
+        so readers never see a partly written model.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+
+    @classmethod
+    def is_store(cls, directory):
+        """Checks if directory is a model store with a current version."""
+        return os.path.isfile(os.path.join(str(directory), CURRENT_FILE))
+
+    @property
+    def current_path(self):
+        return os.path.join(self.directory, CURRENT_FILE)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def version_path(self, version):
+        """Returns the directory of version."""
+        return os.path.join(self.directory, version)
+
+    def current(self):
+        """Returns the version that is served, or None if there is none."""
+        try:
+            with open(self.current_path) as current_file:
+                return (current_file.read().strip() or None)
+        except OSError:
+            return None
+
+    def manifest(self):
+        """
+            Returns the manifest, a dict with 'versions', from each published
+            version to when it was first published and its meta, and 'history',
+            the versions in the order they were made current.
+        """
+        try:
+            with open(self.manifest_path) as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return {'versions' : {}, 'history' : []}
+
+    def versions(self):
+        """Returns the versions saved in the store that can be published, oldest first."""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return []
+
+        # Models being saved are written to hidden temporary directories
+        return [name for name in names if (not name.startswith('.')) and FactorModel.is_saved_in(self.version_path(name))]
+
+    def _read_meta(self, version):
+        with open(os.path.join(self.version_path(version), FactorModel.META_FILE)) as meta_file:
+            return (json.load(meta_file).get('meta') or {})
+
+    def _make_current(self, manifest, version):
+        _write_atomic(self.manifest_path, json.dumps(manifest, indent = 2))
+        _write_atomic(self.current_path, version + '\n')
+
+    def publish(self, version):
+        """
+            Makes version, which must be a complete model saved in the store,
+            the one that is served. Raises StoreError if it is not. Publishing
+            the current version again leaves the history unchanged.
+        """
+        if ((os.sep in version) or (version in ('', '.', '..')) or not FactorModel.is_saved_in(self.version_path(version))):
+            raise StoreError(f'There is no complete model version {version} in {self.directory}.')
+
+        manifest = self.manifest()
+
+        if version not in manifest['versions']:
+            manifest['versions'][version] = {
+                'published_at' : datetime.datetime.now(datetime.timezone.utc).isoformat(timespec = 'seconds'),
+                'meta' : self._read_meta(version)
+            }
+
+        if (self.current() != version):
+            manifest['history'].append(version)
+
+        self._make_current(manifest, version)
+
+    def rollback(self, version = None):
+        """
+            Makes the version that was current before the current one the one
+            that is served again, or version if it is given, which must have
+            been published before. Returns the version that is now current.
+            Raises StoreError if there is nothing to roll back to. Rolling
+            back to the current version leaves the history unchanged.
+        """
+        manifest = self.manifest()
+        history = manifest['history']
+
+        if (version == None):
+            if (len(history) < 2):
+                raise StoreError('There is no earlier version to roll back to.')
+
+            history.pop()
+            version = history[-1]
+        elif version not in manifest['versions']:
+            raise StoreError(f'Model version {version} has never been published.')
+        elif (self.current() != version):
+            history.append(version)
+
+        if not FactorModel.is_saved_in(self.version_path(version)):
+            raise StoreError(f'Model version {version} is no longer in {self.directory}.')
+
+        self._make_current(manifest, version)
+        return version
@@ -0,0 +1,234 @@
+import datetime
+import itertools
+import sys
+import time
+from collections import defaultdict
+import numpy as np
+from surprise import SVD, Trainset
+from django.conf import settings
+from django.utils.module_loading import import_string
+from book_clubs.models import Book, Rating
+from .ann import ItemIndex
+from .factors import FactorModel
+from .neighbours import BLOCK_SIZE, NeighbourModel
+from .popularity import PopularityRankings
+
+# Rows read from the Rating table per database round trip.
+CHUNK_SIZE = 10000
+
+# Bytes that surprise's Trainset takes per rating, as measured for a million
+# ratings, for the tuples and floats held in its per-user and per-item lists.
+TRAINSET_BYTES_PER_RATING = 260
+
+class RatingArrays:
+
+    """
+        Ratings held as parallel arrays, with users and items given
+        dense indices into user_raw_ids and item_raw_ids. Rating_ids holds
+        the primary key of each rating, which grows as ratings are made.
+    """
+
+    def __init__(self, users, items, ratings, user_raw_ids, item_raw_ids, rating_ids = None):
+        self.users = users
+        self.items = items
+        self.ratings = ratings
+        self.rating_ids = rating_ids
+        self.user_raw_ids = user_raw_ids
+        self.item_raw_ids = item_raw_ids
+
+    def __len__(self):
+        return len(self.ratings)
+
+def load_ratings(chunk_size = CHUNK_SIZE):
+    """
+        Streams the Rating table in chunks of chunk_size rows into RatingArrays,
+        without holding model instances or per-row Python tuples for the whole table.
+        ISBNs are mapped to indices with a binary search over the sorted catalogue.
+    """
+    total_ratings = Rating.objects.count()
+    catalogue = np.array(sorted(Book.objects.values_list('isbn', flat = True).iterator(chunk_size = chunk_size)))
+    users = np.empty(total_ratings, dtype = np.int64)
+    items = np.empty(total_ratings, dtype = np.int64)
+    ratings = np.empty(total_ratings, dtype = np.float32)
+    rating_ids = np.empty(total_ratings, dtype = np.int64)
+    rows = Rating.objects.order_by().values_list('user_id', 'book_id', 'rating', 'id').iterator(chunk_size = chunk_size)
+    position = 0
+
+    while (position < total_ratings):
+        chunk = list(itertools.islice(rows, chunk_size))
+
+        if not chunk:
+            break
+
+        (chunk_users, chunk_isbns, chunk_ratings, chunk_ids) = zip(*chunk)
+        end = position + len(chunk)
+        users[position : end] = chunk_users
+        items[position : end] = np.searchsorted(catalogue, chunk_isbns)
+        ratings[position : end] = chunk_ratings
+        rating_ids[position : end] = chunk_ids
+        position = end
+
+    (user_raw_ids, users) = np.unique(users[:position], return_inverse = True)
+    (item_indices, items) = np.unique(items[:position], return_inverse = True)
+    return RatingArrays(
+        users.astype(np.int32),
+        items.astype(np.int32),
+        ratings[:position],
+        user_raw_ids,
+        catalogue[item_indices],
+        rating_ids[:position]
+    )
+
+def build_trainset(rating_arrays, rating_scale = (0, 10)):
+    """Builds a surprise Trainset from RatingArrays, keeping their dense indices as inner ids."""
+    ur = defaultdict(list)
+    ir = defaultdict(list)
+
+    for (u, i, r) in zip(rating_arrays.users.tolist(), rating_arrays.items.tolist(), rating_arrays.ratings.tolist()):
+        ur[u].append((i, r))
+        ir[i].append((u, r))
+
+    return Trainset(
+        ur,
+        ir,
+        len(rating_arrays.user_raw_ids),
+        len(rating_arrays.item_raw_ids),
+        len(rating_arrays),
+        rating_scale,
+        {raw_uid : u for (u, raw_uid) in enumerate(rating_arrays.user_raw_ids.tolist())},
+        {raw_iid : i for (i, raw_iid) in enumerate(rating_arrays.item_raw_ids.tolist())}
+    )
+
+def build_algorithm():
+    """Returns an unfitted instance of the algorithm configured in RECOMMENDER_TRAINING."""
+    algorithm_class = import_string(settings.RECOMMENDER_TRAINING['algorithm'])
+    return algorithm_class(**settings.RECOMMENDER_TRAINING.get('options', {}))
+
+def check_memory_budget(total_ratings, memory_budget):
+    """
+        Raises ValueError if the Trainset of total_ratings ratings would not
+        fit in memory_budget bytes, before any of it is built. There is
+        no limit if memory_budget is None.
+    """
+    needed = total_ratings * TRAINSET_BYTES_PER_RATING
+
+    if ((memory_budget != None) and (needed > memory_budget)):
+        raise ValueError(
+            f'Training on {total_ratings} ratings needs about {needed // (1024 * 1024)}MB, '
+            f'more than the memory budget of {memory_budget // (1024 * 1024)}MB.'
+        )
+
+def peak_memory():
+    """
+        Returns the peak resident memory of the current process in bytes,
+        or None where it can not be measured, such as on Windows.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # The peak is given in bytes on macOS, and in kilobytes elsewhere.
+    if (sys.platform == 'darwin'):
+        return peak
+
+    return peak * 1024
+
+def new_version():
+    """Returns a version for a newly trained model, based on the current time."""
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d%H%M%S')
+
+def _build_meta(version, ratings, users, items, fit_seconds):
+    return {
+        'version' : version,
+        'algorithm' : settings.RECOMMENDER_TRAINING['algorithm'],
+        'trained_at' : datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'ratings' : ratings,
+        'users' : users,
+        'items' : items,
+        'fit_seconds' : fit_seconds,
+        'peak_memory' : peak_memory()
+    }
+
+def train(directory, version = None, chunk_size = CHUNK_SIZE, rating_matrix = None, quantize = None):
+    """
+        Fits the configured algorithm on the Rating table and saves it as
+        a FactorModel in directory. Returns the saved metadata, which holds
+        the version, the number of ratings, users and items, the fit time
+        in seconds and the peak memory of the process in bytes.
+        An ItemIndex over the items is built and saved with the model,
+        and so are the PopularityRankings of the items.
+        Item-based cosine KNNBasic algorithms are not fitted, which would
+        need an (items x items) similarity matrix, but saved as a
+        NeighbourModel of the RECOMMENDER_NEIGHBOURS most similar items.
+        If a RatingMatrix is given it is trained on instead of the Rating table.
+        If quantize, one of quantization.DTYPES, is given the factors of the
+        FactorModel are saved as that dtype.
+        Raises ValueError if an SVD model's Trainset would not fit in the
+        memory_budget of RECOMMENDER_TRAINING. NeighbourModels are built
+        a block of items at a time and are not limited by it.
+    """
+    if (version == None):
+        version = new_version()
+
+    if (rating_matrix != None):
+        rating_arrays = rating_matrix.to_rating_arrays()
+    else:
+        rating_arrays = load_ratings(chunk_size)
+
+    if (len(rating_arrays) == 0):
+        raise ValueError('There are no ratings to train on.')
+
+    algo = build_algorithm()
+    popularity = PopularityRankings.build(
+        len(rating_arrays.item_raw_ids),
+        rating_arrays.items,
+        rating_arrays.ratings,
+        rating_arrays.rating_ids
+    )
+
+    if NeighbourModel.can_train(algo):
+        start = time.perf_counter()
+        neighbours = NeighbourModel.build(
+            rating_arrays,
+            settings.RECOMMENDER_NEIGHBOURS['k'],
+            block_size = settings.RECOMMENDER_NEIGHBOURS.get('block_size', BLOCK_SIZE),
+            min_support = algo.sim_options.get('min_support', 1)
+        )
+        meta = _build_meta(
+            version,
+            len(rating_arrays),
+            len(rating_arrays.user_raw_ids),
+            len(rating_arrays.item_raw_ids),
+            time.perf_counter() - start
+        )
+        meta['neighbours'] = int(neighbours.neighbour_indptr[-1])
+        neighbours.popularity = popularity
+        neighbours.save(directory, meta = meta)
+        return meta
+
+    if not isinstance(algo, SVD):
+        raise ValueError(f'{type(algo).__name__} models can not be trained, only SVD and item-based cosine KNNBasic models can.')
+
+    check_memory_budget(len(rating_arrays), settings.RECOMMENDER_TRAINING.get('memory_budget'))
+    trainset = build_trainset(rating_arrays)
+    rating_arrays = None
+
+    start = time.perf_counter()
+    algo.fit(trainset)
+    meta = _build_meta(version, trainset.n_ratings, trainset.n_users, trainset.n_items, time.perf_counter() - start)
+
+    factors = FactorModel.from_algo(algo)
+    factors.popularity = popularity
+
+    factors.item_index = ItemIndex.build(factors, settings.RECOMMENDER_ANN.get('lists'))
+    meta['index_lists'] = factors.item_index.n_lists
+
+    if (quantize != None):
+        factors = factors.quantize(quantize)
+        meta['factor_dtype'] = quantize
+
+    factors.save(directory, meta = meta)
+    return meta
@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Book, Membership, Rating
+from .recommender import cache, catalogue, precomputed
+
+@receiver(post_save, sender = Book)
+@receiver(post_delete, sender = Book)
+def invalidate_recommendations(sender, **kwargs):
+    """Invalidates the cached recommendations of every club once a change to the catalogue is committed."""
+    transaction.on_commit(cache.invalidate)
+
+@receiver(post_save, sender = Rating)
+@receiver(post_delete, sender = Rating)
+def invalidate_member_recommendations(sender, instance, **kwargs):
+    """Invalidates the cached recommendations of the clubs of a user once a change to their ratings is committed."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: cache.invalidate_clubs(
+        Membership.objects.filter(member_id = user_id).values_list('club_id', flat = True)
+    ))
+
+@receiver(post_save, sender = Membership)
+@receiver(post_delete, sender = Membership)
+def invalidate_club_recommendations(sender, instance, **kwargs):
+    """Invalidates the cached recommendations of a club once a change to its members is committed."""
+    club_id = instance.club_id
+    transaction.on_commit(lambda: cache.invalidate_clubs([club_id]))
+
+@receiver(post_save, sender = Book)
+def add_to_catalogue(sender, instance, raw = False, **kwargs):
+    """Adds a saved book to the catalogue index, which is built again after loading fixtures."""
+    if raw:
+        catalogue.index.reset()
+    else:
+        book_isbn = instance.isbn
+        transaction.on_commit(lambda: catalogue.index.add(book_isbn))
+
+@receiver(post_delete, sender = Book)
+def discard_from_catalogue(sender, instance, **kwargs):
+    """Removes a deleted book from the catalogue index."""
+    book_isbn = instance.isbn
+    transaction.on_commit(lambda: catalogue.index.discard(book_isbn))
+
+@receiver(post_save, sender = Rating)
+@receiver(post_delete, sender = Rating)
+def discard_precomputed_recommendations(sender, instance, raw = False, **kwargs):
+    """Discards the precomputed recommendations of a user whose ratings change, which may include the rated book."""
+    if not raw:
+        precomputed.discard_rankings(instance.user_id)
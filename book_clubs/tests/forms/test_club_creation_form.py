@@ -46,3 +46,16 @@ class ClubCreationFormTestCase(TestCase):
         self.assertEqual(after_count, before_count+1)
         club = Club.objects.get(name="Test Club")
         self.assertEqual(club.description, "This is a test Club")
+        self.assertEqual(club.recommendation_strategy, Club.RecommendationStrategies.ROUND_ROBIN)
+
+    def test_recommendation_strategy_can_be_chosen(self):
+        self.form_input['recommendation_strategy'] = Club.RecommendationStrategies.FAIRNESS
+        form = ClubCreationForm(data=self.form_input)
+        self.assertTrue(form.is_valid())
+        club = form.save()
+        self.assertEqual(club.recommendation_strategy, Club.RecommendationStrategies.FAIRNESS)
+
+    def test_recommendation_strategy_must_be_a_choice(self):
+        self.form_input['recommendation_strategy'] = 9
+        form = ClubCreationForm(data=self.form_input)
+        self.assertFalse(form.is_valid())
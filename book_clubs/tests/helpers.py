@@ -1,10 +1,89 @@
+import os
+import tempfile
+from django.test import override_settings
 from django.urls import reverse
 
 class LogInTester:
     def _is_logged_in(self):
         return '_auth_user_id' in self.client.session.keys()
 
+class RecommenderModelTester:
+    def _serve_test_model(self, algo = None, factors = None, meta = None, **settings):
+        """
+            Saves a recommender model to a temporary directory at self.path
+            and serves it through RECOMMENDER_MODEL_PATH, and any other
+            settings given, until the test ends. The model is factors, a
+            FactorModel saved with meta, or else a surprise dump of algo,
+            which defaults to build_test_algorithm().
+        """
+        from surprise import dump
+        from book_clubs.recommender import catalogue
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        if (factors != None):
+            self.path = os.path.join(self.directory.name, 'model')
+            factors.save(self.path, meta = meta)
+        else:
+            self.path = os.path.join(self.directory.name, 'recommender_algorithm')
+            dump.dump(self.path, algo = build_test_algorithm() if (algo == None) else algo)
+
+        settings_override = override_settings(RECOMMENDER_MODEL_PATH = self.path, **settings)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        catalogue.index.reset()
+
 def reverse_with_next(url_name, next_url):
     url = reverse(url_name)
     url += f"?next={next_url}"
     return url
+
+def build_test_algorithm(ratings = None, algorithm = None):
+    """
+        Fits a small recommender algorithm on (user_id, book_isbn, rating) tuples.
+        Defaults to the ratings of the multiple_memberships_and_ratings fixture.
+    """
+    import pandas as pd
+    from surprise import Dataset, Reader, SVD
+
+    if (ratings == None):
+        from book_clubs.models import Rating
+        ratings = list(Rating.objects.all().values_list('user_id', 'book_id', 'rating'))
+
+    if (algorithm == None):
+        algorithm = SVD(n_factors = 4, n_epochs = 20, random_state = 1)
+
+    df = pd.DataFrame(ratings, columns = ['userID', 'itemID', 'rating'])
+    data = Dataset.load_from_df(df, Reader(rating_scale = (0, 10)))
+    algorithm.fit(data.build_full_trainset())
+    return algorithm
+
+def build_generated_dataset(total_users = 30, total_books = 40, density = 0.3, seed = 1):
+    """
+        Builds a surprise Dataset of random integer ratings from 0 to 10,
+        which are often tied, by user ids from 1 and book ids like 'B007'.
+        Every user and book has at least one rating.
+    """
+    import numpy as np
+    import pandas as pd
+    from surprise import Dataset, Reader
+
+    random = np.random.RandomState(seed)
+    rated = random.random_sample((total_users, total_books)) < density
+    rated[np.arange(total_users), np.arange(total_users) % total_books] = True
+    rated[np.arange(total_books) % total_users, np.arange(total_books)] = True
+    (users, books) = np.nonzero(rated)
+    ratings = random.randint(0, 11, size = len(users))
+
+    df = pd.DataFrame({'userID' : users + 1, 'itemID' : [f'B{book:03d}' for book in books.tolist()], 'rating' : ratings})
+    return Dataset.load_from_df(df, Reader(rating_scale = (0, 10)))
+
+def import_recommender_system_testing():
+    """Makes the standalone evaluation scripts of recommender_system_testing importable by their module names."""
+    import sys
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'recommender_system_testing')
+
+    if (path not in sys.path):
+        sys.path.insert(0, path)
@@ -0,0 +1,56 @@
+import datetime
+from django.test import TestCase
+from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.utils import timezone
+from book_clubs.models import Meeting, RecommendationJob
+
+class RecommendationJobModelTestCase(TestCase):
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_meetings.json']
+
+    def setUp(self):
+        Meeting.objects.filter(id__in = [1, 2]).update(deadline = timezone.now() + datetime.timedelta(days = 1))
+        self.job1 = RecommendationJob.objects.create(meeting = Meeting.objects.get(id = 1), recommendations_limit = 8)
+        self.job2 = RecommendationJob.objects.create(meeting = Meeting.objects.get(id = 2), recommendations_limit = 8)
+
+    def test_valid_recommendation_job(self):
+        self._assert_recommendation_job_is_valid(self.job1)
+
+    def test_new_job_is_pending(self):
+        self.assertEqual(self.job1.status, RecommendationJob.Statuses.PENDING)
+        self.assertEqual(self.job1.attempts, 0)
+        self.assertEqual(self.job1.max_attempts, RecommendationJob.MAX_ATTEMPTS_DEFAULT)
+        self.assertEqual(self.job1.status_label(), 'Pending')
+        self.assertTrue(self.job1.is_pending())
+
+    def test_running_job_is_pending(self):
+        self.job1.status = RecommendationJob.Statuses.RUNNING
+        self.assertTrue(self.job1.is_pending())
+
+    def test_finished_jobs_are_not_pending(self):
+        self.job1.status = RecommendationJob.Statuses.DONE
+        self.assertFalse(self.job1.is_pending())
+        self.job1.status = RecommendationJob.Statuses.FAILED
+        self.assertFalse(self.job1.is_pending())
+
+    def test_meeting_must_not_be_empty(self):
+        self.job1.meeting = None
+        self._assert_recommendation_job_is_invalid(self.job1)
+
+    def test_meeting_must_be_unique(self):
+        self.job1.meeting = self.job2.meeting
+        self._assert_recommendation_job_is_invalid(self.job1)
+
+    def test_status_must_be_a_choice(self):
+        self.job1.status = 10
+        self._assert_recommendation_job_is_invalid(self.job1)
+
+    def _assert_recommendation_job_is_valid(self, recommendation_job):
+        try:
+            recommendation_job.full_clean()
+        except (ValidationError, ObjectDoesNotExist):
+            self.fail('Test recommendation job should be valid.')
+
+    def _assert_recommendation_job_is_invalid(self, recommendation_job):
+        with self.assertRaises((ValidationError, ObjectDoesNotExist)):
+            recommendation_job.full_clean()
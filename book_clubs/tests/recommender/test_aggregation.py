@@ -0,0 +1,111 @@
+from unittest import mock
+import numpy as np
+from django.test import TestCase
+from django.utils import timezone
+from book_clubs.helpers import get_recommendations_for_club
+from book_clubs.models import Book, Club, Meeting
+from book_clubs.recommender import aggregation, batch, foldin, scoring
+from book_clubs.recommender.factors import FactorModel
+from book_clubs.tests.helpers import build_test_algorithm, RecommenderModelTester
+
+Strategies = Club.RecommendationStrategies
+
+class AggregationTestCase(TestCase, RecommenderModelTester):
+    """Tests for combining the scores of club members into group scores."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.scores = np.array([
+            [8.0, 6.0, 2.0],
+            [4.0, 6.0, 10.0]
+        ])
+        self.factors = FactorModel.from_algo(build_test_algorithm())
+        self._serve_test_model(factors = self.factors, meta = {'version' : 'v1'})
+        self.club = Club.objects.get(id = 1)
+
+    def test_average(self):
+        self.assertEqual(aggregation.aggregate(self.scores, Strategies.AVERAGE).tolist(), [6.0, 6.0, 6.0])
+
+    def test_least_misery(self):
+        self.assertEqual(aggregation.aggregate(self.scores, Strategies.LEAST_MISERY).tolist(), [4.0, 6.0, 2.0])
+
+    def test_most_pleasure(self):
+        self.assertEqual(aggregation.aggregate(self.scores, Strategies.MOST_PLEASURE).tolist(), [8.0, 6.0, 10.0])
+
+    def test_fairness_weighs_members_equally_and_favours_agreement(self):
+        scores = np.array([
+            [9.0, 8.0, 7.0],
+            [1.0, 2.0, 3.0]
+        ])
+        group_scores = aggregation.aggregate(scores, Strategies.FAIRNESS)
+        self.assertEqual(int(np.argmax(group_scores)), 1)
+        self.assertTrue(np.allclose(aggregation.aggregate(scores * 10, Strategies.FAIRNESS), group_scores))
+
+    def test_round_robin_can_not_be_aggregated(self):
+        with self.assertRaises(ValueError):
+            aggregation.aggregate(self.scores, Strategies.ROUND_ROBIN)
+
+    def test_club_is_scored_with_one_matrix_product(self):
+        member_ids = [1, 2, 3]
+
+        with mock.patch.object(scoring, 'score_vectors', wraps = scoring.score_vectors) as score_vectors:
+            (items, group_scores) = aggregation.rank_club(self.factors, member_ids, Strategies.AVERAGE, member_ratings = foldin.get_member_ratings(member_ids))
+
+        self.assertEqual(score_vectors.call_count, 1)
+        self.assertEqual(score_vectors.call_args.args[2].shape[0], 3)
+        self.assertEqual(group_scores.tolist(), sorted(group_scores.tolist(), reverse = True))
+        self.assertNotIn(self.factors.to_inner_iids(['0000000002'])[0], items)
+        self.assertEqual(len(items), self.factors.n_items - 1)
+
+    def test_group_scores_match_strategy(self):
+        member_ids = [1, 2, 3]
+        member_ratings = foldin.get_member_ratings(member_ids)
+        vectors = foldin.member_vectors(self.factors, member_ids, member_ratings)
+        scores = scoring.score_vectors(self.factors, np.array([vector.bias for vector in vectors]), np.vstack([vector.factors for vector in vectors]))
+
+        for strategy in [Strategies.AVERAGE, Strategies.LEAST_MISERY, Strategies.MOST_PLEASURE, Strategies.FAIRNESS]:
+            (items, group_scores) = aggregation.rank_club(self.factors, member_ids, strategy, k = 3, member_ratings = member_ratings)
+            self.assertEqual(len(items), 3)
+            self.assertTrue(np.allclose(group_scores, aggregation.aggregate(scores, strategy)[items]))
+
+    def test_excluded_and_candidate_items(self):
+        member_ids = [1, 2]
+        excluded_items = np.zeros(self.factors.n_items, dtype = bool)
+        excluded_items[0] = True
+        candidate_items = np.array([0, 1, 2])
+        (items, group_scores) = aggregation.rank_club(
+            self.factors, member_ids, Strategies.AVERAGE, excluded_items = excluded_items,
+            member_ratings = foldin.get_member_ratings(member_ids), candidate_items = candidate_items
+        )
+        self.assertTrue(set(items.tolist()) <= {1, 2})
+        self.assertNotIn(0, items)
+
+    def test_club_without_scorable_members(self):
+        self.assertIsNone(aggregation.rank_club(self.factors, [100], Strategies.AVERAGE))
+
+    def test_club_strategy_selects_group_recommendations(self):
+        round_robin = get_recommendations_for_club(self.club.id, 3)
+        self.club.recommendation_strategy = Strategies.LEAST_MISERY
+        self.club.save()
+        recommendations = get_recommendations_for_club(self.club.id, 3)
+        member_ids = list(self.club.members.values_list('id', flat = True))
+        (items, group_scores) = aggregation.rank_club(
+            self.factors, member_ids, Strategies.LEAST_MISERY, k = 3, member_ratings = foldin.get_member_ratings(member_ids)
+        )
+        self.assertEqual(recommendations, self.factors.item_raw_ids[items].tolist())
+        self.assertEqual(len(round_robin), 3)
+
+    def test_group_recommendations_leave_out_used_books(self):
+        self.club.recommendation_strategy = Strategies.AVERAGE
+        self.club.save()
+        used_book = Book.objects.get(isbn = get_recommendations_for_club(self.club.id, 1)[0])
+        Meeting.objects.create(club = self.club, chosen_book = used_book, deadline = timezone.now().replace(year = timezone.now().year + 1))
+        self.assertNotIn(used_book.isbn, get_recommendations_for_club(self.club.id, 100))
+
+    def test_batch_uses_club_strategy(self):
+        self.club.recommendation_strategy = Strategies.MOST_PLEASURE
+        self.club.save()
+        (version, club_recommendations, user_recommendations) = batch.recommend([self.club.id], [], 3)
+        self.assertEqual(version, 'v1')
+        self.assertEqual([book_isbn for (book_isbn, _) in club_recommendations[self.club.id]], get_recommendations_for_club(self.club.id, 3))
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import numpy as np
+from django.test import TestCase, override_settings
+from book_clubs.recommender import ann, scoring, training
+from book_clubs.recommender.ann import ItemIndex
+from book_clubs.recommender.factors import FactorModel
+from book_clubs.tests.helpers import build_test_algorithm
+
+def _random_model(n_users = 20, n_items = 2000, n_factors = 8):
+    generator = np.random.default_rng(0)
+    return FactorModel(
+        user_factors = generator.normal(0, 1, (n_users, n_factors)),
+        item_factors = generator.normal(0, 1, (n_items, n_factors)),
+        user_biases = generator.normal(0, 0.1, n_users),
+        item_biases = generator.normal(0, 0.1, n_items),
+        global_mean = 5,
+        rating_scale = (-100, 100),
+        biased = True,
+        user_raw_ids = np.arange(n_users),
+        item_raw_ids = np.array([str(i).zfill(10) for i in range(n_items)]),
+        rated_indptr = np.zeros(n_users + 1, dtype = np.int64),
+        rated_indices = np.zeros(0, dtype = np.int32)
+    )
+
+class ItemIndexTestCase(TestCase):
+    """Tests for the approximate nearest neighbour index over item factors."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.model = _random_model()
+        self.model.item_index = ItemIndex.build(self.model, n_lists = 40)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'model')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_every_item_is_in_one_list(self):
+        index = self.model.item_index
+        self.assertEqual(index.n_lists, 40)
+        self.assertEqual(index.list_indptr[-1], self.model.n_items)
+        self.assertEqual(sorted(index.list_items.tolist()), list(range(self.model.n_items)))
+
+    def test_search_returns_at_least_total_candidates(self):
+        query = ItemIndex.query_vectors(self.model.user_factors[0])[0]
+        self.assertTrue(len(self.model.item_index.search(query, 300)) >= 300)
+        self.assertEqual(len(self.model.item_index.search(query, self.model.n_items)), self.model.n_items)
+
+    def test_searching_every_item_ranks_exactly(self):
+        exact_rankings = scoring.rank_members(self.model, [0, 1, 2], k = 10)
+        approximate_rankings = scoring.rank_members(self.model, [0, 1, 2], k = 10, total_candidates = self.model.n_items)
+
+        for (exact_ranking, approximate_ranking) in zip(exact_rankings, approximate_rankings):
+            self.assertEqual(list(approximate_ranking), list(exact_ranking))
+
+    def test_recall_of_best_items(self):
+        raw_uids = list(range(self.model.n_users))
+        exact_rankings = scoring.rank_members(self.model, raw_uids, k = 10)
+        approximate_rankings = scoring.rank_members(self.model, raw_uids, k = 10, total_candidates = 400)
+        found = sum(len(set(exact) & set(approximate)) for (exact, approximate) in zip(exact_rankings, approximate_rankings))
+        self.assertTrue(found / (10 * len(raw_uids)) >= 0.8)
+
+    def test_excluded_items_are_not_retrieved(self):
+        excluded_items = np.zeros(self.model.n_items, dtype = bool)
+        best_item = scoring.rank_members(self.model, [0], k = 1)[0][0]
+        excluded_items[self.model.to_inner_iids([best_item])] = True
+        ranking = scoring.rank_members(self.model, [0], k = 10, excluded_items = excluded_items, total_candidates = 400)[0]
+        self.assertNotIn(best_item, list(ranking))
+
+    def test_index_is_saved_and_loaded_with_model(self):
+        self.model.save(self.path)
+        self.assertTrue(ItemIndex.is_saved_in(self.path))
+        loaded = FactorModel.load(self.path)
+        np.testing.assert_array_equal(loaded.item_index.list_items, self.model.item_index.list_items)
+        self.assertIsInstance(loaded.item_index.centroids, np.memmap)
+
+    def test_model_without_index_is_loaded_without_one(self):
+        FactorModel.from_algo(build_test_algorithm()).save(self.path)
+        self.assertFalse(ItemIndex.is_saved_in(self.path))
+        self.assertIsNone(FactorModel.load(self.path).item_index)
+
+    @override_settings(RECOMMENDER_ANN = {'lists' : 2, 'candidates' : 3})
+    def test_training_builds_index(self):
+        meta = training.train(self.path, 'v1')
+        self.assertEqual(meta['index_lists'], 2)
+        self.assertEqual(FactorModel.load(self.path).item_index.n_lists, 2)
+        self.assertEqual(ann.total_candidates(), 3)
+
+    @override_settings(RECOMMENDER_ANN = {'lists' : None, 'candidates' : None})
+    def test_index_is_not_used_without_candidates(self):
+        self.assertIsNone(ann.total_candidates())
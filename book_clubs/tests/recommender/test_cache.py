@@ -0,0 +1,92 @@
+import datetime
+import os
+from unittest import mock
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+from book_clubs.helpers import get_recommendations_for_club
+from book_clubs.models import Book, Club, Meeting, Membership, Rating
+from book_clubs.recommender import cache, scoring
+from book_clubs.tests.helpers import RecommenderModelTester
+
+class ClubRecommendationCacheTestCase(TestCase, RecommenderModelTester):
+    """Tests for the cache of club recommendation candidates."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        caches[cache.CACHE_ALIAS].clear()
+        self._serve_test_model()
+        self.club = Club.objects.get(id = 1)
+
+    def _assert_ranks_members(self, ranks_members):
+        with mock.patch.object(scoring, 'rank_members', wraps = scoring.rank_members) as rank_members:
+            recommendations = get_recommendations_for_club(self.club.id, 3)
+
+        self.assertEqual(rank_members.called, ranks_members)
+        return recommendations
+
+    def test_cached_request_does_not_rank_members(self):
+        recommendations = self._assert_ranks_members(True)
+        self.assertCountEqual(self._assert_ranks_members(False), recommendations)
+
+    def test_rating_change_invalidates_cache(self):
+        self._assert_ranks_members(True)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            Rating.objects.create(user_id = 1, book_id = '0000000004', rating = 10)
+
+        self._assert_ranks_members(True)
+
+    def test_rating_of_user_outside_club_keeps_cache(self):
+        self._assert_ranks_members(True)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            Rating.objects.create(user_id = 4, book_id = '0000000004', rating = 10)
+
+        self._assert_ranks_members(False)
+
+    def test_invalidating_other_club_keeps_cache(self):
+        self._assert_ranks_members(True)
+        cache.invalidate_clubs([2])
+        self._assert_ranks_members(False)
+        cache.invalidate_clubs([self.club.id])
+        self._assert_ranks_members(True)
+
+    def test_generations_are_shared_through_cache_backend(self):
+        self._assert_ranks_members(True)
+        caches[cache.CACHE_ALIAS].delete(cache.GENERATION_KEY)
+        self._assert_ranks_members(True)
+        self.assertEqual(caches[cache.CACHE_ALIAS].get(cache.GENERATION_KEY), cache.get_generations(self.club.id)[0])
+
+    def test_book_change_invalidates_cache(self):
+        self._assert_ranks_members(True)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            Book.objects.filter(isbn = '0000000007').delete()
+
+        self._assert_ranks_members(True)
+
+    def test_membership_change_invalidates_cache(self):
+        self._assert_ranks_members(True)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            Membership.objects.filter(club = self.club, member_id = 3).delete()
+
+        self._assert_ranks_members(True)
+
+    def test_used_book_change_invalidates_cache(self):
+        recommendations = self._assert_ranks_members(True)
+        Meeting.objects.create(club = self.club, chosen_book_id = recommendations[0], deadline = timezone.now() + datetime.timedelta(days = 1))
+        self.assertNotIn(recommendations[0], self._assert_ranks_members(True))
+
+    def test_model_version_change_invalidates_cache(self):
+        self._assert_ranks_members(True)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self._assert_ranks_members(True)
+
+    def test_key_does_not_depend_on_member_order(self):
+        self.assertEqual(cache.make_key(1, [1, 2], {'a', 'b'}, 'v1', 8), cache.make_key(1, [2, 1], {'b', 'a'}, 'v1', 8))
+        self.assertNotEqual(cache.make_key(1, [1, 2], set(), 'v1', 8), cache.make_key(1, [1, 2], set(), 'v2', 8))
+        self.assertNotEqual(cache.make_key(1, [1, 2], set(), 'v1', 8), cache.make_key(2, [1, 2], set(), 'v1', 8))
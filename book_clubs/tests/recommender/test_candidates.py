@@ -0,0 +1,82 @@
+from surprise import KNNBasic
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from book_clubs.helpers import get_recommendations_for_club, _rank_with_anti_test_set
+from book_clubs.recommender import candidates, registry, scoring
+from book_clubs.recommender.candidates import CandidateSet, CoRatedSource, PopularSource, RecentSource
+from book_clubs.tests.helpers import build_test_algorithm, RecommenderModelTester
+
+CANDIDATE_SOURCES = [
+    {'source' : 'book_clubs.recommender.candidates.CoRatedSource', 'limit' : 2},
+    {'source' : 'book_clubs.recommender.candidates.RecentSource', 'limit' : 2},
+]
+
+class CandidateSourcesTestCase(TestCase, RecommenderModelTester):
+    """Tests for the sources of candidate books scored for a club."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.algo = build_test_algorithm()
+        self._serve_test_model(self.algo)
+        self.model = registry.get_model()
+
+    def test_popular_source_reads_model_popularity(self):
+        self.assertEqual(PopularSource(2).generate(self.model, [1]), ['0000000002', '0000000001'])
+
+    def test_popular_source_counts_ratings_without_factors(self):
+        self.model.factors = None
+        self.assertEqual(PopularSource(2).generate(self.model, [1]), ['0000000002', '0000000001'])
+
+    def test_recent_source_without_factors(self):
+        self.model.factors = None
+        self.assertEqual(RecentSource(3).generate(self.model, [1]), ['0000000002', '0000000007', '0000000006'])
+
+    def test_co_rated_source(self):
+        self.assertEqual(CoRatedSource(5).generate(self.model, [2]), ['0000000001', '0000000003', '0000000006', '0000000007'])
+        self.assertEqual(CoRatedSource(2).generate(self.model, [1]), ['0000000004', '0000000005'])
+        self.assertEqual(CoRatedSource(5).generate(self.model, [4]), [])
+
+    def test_co_rated_source_leaves_out_books_rated_by_members(self):
+        self.assertEqual(CoRatedSource(5).generate(self.model, [1, 2]), ['0000000006', '0000000007'])
+        self.assertEqual(CoRatedSource(5).generate(self.model, [1, 2, 3]), [])
+
+    def test_candidate_set_reports_contributions(self):
+        candidate_set = CandidateSet()
+        candidate_set.add('first', ['a', 'b'])
+        candidate_set.add('second', ['b', 'c', 'd'])
+        self.assertEqual(candidate_set.book_isbns, ['a', 'b', 'c', 'd'])
+        self.assertEqual(candidate_set.contributions, {'first' : 2, 'second' : 2})
+        self.assertEqual(candidate_set.report(), ['first: 2 (50.0%)', 'second: 2 (50.0%)'])
+
+    def test_no_sources_generate_no_candidate_set(self):
+        self.assertIsNone(candidates.generate(self.model, [1, 2, 3]))
+
+    @override_settings(RECOMMENDER_CANDIDATES = CANDIDATE_SOURCES)
+    def test_generate_from_configured_sources(self):
+        self.model.factors = None
+        candidate_set = candidates.generate(self.model, [1])
+        self.assertEqual(candidate_set.book_isbns, ['0000000004', '0000000005', '0000000002', '0000000007'])
+        self.assertEqual(candidate_set.contributions, {'co_rated' : 2, 'recent' : 2})
+
+    def test_scoring_candidate_items_matches_filtered_full_ranking(self):
+        candidate_isbns = ['0000000001', '0000000004', '0000000006', '0000000007']
+        candidate_items = self.model.factors.to_inner_iids(candidate_isbns)
+        full_rankings = scoring.rank_members(self.model.factors, [1, 2, 3])
+        candidate_rankings = scoring.rank_members(self.model.factors, [1, 2, 3], candidate_items = candidate_items)
+
+        for (full_ranking, candidate_ranking) in zip(full_rankings, candidate_rankings):
+            self.assertEqual(list(candidate_ranking), [book_isbn for book_isbn in full_ranking if book_isbn in candidate_isbns])
+
+    def test_anti_test_set_ranking_of_candidate_items(self):
+        algo = build_test_algorithm(algorithm = KNNBasic(verbose = False))
+        candidate_items = [algo.trainset.to_inner_iid(book_isbn) for book_isbn in ['0000000004', '0000000006']]
+        self.assertCountEqual(_rank_with_anti_test_set(algo, 1, candidate_items), ['0000000004', '0000000006'])
+
+    @override_settings(RECOMMENDER_CANDIDATES = CANDIDATE_SOURCES)
+    def test_club_recommendations_are_drawn_from_candidates(self):
+        self.assertCountEqual(get_recommendations_for_club(1, 100), ['0000000001'])
+
+    @override_settings(RECOMMENDER_CANDIDATES = CANDIDATE_SOURCES)
+    def test_candidate_report_command(self):
+        call_command('candidate_report', 1)
@@ -0,0 +1,118 @@
+from unittest import mock
+from django.core.cache import caches
+from django.test import TestCase
+from book_clubs.models import Book
+from book_clubs.recommender import cache, catalogue
+
+class CatalogueIndexTestCase(TestCase):
+    """Tests for the catalogue index."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_books.json']
+
+    def setUp(self):
+        self.index = catalogue.index
+        self.index.reset()
+        self.book = Book.objects.first()
+        self.book_isbn = self.book.isbn
+
+    def test_index_holds_catalogue(self):
+        self.assertEqual(len(self.index), Book.objects.count())
+        self.assertTrue(self.index.contains(self.book.isbn))
+        self.assertFalse(self.index.contains('9999999999'))
+
+    def test_saved_book_is_added(self):
+        self.index.contains(self.book.isbn)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            Book.objects.create(isbn = '9999999999', name = 'name', author = 'author', year_of_publication = 2000, publisher = 'publisher')
+
+        self.assertTrue(self.index.contains('9999999999'))
+        self.assertEqual(len(self.index), Book.objects.count())
+
+    def test_deleted_book_is_discarded(self):
+        self.index.contains(self.book.isbn)
+
+        with self.captureOnCommitCallbacks(execute = True):
+            self.book.delete()
+
+        self.assertFalse(self.index.contains(self.book_isbn))
+        self.assertEqual(len(self.index), Book.objects.count())
+
+    def test_mask(self):
+        self.assertEqual(list(self.index.mask([self.book.isbn, '9999999999'])), [True, False])
+
+    def test_uncommitted_changes_are_not_indexed(self):
+        self.index.contains(self.book.isbn)
+        self.book.delete()
+        self.assertTrue(self.index.contains(self.book_isbn))
+
+    def test_changes_made_elsewhere_are_applied_at_refresh(self):
+        self.index.refresh()
+        Book.objects.filter(isbn = self.book.isbn).delete()
+        catalogue._publish(self.book.isbn, False)
+        catalogue._publish('9999999999', True)
+        self.assertTrue(self.index.contains(self.book.isbn))
+
+        with mock.patch.object(self.index, '_build', wraps = self.index._build) as build:
+            self.index.refresh()
+
+        build.assert_not_called()
+        self.assertFalse(self.index.contains(self.book.isbn))
+        self.assertTrue(self.index.contains('9999999999'))
+
+    def test_index_is_built_again_when_changes_are_missing(self):
+        self.index.refresh()
+        Book.objects.filter(isbn = self.book.isbn).delete()
+        catalogue._publish('9999999999', True)
+        catalogue._publish('9999999998', True)
+        (epoch, position) = catalogue._log_state()
+        caches[cache.CACHE_ALIAS].delete(catalogue._change_key(epoch, position - 1))
+
+        with mock.patch.object(self.index, '_build', wraps = self.index._build) as build:
+            self.index.refresh()
+
+        self.assertEqual(build.call_count, 1)
+        self.assertFalse(self.index.contains(self.book.isbn))
+
+    def test_index_is_built_again_for_a_new_change_log(self):
+        self.index.refresh()
+        Book.objects.filter(isbn = self.book.isbn).delete()
+        caches[cache.CACHE_ALIAS].delete(catalogue.LOG_KEY)
+        self.index.refresh()
+        self.assertFalse(self.index.contains(self.book.isbn))
+
+    def test_refresh_without_changes_takes_one_round_trip(self):
+        self.index.refresh()
+
+        with mock.patch.object(catalogue, '_cache', wraps = catalogue._cache) as shared_cache:
+            self.index.refresh()
+
+        self.assertEqual(shared_cache.call_count, 1)
+
+    def test_lookups_do_not_read_shared_cache(self):
+        self.index.refresh()
+
+        with mock.patch.object(catalogue, '_cache', wraps = catalogue._cache) as shared_cache:
+            self.index.contains(self.book.isbn)
+            self.index.mask([self.book.isbn, '9999999999'])
+            self.assertEqual(len(self.index), Book.objects.count())
+
+        self.assertEqual(shared_cache.call_count, 0)
+
+    def test_own_changes_are_not_applied_again(self):
+        self.index.refresh()
+
+        with self.captureOnCommitCallbacks(execute = True):
+            self.book.delete()
+
+        changes = self.index._changes
+
+        with mock.patch.object(self.index, '_build', wraps = self.index._build) as build:
+            self.index.refresh()
+
+        build.assert_not_called()
+        self.assertEqual(self.index._changes, changes)
+        self.assertFalse(self.index.contains(self.book_isbn))
+
+    def tearDown(self):
+        self.index.reset()
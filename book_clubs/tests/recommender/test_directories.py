@@ -0,0 +1,50 @@
+import os
+import tempfile
+from django.test import TestCase
+from book_clubs.recommender.directories import save_directory
+
+def _write_file(text):
+    def write(directory):
+        with open(os.path.join(directory, 'file.txt'), 'w') as text_file:
+            text_file.write(text)
+
+    return write
+
+class SaveDirectoryTestCase(TestCase):
+    """Tests for saving artifacts as directories that are renamed into place."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'artifact')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _read(self):
+        with open(os.path.join(self.path, 'file.txt')) as text_file:
+            return text_file.read()
+
+    def test_saved_directory_replaces_previous_one(self):
+        save_directory(self.path, _write_file('first'))
+        save_directory(self.path, _write_file('second'))
+        self.assertEqual(self._read(), 'second')
+        self.assertEqual(os.listdir(self.directory.name), ['artifact'])
+
+    def test_failed_write_leaves_previous_directory(self):
+        save_directory(self.path, _write_file('first'))
+
+        def fail(directory):
+            _write_file('second')(directory)
+            raise OSError('disk full')
+
+        with self.assertRaises(OSError):
+            save_directory(self.path, fail)
+
+        self.assertEqual(self._read(), 'first')
+        self.assertEqual(os.listdir(self.directory.name), ['artifact'])
+
+    def test_leftover_temporary_directory_is_replaced(self):
+        os.makedirs(os.path.join(self.directory.name, f'.artifact.{os.getpid()}.tmp', 'stale'))
+        save_directory(self.path, _write_file('first'))
+        self.assertEqual(os.listdir(self.path), ['file.txt'])
+        self.assertEqual(os.listdir(self.directory.name), ['artifact'])
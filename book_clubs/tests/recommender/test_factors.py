@@ -0,0 +1,88 @@
+import os
+import tempfile
+import numpy as np
+from surprise import dump
+from django.core.management import call_command
+from django.test import TestCase
+from book_clubs.recommender import registry, scoring
+from book_clubs.recommender.factors import FactorModel, _to_inner_ids
+from book_clubs.tests.helpers import build_test_algorithm
+
+class FactorModelArtifactTestCase(TestCase):
+    """Tests for saving and memory-mapping factor models."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'model')
+        self.model = FactorModel.from_algo(build_test_algorithm())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_saved_model_is_memory_mapped_read_only(self):
+        self.model.save(self.path, meta = {'version' : 'v1'})
+        self.assertTrue(FactorModel.is_saved_in(self.path))
+        loaded = FactorModel.load(self.path)
+
+        for name in FactorModel.ARRAYS:
+            self.assertIsInstance(getattr(loaded, name), np.memmap)
+            self.assertFalse(getattr(loaded, name).flags.writeable)
+
+        self.assertEqual(loaded.meta['version'], 'v1')
+        self.assertEqual(loaded.rating_scale, self.model.rating_scale)
+
+    def test_saving_replaces_a_saved_model_without_rewriting_its_files(self):
+        self.model.save(self.path, meta = {'version' : 'v1'})
+        loaded = FactorModel.load(self.path)
+        item_factors = np.array(loaded.item_factors)
+        other_model = FactorModel.from_algo(build_test_algorithm())
+        other_model.item_factors = other_model.item_factors + 1
+        other_model.save(self.path, meta = {'version' : 'v2'})
+
+        np.testing.assert_array_equal(loaded.item_factors, item_factors)
+        self.assertEqual(FactorModel.load(self.path).meta['version'], 'v2')
+        np.testing.assert_array_equal(FactorModel.load(self.path).item_factors, other_model.item_factors)
+        self.assertEqual(os.listdir(self.directory.name), ['model'])
+
+    def test_failed_save_leaves_saved_model(self):
+        self.model.save(self.path, meta = {'version' : 'v1'})
+
+        with self.assertRaises(TypeError):
+            self.model.save(self.path, meta = {'version' : object()})
+
+        self.assertEqual(FactorModel.load(self.path).meta['version'], 'v1')
+        self.assertEqual(os.listdir(self.directory.name), ['model'])
+
+    def test_ids_of_another_kind_are_not_truncated(self):
+        raw_ids = np.array(['1', '12', '123'])
+        order = np.argsort(raw_ids)
+        self.assertEqual(_to_inner_ids(raw_ids, order, [1234, 12, 1]).tolist(), [-1, 1, 0])
+
+    def test_ids_that_change_when_converted_are_unknown(self):
+        raw_ids = np.array([1, 12, 123])
+        order = np.argsort(raw_ids)
+        self.assertEqual(_to_inner_ids(raw_ids, order, ['12', '012', 'abc']).tolist(), [1, -1, -1])
+        self.assertEqual(_to_inner_ids(raw_ids, order, [12.0, 1.5]).tolist(), [1, -1])
+
+    def test_saved_model_ranks_like_original(self):
+        self.model.save(self.path)
+        loaded = FactorModel.load(self.path)
+        np.testing.assert_array_equal(loaded.to_inner_uids([1, 2, 3, 4]), self.model.to_inner_uids([1, 2, 3, 4]))
+
+        for (ranking, loaded_ranking) in zip(scoring.rank_members(self.model, [1, 2, 3]), scoring.rank_members(loaded, [1, 2, 3])):
+            np.testing.assert_array_equal(ranking, loaded_ranking)
+
+    def test_registry_loads_directory(self):
+        self.model.save(self.path, meta = {'version' : 'v1'})
+        model = registry.ModelRegistry(self.path).get()
+        self.assertIsNone(model.algo)
+        self.assertEqual(model.version, 'v1')
+        self.assertIsInstance(model.factors.item_factors, np.memmap)
+
+    def test_export_command(self):
+        source = os.path.join(self.directory.name, 'recommender_algorithm')
+        dump.dump(source, algo = build_test_algorithm())
+        call_command('export_recommender', source, self.path, model_version = 'v2')
+        self.assertEqual(FactorModel.load(self.path).meta['version'], 'v2')
@@ -0,0 +1,62 @@
+import numpy as np
+from django.test import TestCase
+from book_clubs.models import Rating
+from book_clubs.recommender import foldin, scoring
+from book_clubs.recommender.factors import FactorModel
+from book_clubs.tests.helpers import build_test_algorithm
+
+class FoldInTestCase(TestCase):
+    """Tests for folding in users that are new to the recommender model."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.model = FactorModel.from_algo(build_test_algorithm())
+
+    def test_get_member_ratings(self):
+        member_ratings = foldin.get_member_ratings([1, 4])
+        self.assertCountEqual(member_ratings[1], [('0000000001', 9), ('0000000002', 8), ('0000000003', 2)])
+        self.assertEqual(member_ratings[4], [])
+
+    def test_fold_in_fits_ratings(self):
+        rated_items = self.model.to_inner_iids(['0000000001', '0000000003'])
+        (bias, factors) = foldin.fold_in(self.model, rated_items, [10, 0])
+        scores = scoring.score_vectors(self.model, np.array([bias]), factors[np.newaxis, :])[0]
+        self.assertTrue(scores[rated_items[0]] > scores[rated_items[1]])
+
+    def test_new_user_is_folded_in(self):
+        Rating.objects.create(user_id = 4, book_id = '0000000001', rating = 10)
+        Rating.objects.create(user_id = 4, book_id = '0000000005', rating = 1)
+        ranking = scoring.rank_members(self.model, [4], foldin.get_member_ratings([4]))[0]
+        self.assertEqual(len(ranking), self.model.n_items - 2)
+        self.assertNotIn('0000000001', ranking)
+        self.assertNotIn('0000000005', ranking)
+
+    def test_new_user_without_ratings_is_not_scored(self):
+        self.assertIsNone(scoring.rank_members(self.model, [4], foldin.get_member_ratings([4]))[0])
+
+    def test_ratings_of_books_unknown_to_model_are_ignored(self):
+        Rating.objects.create(user_id = 4, book_id = '0000000008', rating = 10)
+        self.assertIsNone(foldin.member_vectors(self.model, [4], foldin.get_member_ratings([4]))[0])
+
+    def test_trained_user_keeps_trained_factors(self):
+        vector = foldin.member_vectors(self.model, [1], foldin.get_member_ratings([1]))[0]
+        inner_uid = self.model.to_inner_uids([1])[0]
+        np.testing.assert_array_equal(vector.factors, self.model.user_factors[inner_uid])
+
+    def test_trained_user_with_new_rating_is_folded_in(self):
+        Rating.objects.create(user_id = 1, book_id = '0000000004', rating = 10)
+        vector = foldin.member_vectors(self.model, [1], foldin.get_member_ratings([1]))[0]
+        inner_uid = self.model.to_inner_uids([1])[0]
+        self.assertFalse(np.array_equal(vector.factors, self.model.user_factors[inner_uid]))
+        self.assertIn(self.model.to_inner_iids(['0000000004'])[0], vector.rated_items)
+        self.assertEqual(len(vector.rated_items), 4)
+
+    def test_fold_in_is_cached_until_ratings_change(self):
+        Rating.objects.create(user_id = 4, book_id = '0000000001', rating = 10)
+        first = foldin.member_vectors(self.model, [4], foldin.get_member_ratings([4]))[0]
+        second = foldin.member_vectors(self.model, [4], foldin.get_member_ratings([4]))[0]
+        self.assertIs(first.factors, second.factors)
+        Rating.objects.filter(user_id = 4).update(rating = 2)
+        third = foldin.member_vectors(self.model, [4], foldin.get_member_ratings([4]))[0]
+        self.assertIsNot(first.factors, third.factors)
@@ -0,0 +1,59 @@
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from book_clubs.helpers import get_recommendations_for_club
+from book_clubs.models import Book, Club, Meeting
+from book_clubs.recommender import catalogue
+from book_clubs.tests.helpers import build_test_algorithm, RecommenderModelTester
+
+class GetRecommendationsForClubTestCase(TestCase, RecommenderModelTester):
+    """Tests for get_recommendations_for_club."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.algo = build_test_algorithm()
+        self._serve_test_model(self.algo)
+        self.club = Club.objects.get(id = 1)
+
+    def test_recommendations_are_unique_books(self):
+        recommendations = get_recommendations_for_club(self.club.id, 4)
+        self.assertEqual(len(recommendations), 4)
+        self.assertEqual(len(set(recommendations)), 4)
+
+        for book_isbn in recommendations:
+            self.assertTrue(Book.objects.filter(isbn = book_isbn).exists())
+
+    def test_recommendations_are_limited_by_available_books(self):
+        recommendations = get_recommendations_for_club(self.club.id, 100)
+        rated_by_every_member = ['0000000002']
+        expected = [self.algo.trainset.to_raw_iid(i) for i in self.algo.trainset.all_items()]
+        expected = [book_isbn for book_isbn in expected if book_isbn not in rated_by_every_member]
+        self.assertCountEqual(recommendations, expected)
+
+    def test_used_books_are_not_recommended(self):
+        used_book = Book.objects.get(isbn = get_recommendations_for_club(self.club.id, 1)[0])
+        Meeting.objects.create(club = self.club, chosen_book = used_book, deadline = timezone.now().replace(year = timezone.now().year + 1))
+        self.assertNotIn(used_book.isbn, get_recommendations_for_club(self.club.id, 100))
+
+    def test_books_missing_from_catalogue_are_not_recommended(self):
+        book_isbn = get_recommendations_for_club(self.club.id, 1)[0]
+
+        with self.captureOnCommitCallbacks(execute = True):
+            Book.objects.filter(isbn = book_isbn).delete()
+
+        self.assertNotIn(book_isbn, get_recommendations_for_club(self.club.id, 100))
+
+    def test_catalogue_is_refreshed_once_per_request(self):
+        get_recommendations_for_club(self.club.id, 4)
+
+        with mock.patch.object(catalogue, '_cache', wraps = catalogue._cache) as shared_cache:
+            get_recommendations_for_club(self.club.id, 4)
+
+        self.assertEqual(shared_cache.call_count, 1)
+
+    def test_books_deleted_in_another_process_are_not_recommended(self):
+        book_isbn = get_recommendations_for_club(self.club.id, 1)[0]
+        Book.objects.filter(isbn = book_isbn).delete()
+        catalogue._publish(book_isbn, False)
+        self.assertNotIn(book_isbn, get_recommendations_for_club(self.club.id, 100))
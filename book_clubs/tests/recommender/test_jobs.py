@@ -0,0 +1,84 @@
+import datetime
+import os
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from book_clubs.models import Club, Meeting, MeetingRecommendation, RecommendationJob
+from book_clubs.recommender import jobs, parallel
+from book_clubs.tests.helpers import RecommenderModelTester
+
+class RecommendationJobsTestCase(TestCase, RecommenderModelTester):
+    """Tests for the meeting recommendation job queue."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self._serve_test_model()
+        self.club = Club.objects.get(id = 1)
+        self.meeting = Meeting.objects.create(club = self.club, deadline = timezone.now() + datetime.timedelta(days = 1))
+
+    def test_enqueued_job_is_pending(self):
+        job = jobs.enqueue_meeting_recommendations(self.meeting, 4)
+        self.assertEqual(job.status, RecommendationJob.Statuses.PENDING)
+        self.assertTrue(jobs.recommendations_pending(self.meeting))
+
+    def test_claim_marks_job_running(self):
+        jobs.enqueue_meeting_recommendations(self.meeting, 4)
+        job = jobs.claim_next_job()
+        self.assertEqual(job.status, RecommendationJob.Statuses.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(jobs.claim_next_job())
+        self.assertTrue(jobs.recommendations_pending(self.meeting))
+
+    def test_job_is_not_claimed_before_run_after(self):
+        job = jobs.enqueue_meeting_recommendations(self.meeting, 4)
+        RecommendationJob.objects.filter(id = job.id).update(run_after = timezone.now() + datetime.timedelta(hours = 1))
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_stale_running_job_is_claimed_again(self):
+        job = jobs.enqueue_meeting_recommendations(self.meeting, 4)
+        jobs.claim_next_job()
+        RecommendationJob.objects.filter(id = job.id).update(updated_at = timezone.now() - datetime.timedelta(seconds = jobs.RUNNING_TIMEOUT + 1))
+        self.assertEqual(jobs.claim_next_job().attempts, 2)
+
+    def test_run_job_fills_recommendations(self):
+        jobs.enqueue_meeting_recommendations(self.meeting, 4)
+        self.assertEqual(jobs.run_due_jobs(), 1)
+        job = RecommendationJob.objects.get(meeting = self.meeting)
+        self.assertEqual(job.status, RecommendationJob.Statuses.DONE)
+        self.assertEqual(MeetingRecommendation.objects.filter(meeting = self.meeting).count(), 4)
+        self.assertFalse(jobs.recommendations_pending(self.meeting))
+
+    def test_failed_job_is_retried_later(self):
+        with override_settings(RECOMMENDER_MODEL_PATH = os.path.join(self.directory.name, 'missing')):
+            jobs.enqueue_meeting_recommendations(self.meeting, 4)
+            jobs.run_due_jobs()
+
+        job = RecommendationJob.objects.get(meeting = self.meeting)
+        self.assertEqual(job.status, RecommendationJob.Statuses.PENDING)
+        self.assertTrue(job.run_after > timezone.now())
+        self.assertIn('RecommendationsUnavailable', job.last_error)
+
+    def test_job_fails_after_max_attempts(self):
+        with override_settings(RECOMMENDER_MODEL_PATH = os.path.join(self.directory.name, 'missing')):
+            job = jobs.enqueue_meeting_recommendations(self.meeting, 4)
+
+            for attempt in range(job.max_attempts):
+                RecommendationJob.objects.filter(id = job.id).update(run_after = timezone.now())
+                jobs.run_due_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, RecommendationJob.Statuses.FAILED)
+        self.assertFalse(jobs.recommendations_pending(self.meeting))
+
+    def test_worker_command_runs_due_jobs(self):
+        jobs.enqueue_meeting_recommendations(self.meeting, 2)
+        call_command('run_recommendation_worker', once = True)
+        self.assertEqual(MeetingRecommendation.objects.filter(meeting = self.meeting).count(), 2)
+
+    def test_worker_command_enables_the_worker_pool(self):
+        with mock.patch.object(parallel, 'enable') as enable:
+            call_command('run_recommendation_worker', once = True)
+
+        self.assertEqual(enable.call_args_list, [mock.call(), mock.call(False)])
@@ -0,0 +1,80 @@
+import random
+from django.test import TestCase
+from book_clubs.recommender.merge import round_robin_merge
+
+def _legacy_merge(all_recommendations, recommendations_limit):
+    """The merge loop get_recommendations_for_club used before the merge engine, starting from the first member."""
+    recommendations = []
+    all_recommendations = list(all_recommendations)
+    i = 0
+    j = [0] * len(all_recommendations)
+
+    while (len(recommendations) < recommendations_limit):
+        checks_passed = False
+
+        while (not checks_passed):
+            while (len(all_recommendations[i]) <= j[i]):
+                all_recommendations.pop(i)
+                j.pop(i)
+
+                if (len(all_recommendations) <= 0):
+                    return recommendations
+
+                if (i >= len(all_recommendations)):
+                    i = 0
+
+            checks_passed = True
+            book_isbn = all_recommendations[i][j[i]]
+
+            if (book_isbn in recommendations):
+                j[i] = j[i] + 1
+                checks_passed = False
+
+        recommendations.append(all_recommendations[i][j[i]])
+        i = i + 1
+
+        if (i >= len(all_recommendations)):
+            i = 0
+            j = [x+1 for x in j]
+
+    return recommendations
+
+def _random_candidates(total_members, depth, total_books, seed):
+    generator = random.Random(seed)
+    return [generator.sample(range(total_books), depth) for _ in range(total_members)]
+
+class RoundRobinMergeTestCase(TestCase):
+    """Tests for the round robin merge of member recommendations."""
+
+    def test_matches_legacy_merge(self):
+        for total_members in [5, 50, 500]:
+            for recommendations_limit in [1, 8, 20]:
+                candidates = _random_candidates(total_members, 2 * recommendations_limit, 60, total_members + recommendations_limit)
+                self.assertEqual(
+                    round_robin_merge(candidates, recommendations_limit),
+                    _legacy_merge(candidates, recommendations_limit)
+                )
+
+    def test_members_take_turns(self):
+        candidates = [['a', 'b'], ['c', 'd'], ['e', 'f']]
+        self.assertEqual(round_robin_merge(candidates, 4), ['a', 'c', 'e', 'b'])
+
+    def test_duplicates_are_skipped(self):
+        candidates = [['a', 'b'], ['a', 'c']]
+        self.assertEqual(round_robin_merge(candidates, 3), ['a', 'c', 'b'])
+
+    def test_excluded_books_are_skipped(self):
+        candidates = [['a', 'b'], ['c', 'd']]
+        self.assertEqual(round_robin_merge(candidates, 2, excluded = {'a'}), ['b', 'c'])
+
+    def test_start_rotates_turns(self):
+        candidates = [['a', 'b'], ['c', 'd'], ['e', 'f']]
+        self.assertEqual(round_robin_merge(candidates, 3, start = 2), ['e', 'a', 'c'])
+
+    def test_exhausted_members_stop_merge(self):
+        candidates = [['a'], ['a'], []]
+        self.assertEqual(round_robin_merge(candidates, 5), ['a'])
+
+    def test_candidates_are_compared_by_key(self):
+        candidates = [[('a', 9), ('b', 8)], [('a', 7), ('c', 6)]]
+        self.assertEqual(round_robin_merge(candidates, 3, key = lambda candidate: candidate[0]), [('a', 9), ('c', 6), ('b', 8)])
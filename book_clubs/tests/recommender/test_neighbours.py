@@ -0,0 +1,128 @@
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+from surprise import KNNBasic
+from django.test import TestCase, override_settings
+from book_clubs.helpers import get_recommendations_for_club
+from book_clubs.recommender import catalogue, foldin, neighbours, registry, training
+from book_clubs.recommender.neighbours import NeighbourModel
+from book_clubs.tests.helpers import build_test_algorithm
+
+ITEM_KNN_TRAINING = {
+    'algorithm' : 'surprise.KNNBasic',
+    'options' : {'sim_options' : {'name' : 'cosine', 'user_based' : False}, 'verbose' : False}
+}
+
+def _similarities(model):
+    """Returns the kept similarities of model as a dict from pairs of ISBNs."""
+    similarities = {}
+
+    for item in range(model.n_items):
+        for (neighbour, similarity) in zip(*model.neighbours(item)):
+            similarities[(str(model.item_raw_ids[item]), str(model.item_raw_ids[neighbour]))] = float(similarity)
+
+    return similarities
+
+class NeighbourModelTestCase(TestCase):
+    """Tests for the sparse top K neighbour lists of item-based KNN models."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.algo = build_test_algorithm(algorithm = KNNBasic(sim_options = {'name' : 'cosine', 'user_based' : False}, verbose = False))
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'model')
+        catalogue.index.reset()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_built_similarities_match_surprise(self):
+        model = NeighbourModel.build(training.load_ratings(), 10)
+        trainset = self.algo.trainset
+        expected = {
+            (trainset.to_raw_iid(i), trainset.to_raw_iid(j)) : self.algo.sim[i, j]
+            for i in trainset.all_items() for j in trainset.all_items()
+            if ((i != j) and (self.algo.sim[i, j] > 0))
+        }
+        similarities = _similarities(model)
+        self.assertCountEqual(similarities.keys(), expected.keys())
+
+        for (pair, similarity) in expected.items():
+            self.assertAlmostEqual(similarities[pair], similarity, places = 5)
+
+    def test_blocks_do_not_change_neighbours(self):
+        rating_arrays = training.load_ratings()
+        self.assertEqual(
+            _similarities(NeighbourModel.build(rating_arrays, 10, block_size = 2)),
+            _similarities(NeighbourModel.build(rating_arrays, 10))
+        )
+
+    def test_neighbours_are_cut_to_k_one_block_at_a_time(self):
+        rating_arrays = training.load_ratings()
+
+        with mock.patch.object(neighbours, '_top_neighbours', wraps = neighbours._top_neighbours) as top_neighbours:
+            model = NeighbourModel.build(rating_arrays, 1, block_size = 2)
+
+        self.assertEqual(top_neighbours.call_count, -(-model.n_items // 2))
+        self.assertTrue(all(call.args[0].shape[0] <= 2 for call in top_neighbours.call_args_list))
+        self.assertEqual(len(model.neighbour_indptr), model.n_items + 1)
+        self.assertEqual(_similarities(model), _similarities(NeighbourModel.build(rating_arrays, 1)))
+
+    def test_only_k_most_similar_neighbours_are_kept(self):
+        model = NeighbourModel.build(training.load_ratings(), 1)
+        full_model = NeighbourModel.build(training.load_ratings(), 10)
+
+        for item in range(model.n_items):
+            (indices, similarities) = model.neighbours(item)
+            (_, full_similarities) = full_model.neighbours(item)
+            self.assertTrue(len(indices) <= 1)
+
+            if (len(full_similarities) > 0):
+                self.assertAlmostEqual(similarities[0], full_similarities.max())
+
+    def test_from_algo_matches_build(self):
+        self.assertEqual(
+            _similarities(NeighbourModel.from_algo(self.algo, 10)).keys(),
+            _similarities(NeighbourModel.build(training.load_ratings(), 10)).keys()
+        )
+
+    def test_rankings_match_surprise_estimates(self):
+        model = NeighbourModel.from_algo(self.algo, 10)
+        member_ratings = foldin.get_member_ratings([1, 2, 3])
+
+        for (member_id, ranking) in zip([1, 2, 3], neighbours.rank_members(model, [1, 2, 3], member_ratings)):
+            rated = set(book_isbn for (book_isbn, _) in member_ratings[member_id])
+            self.assertFalse(rated & set(ranking))
+            estimates = [self.algo.predict(member_id, book_isbn).est for book_isbn in ranking]
+            self.assertEqual(estimates, sorted(estimates, reverse = True))
+
+    def test_member_without_ratings_has_no_ranking(self):
+        model = NeighbourModel.from_algo(self.algo, 10)
+        self.assertIsNone(neighbours.rank_members(model, [4], {})[0])
+
+    def test_saved_model_is_loaded_by_registry(self):
+        NeighbourModel.from_algo(self.algo, 10).save(self.path, meta = {'version' : 'v1'})
+        self.assertTrue(NeighbourModel.is_saved_in(self.path))
+        model = registry.get_registry(self.path).get()
+        self.assertEqual(model.version, 'v1')
+        self.assertIsNone(model.factors)
+        self.assertIsInstance(model.neighbours.neighbour_indices, np.memmap)
+        self.assertIs(model.item_model, model.neighbours)
+
+    @override_settings(RECOMMENDER_TRAINING = ITEM_KNN_TRAINING)
+    def test_training_saves_neighbour_model(self):
+        meta = training.train(self.path, 'v1')
+        self.assertTrue(meta['neighbours'] > 0)
+        self.assertTrue(NeighbourModel.is_saved_in(self.path))
+        self.assertIsNotNone(NeighbourModel.load(self.path).popularity)
+
+    def test_club_recommendations_from_neighbour_model(self):
+        NeighbourModel.from_algo(self.algo, 10).save(self.path, meta = {'version' : 'v1'})
+
+        with self.settings(RECOMMENDER_MODEL_PATH = self.path):
+            recommendations = get_recommendations_for_club(1, 3)
+            self.assertEqual(len(recommendations), 3)
+            self.assertNotIn('0000000002', recommendations)
+            self.assertEqual(len(get_recommendations_for_club(2, 3)), 3)
@@ -0,0 +1,103 @@
+import copy
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+import numpy as np
+from django.test import TestCase
+from book_clubs.recommender import foldin, parallel, registry, scoring
+from book_clubs.tests.helpers import RecommenderModelTester
+
+class ParallelScoringTestCase(TestCase, RecommenderModelTester):
+    """Tests for scoring the members of large clubs with a pool of worker processes."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self._serve_test_model(RECOMMENDER_PARALLEL = {'threshold' : 2, 'workers' : 2})
+        parallel.enable()
+        self.model = registry.get_model()
+        self.member_ids = [1, 2, 3]
+        self.member_ratings = foldin.get_member_ratings(self.member_ids)
+
+    def tearDown(self):
+        parallel.shutdown()
+        parallel.enable(False)
+
+    def test_should_parallelize_from_threshold(self):
+        self.assertFalse(parallel.should_parallelize(1))
+        self.assertTrue(parallel.should_parallelize(2))
+
+        with self.settings(RECOMMENDER_PARALLEL = {'threshold' : None, 'workers' : 2}):
+            self.assertFalse(parallel.should_parallelize(1000))
+
+        with self.settings(RECOMMENDER_PARALLEL = {'threshold' : 2, 'workers' : 1}):
+            self.assertFalse(parallel.should_parallelize(1000))
+
+    def test_processes_that_have_not_enabled_the_pool_do_not_parallelize(self):
+        parallel.enable(False)
+        self.assertFalse(parallel.should_parallelize(1000))
+
+        with mock.patch.object(parallel, '_get_pool') as get_pool:
+            parallel.rank_members(self.model, self.member_ids, self.member_ratings)
+
+        get_pool.assert_not_called()
+
+    def test_total_workers_default_to_one_less_than_cores(self):
+        with mock.patch('os.cpu_count', return_value = 4):
+            with self.settings(RECOMMENDER_PARALLEL = {'threshold' : 2, 'workers' : None}):
+                self.assertEqual(parallel.total_workers(), 3)
+
+        with mock.patch('os.cpu_count', return_value = 1):
+            with self.settings(RECOMMENDER_PARALLEL = {'threshold' : 2, 'workers' : None}):
+                self.assertEqual(parallel.total_workers(), 1)
+
+    def test_parallel_rankings_match_serial_rankings(self):
+        excluded_items = np.zeros(self.model.factors.n_items, dtype = bool)
+        excluded_items[0] = True
+        serial_rankings = scoring.rank_members(self.model.factors, self.member_ids, self.member_ratings, 3, excluded_items)
+
+        with mock.patch.object(parallel.scoring, 'rank_members', wraps = scoring.rank_members) as rank_in_process:
+            parallel_rankings = parallel.rank_members(self.model, self.member_ids, self.member_ratings, 3, excluded_items)
+
+        rank_in_process.assert_not_called()
+        self.assertIsNotNone(parallel._pool)
+        self.assertEqual([list(ranking) for ranking in parallel_rankings], [list(ranking) for ranking in serial_rankings])
+
+    def test_worker_with_other_model_version_is_stale(self):
+        with self.assertRaises(parallel.StaleModel):
+            parallel._rank_in_worker(self.path, 'other', self.member_ids, {}, None, None, None, None)
+
+    def test_members_are_ranked_in_process_if_pool_fails(self):
+        model = copy.copy(self.model)
+        model.version = 'not loaded by workers'
+
+        with self.assertLogs('book_clubs.recommender.parallel', level = 'WARNING') as logs:
+            rankings = parallel.rank_members(model, self.member_ids, self.member_ratings)
+
+        self.assertIn('does not have model version not loaded by workers', logs.output[0])
+
+        serial_rankings = scoring.rank_members(self.model.factors, self.member_ids, self.member_ratings)
+        self.assertEqual([list(ranking) for ranking in rankings], [list(ranking) for ranking in serial_rankings])
+
+    def test_broken_pool_is_logged_and_replaced(self):
+        broken_pool = mock.Mock()
+        broken_pool.submit.side_effect = BrokenProcessPool('A worker died.')
+
+        with mock.patch.object(parallel, '_get_pool', return_value = broken_pool):
+            parallel._pool = broken_pool
+
+            with self.assertLogs('book_clubs.recommender.parallel', level = 'ERROR'):
+                rankings = parallel.rank_members(self.model, self.member_ids, self.member_ratings)
+
+        serial_rankings = scoring.rank_members(self.model.factors, self.member_ids, self.member_ratings)
+        self.assertEqual([list(ranking) for ranking in rankings], [list(ranking) for ranking in serial_rankings])
+        self.assertIsNone(parallel._pool)
+        broken_pool.shutdown.assert_called_once_with(wait = False)
+
+    def test_split(self):
+        self.assertEqual(parallel._split([1, 2, 3, 4, 5], 2), [[1, 2, 3], [4, 5]])
+        self.assertEqual(parallel._split([1], 4), [[1]])
+
+    def test_unscored_members_have_no_ranking(self):
+        rankings = parallel.rank_members(self.model, [4, 1], {})
+        self.assertIsNone(rankings[0])
+        self.assertTrue(len(rankings[1]) > 0)
@@ -0,0 +1,70 @@
+import os
+import numpy as np
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from book_clubs.helpers import get_recommendations_for_club
+from book_clubs.models import Book, Club, Meeting
+from book_clubs.recommender import training
+from book_clubs.recommender.factors import FactorModel
+from book_clubs.recommender.popularity import PopularityRankings
+from book_clubs.tests.helpers import RecommenderModelTester
+
+class PopularityRankingsTestCase(TestCase):
+    """Tests for building the popularity fallback rankings."""
+
+    def test_rankings(self):
+        items = [0, 0, 0, 1, 2, 2]
+        ratings = [2, 2, 2, 10, 9, 9]
+        rankings = PopularityRankings.build(4, items, ratings, rating_order = [1, 2, 3, 6, 4, 5], prior_weight = 0, half_life = 1)
+        self.assertEqual(rankings.popular.tolist(), [0, 2, 1, 3])
+        self.assertEqual(rankings.bayesian.tolist(), [1, 2, 0, 3])
+        self.assertEqual(rankings.recent.tolist(), [1, 2, 0, 3])
+
+    def test_prior_weight_shrinks_items_with_few_ratings(self):
+        rankings = PopularityRankings.build(3, [0, 1, 1, 1, 2, 2, 2, 2], [10, 9, 9, 9, 1, 1, 1, 1], prior_weight = 4)
+        self.assertEqual(rankings.bayesian.tolist(), [1, 0, 2])
+
+    def test_without_rating_order_recent_matches_popular(self):
+        rankings = PopularityRankings.build(3, [2, 2, 1], [5, 5, 5])
+        self.assertEqual(rankings.recent.tolist(), rankings.popular.tolist())
+
+    def test_unknown_ranking(self):
+        with self.assertRaises(ValueError):
+            PopularityRankings.build(1, [0], [5]).ranking('unknown')
+
+class PopularityFallbackTestCase(TestCase, RecommenderModelTester):
+    """Tests for recommending from the popularity fallback to members the model can not score."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self._serve_test_model()
+
+    def test_unknown_members_are_recommended_by_bayesian_average(self):
+        self.assertEqual(get_recommendations_for_club(2, 3), ['0000000007', '0000000004', '0000000006'])
+
+    @override_settings(RECOMMENDER_FALLBACK = {'ranking' : 'popular', 'half_life' : 10000})
+    def test_unknown_members_are_recommended_by_popularity(self):
+        self.assertEqual(get_recommendations_for_club(2, 2), ['0000000002', '0000000001'])
+
+    def test_club_without_members_is_recommended_from_fallback(self):
+        club = Club.objects.create(name = 'Empty club', description = 'No members.')
+        self.assertEqual(get_recommendations_for_club(club.id, 2), ['0000000007', '0000000004'])
+
+    def test_fallback_skips_used_and_missing_books(self):
+        club = Club.objects.get(id = 2)
+        Meeting.objects.create(club = club, chosen_book = Book.objects.get(isbn = '0000000007'), deadline = timezone.now().replace(year = timezone.now().year + 1))
+
+        with self.captureOnCommitCallbacks(execute = True):
+            Book.objects.filter(isbn = '0000000004').delete()
+
+        self.assertEqual(get_recommendations_for_club(club.id, 2), ['0000000006', '0000000001'])
+
+    def test_trained_model_saves_recency_weighted_rankings(self):
+        path = os.path.join(self.directory.name, 'model')
+        training.train(path, 'v1')
+        self.assertTrue(PopularityRankings.is_saved_in(path))
+        model = FactorModel.load(path)
+        self.assertIsInstance(model.popularity.recent, np.memmap)
+        self.assertEqual(str(model.item_raw_ids[model.popularity.recent[0]]), '0000000002')
+        self.assertEqual(str(model.item_raw_ids[model.popularity.bayesian[0]]), '0000000007')
@@ -0,0 +1,63 @@
+from django.core.management import call_command
+from django.test import TestCase
+from book_clubs.helpers import get_recommendations_for_club, _get_club_candidates
+from book_clubs.models import Book, Rating, UserRecommendation
+from book_clubs.recommender import precomputed, registry
+from book_clubs.tests.helpers import RecommenderModelTester
+
+class PrecomputedRecommendationsTestCase(TestCase, RecommenderModelTester):
+    """Tests for precomputed user recommendations."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self._serve_test_model()
+        self.model = registry.get_model()
+
+    def test_precompute_stores_ranked_unrated_books(self):
+        total_users = precomputed.precompute(self.model, 3)
+        self.assertEqual(total_users, 3)
+
+        for user_id in [1, 2, 3]:
+            user_recommendations = list(UserRecommendation.objects.filter(user_id = user_id))
+            self.assertEqual([user_recommendation.rank for user_recommendation in user_recommendations], [1, 2, 3])
+            scores = [user_recommendation.score for user_recommendation in user_recommendations]
+            self.assertEqual(scores, sorted(scores, reverse = True))
+            rated = Rating.objects.filter(user_id = user_id).values_list('book_id', flat = True)
+
+            for user_recommendation in user_recommendations:
+                self.assertNotIn(user_recommendation.book_id, rated)
+                self.assertEqual(user_recommendation.model_version, self.model.version)
+
+    def test_precompute_skips_users_unknown_to_model(self):
+        precomputed.precompute(self.model, 3)
+        self.assertFalse(UserRecommendation.objects.filter(user_id = 4).exists())
+
+    def test_precompute_replaces_previous_rows(self):
+        precomputed.precompute(self.model, 3)
+        precomputed.precompute(self.model, 2)
+        self.assertEqual(UserRecommendation.objects.count(), 6)
+
+    def test_get_rankings_uses_model_version(self):
+        precomputed.precompute(self.model, 3)
+        self.assertEqual(set(precomputed.get_rankings([1, 2, 4], self.model.version).keys()), {1, 2})
+        self.assertEqual(precomputed.get_rankings([1, 2], 'other'), {})
+
+    def test_club_recommendations_are_merged_from_precomputed_rankings(self):
+        precomputed.precompute(self.model, 2)
+        rankings = precomputed.get_rankings([1, 2, 3], self.model.version)
+        recommendations = get_recommendations_for_club(1, 100)
+        expected = set(book_isbn for ranking in rankings.values() for book_isbn in ranking)
+        self.assertEqual(set(recommendations), expected)
+
+    def test_rating_discards_precomputed_rankings(self):
+        precomputed.precompute(self.model, 3)
+        top_book_isbn = precomputed.get_rankings([1], self.model.version)[1][0]
+        Rating.objects.create(user_id = 1, book = Book.objects.get(isbn = top_book_isbn), rating = 5)
+        self.assertEqual(set(precomputed.get_rankings([1, 2, 3], self.model.version).keys()), {2, 3})
+        (member_candidates, _, _) = _get_club_candidates(self.model, [1, 2, 3], set(), 3)
+        self.assertNotIn(top_book_isbn, member_candidates)
+
+    def test_command(self):
+        call_command('precompute_recommendations', limit = 1)
+        self.assertEqual(UserRecommendation.objects.count(), 3)
@@ -0,0 +1,114 @@
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from book_clubs.recommender import quantization, scoring
+from book_clubs.recommender.factors import FactorModel
+
+def _random_model(n_users = 50, n_items = 3000, n_factors = 16):
+    generator = np.random.default_rng(0)
+    rated_indices = np.concatenate([generator.choice(n_items, 5, replace = False) for _ in range(n_users)]).astype(np.int32)
+    return FactorModel(
+        user_factors = generator.normal(0, 0.3, (n_users, n_factors)),
+        item_factors = generator.normal(0, 0.3, (n_items, n_factors)),
+        user_biases = generator.normal(0, 0.1, n_users),
+        item_biases = generator.normal(0, 0.5, n_items),
+        global_mean = 5,
+        rating_scale = (0, 10),
+        biased = True,
+        user_raw_ids = np.arange(n_users),
+        item_raw_ids = np.array([str(i).zfill(10) for i in range(n_items)]),
+        rated_indptr = np.arange(0, 5 * n_users + 1, 5, dtype = np.int64),
+        rated_indices = rated_indices
+    )
+
+class QuantizationTestCase(TestCase):
+    """Tests for storing and scoring factors as float16 and int8."""
+
+    def setUp(self):
+        self.model = _random_model()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'model')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_int8_rows_are_scaled_to_their_largest_factor(self):
+        factors = np.array([[0.5, -1.0, 0.25], [0.0, 0.0, 0.0]])
+        (values, scales) = quantization.quantize_rows(factors, 'int8')
+        self.assertEqual(values.dtype, np.int8)
+        self.assertEqual(values[0].tolist(), [64, -127, 32])
+        self.assertEqual(values[1].tolist(), [0, 0, 0])
+        self.assertAlmostEqual(float(scales[0]), 1 / 127, places = 6)
+        self.assertEqual(float(scales[1]), 1.0)
+        dequantized = quantization.dequantize_rows(values, scales)
+        self.assertTrue(np.allclose(dequantized, factors, atol = 1 / 254 + 1e-6))
+
+    def test_unknown_dtype_is_rejected(self):
+        with self.assertRaises(ValueError):
+            quantization.quantize_rows(np.zeros((2, 2)), 'int4')
+
+    def test_float64_factors_are_not_copied(self):
+        self.assertIs(quantization.dequantize_rows(self.model.item_factors, None), self.model.item_factors)
+
+    def test_factor_product_dequantizes_in_blocks(self):
+        (values, scales) = quantization.quantize_rows(self.model.item_factors, 'int8')
+        user_factors = self.model.user_factors[:3]
+        expected = user_factors @ quantization.dequantize_rows(values, scales).T
+        rows = np.array([5, 2999, 17, 1000])
+
+        with mock.patch.object(quantization, 'BLOCK_SIZE', 7):
+            self.assertTrue(np.allclose(quantization.factor_product(user_factors, values, scales), expected))
+            self.assertTrue(np.allclose(quantization.factor_product(user_factors, values, scales, rows), expected[:, rows]))
+
+    def test_quantized_factors_take_less_memory(self):
+        self.assertEqual(self.model.factor_dtype, 'float64')
+        float16 = self.model.quantize('float16')
+        int8 = self.model.quantize('int8')
+        self.assertEqual(float16.factor_dtype, 'float16')
+        self.assertEqual(int8.factor_dtype, 'int8')
+        self.assertEqual(self.model.factor_nbytes / float16.factor_nbytes, 4)
+        self.assertTrue(self.model.factor_nbytes / int8.factor_nbytes > 6)
+
+    def test_quantized_rankings_barely_change(self):
+        inner_uids = np.arange(self.model.n_users)
+
+        for dtype in ['float16', 'int8']:
+            report = quantization.compare_rankings(self.model, self.model.quantize(dtype), 10, inner_uids, chunk_size = 16)
+            self.assertEqual(report['users'], self.model.n_users)
+            self.assertTrue(report['mean_overlap'] >= 0.9)
+            self.assertTrue(report['max_error'] < 0.1)
+
+    def test_quantized_model_ranks_members(self):
+        quantized = self.model.quantize('int8')
+        raw_uids = [0, 1, 2]
+        rankings = scoring.rank_members(self.model, raw_uids, k = 10)
+        quantized_rankings = scoring.rank_members(quantized, raw_uids, k = 10)
+
+        for (ranking, quantized_ranking) in zip(rankings, quantized_rankings):
+            self.assertEqual(len(quantized_ranking), 10)
+            self.assertTrue(len(np.intersect1d(ranking, quantized_ranking)) >= 8)
+
+    def test_quantized_model_is_saved_and_loaded(self):
+        self.model.quantize('int8').save(self.path)
+        loaded = FactorModel.load(self.path)
+        self.assertEqual(loaded.factor_dtype, 'int8')
+        self.assertEqual(loaded.meta['factor_dtype'], 'int8')
+        self.assertTrue(np.allclose(loaded.item_vectors(), self.model.quantize('int8').item_vectors()))
+        self.model.save(self.path)
+        loaded = FactorModel.load(self.path)
+        self.assertEqual(loaded.factor_dtype, 'float64')
+        self.assertIsNone(loaded.item_scales)
+
+    def test_report_command(self):
+        self.model.save(self.path)
+
+        with mock.patch('builtins.print') as mocked_print:
+            call_command('quantization_report', '--path', self.path, '--users', '20')
+
+        lines = [call.args[0] for call in mocked_print.call_args_list]
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('float16: '))
+        self.assertTrue(lines[2].startswith('int8: '))
@@ -0,0 +1,139 @@
+import csv
+import os
+import tempfile
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from book_clubs.models import Rating
+from book_clubs.recommender.factors import FactorModel
+from book_clubs.recommender.rating_matrix import RatingMatrix
+
+CSV_RATINGS = [
+    ('1', 'A', '5'), ('1', 'B', '0'), ('2', 'X', '7'), ('2', 'A', '3'), ('3', 'C', '9'),
+    ('3', 'B', '1'), ('4', 'X', '2'), ('4', 'C', '8'), ('5', 'A', '6'), ('5', 'B', '4'),
+]
+
+def _data_handler_rows(every_nth, book_ids):
+    """The rows the evaluation DataHandler loads, selected with its own loop."""
+    rows = []
+    i = 0
+
+    for row in CSV_RATINGS:
+        i = i + 1
+
+        if (((every_nth <= 0) or (i >= every_nth)) and (row[1] in book_ids)):
+            rows.append((int(row[0]), row[1], int(row[2])))
+            i = 0
+
+    return rows
+
+def _is_memory_mapped(array):
+    """Checks if array is a memory-mapped array, or a view of one."""
+    while (array is not None):
+        if isinstance(array, np.memmap):
+            return True
+
+        array = getattr(array, 'base', None)
+
+    return False
+
+class RatingMatrixTestCase(TestCase):
+    """Tests for the shared sparse rating matrix."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ratings_path = os.path.join(self.directory.name, 'ratings.csv')
+        self.books_path = os.path.join(self.directory.name, 'books.csv')
+
+        with open(self.ratings_path, 'w', newline = '', encoding = 'Windows-1252') as csv_file:
+            writer = csv.writer(csv_file, delimiter = ';', quoting = csv.QUOTE_ALL)
+            writer.writerow(['User-ID', 'ISBN', 'Book-Rating'])
+            writer.writerows(CSV_RATINGS)
+
+        with open(self.books_path, 'w', newline = '', encoding = 'Windows-1252') as csv_file:
+            writer = csv.writer(csv_file, delimiter = ';', quoting = csv.QUOTE_ALL)
+            writer.writerow(['ISBN', 'Book-Title'])
+            writer.writerows([('A', 'Book A'), ('B', 'Book; B'), ('C', 'Book "C"')])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _rows(self, rating_matrix):
+        dataframe = rating_matrix.to_dataframe()
+        return list(zip(dataframe['userID'].tolist(), dataframe['itemID'].tolist(), dataframe['rating'].astype(int).tolist()))
+
+    def test_from_database(self):
+        rating_matrix = RatingMatrix.from_database(chunk_size = 3)
+        self.assertEqual(len(rating_matrix), Rating.objects.count())
+        self.assertCountEqual(self._rows(rating_matrix), Rating.objects.values_list('user_id', 'book_id', 'rating'))
+        (book_isbns, ratings) = rating_matrix.user_ratings(3)
+        self.assertEqual(dict(zip(book_isbns.tolist(), ratings.tolist())), {'0000000001' : 6, '0000000006' : 8, '0000000007' : 10, '0000000002' : 4})
+        self.assertEqual(len(rating_matrix.user_ratings(4)[0]), 0)
+
+    def test_from_arrays_keeps_last_rating_and_zero_ratings(self):
+        rating_matrix = RatingMatrix.from_arrays([1, 1, 2], ['a', 'a', 'b'], [5, 7, 0])
+        self.assertEqual(len(rating_matrix), 2)
+        self.assertEqual(rating_matrix.user_ratings(1)[1].tolist(), [7])
+        self.assertEqual(rating_matrix.user_ratings(2)[1].tolist(), [0])
+        self.assertEqual(rating_matrix.csc.getcol(1).nnz, 1)
+
+    def test_from_csv_selects_rows_like_data_handler(self):
+        book_ids = {'A', 'B', 'C'}
+
+        for every_nth in [0, 1, 2, 3, 5, 20]:
+            rating_matrix = RatingMatrix.from_csv(self.ratings_path, self.books_path, every_nth)
+            self.assertEqual(self._rows(rating_matrix), _data_handler_rows(every_nth, book_ids))
+
+    def test_from_csv_without_books_keeps_every_row(self):
+        rating_matrix = RatingMatrix.from_csv(self.ratings_path)
+        self.assertEqual(len(rating_matrix), len(CSV_RATINGS))
+
+    def test_user_ratings_in_source_order(self):
+        rating_matrix = RatingMatrix.from_arrays([1, 1, 1], ['c', 'a', 'b'], [5, 7, 0])
+        self.assertEqual(rating_matrix.user_ratings(1)[0].tolist(), ['a', 'b', 'c'])
+        (book_isbns, ratings) = rating_matrix.user_ratings(1, source_order = True)
+        self.assertEqual(book_isbns.tolist(), ['c', 'a', 'b'])
+        self.assertEqual(ratings.tolist(), [5, 7, 0])
+
+    def test_saved_matrix_is_loaded_unchanged(self):
+        path = os.path.join(self.directory.name, 'ratings')
+        rating_matrix = RatingMatrix.from_csv(self.ratings_path, self.books_path)
+        rating_matrix.save(path)
+        loaded = RatingMatrix.load(path)
+        self.assertEqual(self._rows(loaded), self._rows(rating_matrix))
+        np.testing.assert_array_equal(loaded.order, rating_matrix.order)
+
+    def test_saved_matrix_is_memory_mapped(self):
+        path = os.path.join(self.directory.name, 'ratings')
+        RatingMatrix.from_database().save(path)
+        loaded = RatingMatrix.load(path)
+
+        for array in [loaded.user_raw_ids, loaded.item_raw_ids, loaded.order, loaded.ratings.data, loaded.ratings.indices, loaded.ratings.indptr]:
+            self.assertTrue(_is_memory_mapped(array))
+
+        self.assertEqual(len(RatingMatrix.load(path, mmap_mode = None)), Rating.objects.count())
+
+    def test_saving_replaces_a_saved_matrix(self):
+        path = os.path.join(self.directory.name, 'ratings')
+        RatingMatrix.from_csv(self.ratings_path).save(path)
+        loaded = RatingMatrix.load(path)
+        RatingMatrix.from_database().save(path)
+        self.assertEqual(len(RatingMatrix.load(path)), Rating.objects.count())
+        self.assertEqual(len(loaded.to_dataframe()), len(CSV_RATINGS))
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['books.csv', 'ratings', 'ratings.csv'])
+
+    def test_training_on_saved_matrix(self):
+        path = os.path.join(self.directory.name, 'ratings')
+        model_path = os.path.join(self.directory.name, 'model')
+        call_command('export_ratings', path)
+        call_command('train_recommender', output = model_path, model_version = 'v1', ratings = path)
+        model = FactorModel.load(model_path)
+        self.assertEqual(model.meta['ratings'], Rating.objects.count())
+        self.assertEqual(str(model.item_raw_ids[model.popularity.recent[0]]), '0000000002')
+
+    def test_export_ratings_from_csv(self):
+        path = os.path.join(self.directory.name, 'ratings')
+        call_command('export_ratings', path, csv = self.ratings_path, books = self.books_path, every_nth = 2)
+        self.assertEqual(self._rows(RatingMatrix.load(path)), _data_handler_rows(2, {'A', 'B', 'C'}))
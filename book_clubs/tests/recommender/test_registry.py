@@ -0,0 +1,74 @@
+import os
+import tempfile
+from unittest import mock
+from surprise import dump
+from django.test import TestCase, override_settings
+from book_clubs.recommender import registry
+from book_clubs.tests.helpers import build_test_algorithm
+
+class ModelRegistryTestCase(TestCase):
+    """Tests for the recommender model registry."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'recommender_algorithm')
+        dump.dump(self.path, algo = build_test_algorithm())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_model_is_loaded_once(self):
+        model_registry = registry.ModelRegistry(self.path)
+        model = model_registry.get()
+        self.assertIsNotNone(model)
+        self.assertIs(model_registry.get(), model)
+
+    def test_model_is_reloaded_when_artifact_changes(self):
+        model_registry = registry.ModelRegistry(self.path)
+        model = model_registry.get()
+        dump.dump(self.path, algo = build_test_algorithm())
+        stat = os.stat(self.path)
+        os.utime(self.path, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        new_model = model_registry.get()
+        self.assertIsNot(new_model, model)
+        self.assertNotEqual(new_model.version, model.version)
+
+    def test_missing_artifact_returns_none(self):
+        model_registry = registry.ModelRegistry(os.path.join(self.directory.name, 'missing'))
+        self.assertIsNone(model_registry.get())
+
+    def test_unreadable_artifact_keeps_previous_model(self):
+        model_registry = registry.ModelRegistry(self.path)
+        model = model_registry.get()
+
+        with open(self.path, 'wb') as artifact:
+            artifact.write(b'partial')
+
+        with self.assertLogs('book_clubs.recommender.registry', level = 'ERROR'):
+            self.assertIs(model_registry.get(), model)
+
+    def test_failed_artifact_is_only_loaded_again_once_it_changes(self):
+        with open(self.path, 'wb') as artifact:
+            artifact.write(b'partial')
+
+        model_registry = registry.ModelRegistry(self.path)
+
+        with mock.patch.object(registry, 'load_artifact', wraps = registry.load_artifact) as load_artifact:
+            with self.assertLogs('book_clubs.recommender.registry', level = 'ERROR'):
+                self.assertIsNone(model_registry.get())
+
+            self.assertIsNone(model_registry.get())
+            self.assertEqual(load_artifact.call_count, 1)
+            dump.dump(self.path, algo = build_test_algorithm())
+            stat = os.stat(self.path)
+            os.utime(self.path, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+            self.assertIsNotNone(model_registry.get())
+            self.assertEqual(load_artifact.call_count, 2)
+
+    def test_get_model_uses_settings_path(self):
+        with override_settings(RECOMMENDER_MODEL_PATH = self.path):
+            model = registry.get_model()
+            self.assertIsNotNone(model)
+            self.assertIs(registry.get_model(), model)
@@ -0,0 +1,79 @@
+import numpy as np
+from django.test import TestCase
+from surprise import KNNBasic
+from book_clubs.helpers import _get_anti_test_set_for_user, _rank_with_anti_test_set
+from book_clubs.recommender import scoring
+from book_clubs.recommender.factors import FactorModel
+from book_clubs.tests.helpers import build_test_algorithm
+
+class ScoringTestCase(TestCase):
+    """Tests for the vectorized scoring of SVD models."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.algo = build_test_algorithm()
+        self.model = FactorModel.from_algo(self.algo)
+
+    def test_supports_svd_only(self):
+        self.assertTrue(FactorModel.supports(self.algo))
+        self.assertFalse(FactorModel.supports(build_test_algorithm(algorithm = KNNBasic(verbose = False))))
+
+    def test_unknown_users_have_inner_id_of_minus_one(self):
+        inner_uids = self.model.to_inner_uids([1, 4, 3])
+        self.assertEqual(inner_uids[1], -1)
+        self.assertEqual(self.algo.trainset.to_raw_uid(int(inner_uids[0])), 1)
+        self.assertEqual(self.algo.trainset.to_raw_uid(int(inner_uids[2])), 3)
+
+    def test_scores_match_predictions(self):
+        for member_id in [1, 2, 3]:
+            inner_uid = self.model.to_inner_uids([member_id])
+            scores = scoring.score_users(self.model, inner_uid)[0]
+
+            for (_, book_isbn, _, estimated_rating, _) in self.algo.test(_get_anti_test_set_for_user(self.algo.trainset, member_id)):
+                inner_iid = self.algo.trainset.to_inner_iid(book_isbn)
+                self.assertAlmostEqual(scores[inner_iid], estimated_rating)
+
+    def test_rankings_exclude_rated_items(self):
+        rankings = scoring.rank_members(self.model, [1, 2, 3])
+
+        for (member_id, ranking) in zip([1, 2, 3], rankings):
+            inner_uid = self.algo.trainset.to_inner_uid(member_id)
+            rated = set(self.algo.trainset.to_raw_iid(j) for (j, _) in self.algo.trainset.ur[inner_uid])
+            self.assertFalse(rated & set(ranking))
+            self.assertEqual(len(ranking), self.algo.trainset.n_items - len(rated))
+
+    def test_rankings_match_anti_test_set_rankings(self):
+        rankings = scoring.rank_members(self.model, [1, 2, 3])
+
+        for (member_id, ranking) in zip([1, 2, 3], rankings):
+            self.assertEqual(list(ranking), _rank_with_anti_test_set(self.algo, member_id))
+
+    def test_unknown_member_has_no_ranking(self):
+        rankings = scoring.rank_members(self.model, [4, 1])
+        self.assertIsNone(rankings[0])
+        self.assertTrue(len(rankings[1]) > 0)
+
+    def test_top_k_rankings_are_prefixes_of_full_rankings(self):
+        full_rankings = scoring.rank_members(self.model, [1, 2, 3])
+        top_rankings = scoring.rank_members(self.model, [1, 2, 3], k = 2)
+
+        for (full_ranking, top_ranking) in zip(full_rankings, top_rankings):
+            self.assertEqual(list(top_ranking), list(full_ranking[:2]))
+
+    def test_rankings_leave_out_excluded_items(self):
+        excluded_items = np.zeros(self.model.n_items, dtype = bool)
+        excluded_items[self.model.to_inner_iids(['0000000008'])] = True
+        rankings = scoring.rank_members(self.model, [1, 2, 3], excluded_items = excluded_items)
+
+        for ranking in rankings:
+            self.assertNotIn('0000000008', list(ranking))
+
+    def test_top_items_keep_ties_in_index_order(self):
+        scores = np.array([[1.0, 3.0, 2.0, 2.0, 2.0, 2.0, 0.0, 2.0, -np.inf]])
+
+        for k in range(1, 10):
+            expected = [1, 2, 3, 4, 5, 7, 0, 6][:k]
+            self.assertEqual(scoring.top_items(scores, k)[0].tolist(), expected)
+
+        self.assertEqual(scoring.top_items(np.full((1, 50), 1.0), 5)[0].tolist(), [0, 1, 2, 3, 4])
@@ -0,0 +1,157 @@
+import os
+import tempfile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from book_clubs.recommender import registry
+from book_clubs.recommender.factors import FactorModel
+from book_clubs.recommender.store import ModelStore, StoreError
+from book_clubs.tests.helpers import build_test_algorithm
+
+class ModelStoreTestCase(TestCase):
+    """Tests for the versioned model store and swapping its current model."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ModelStore(self.directory.name)
+        factors = FactorModel.from_algo(build_test_algorithm())
+
+        for version in ['v1', 'v2']:
+            factors.save(self.store.version_path(version), meta = {'version' : version})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_empty_store_has_no_current_version(self):
+        self.assertIsNone(self.store.current())
+        self.assertFalse(ModelStore.is_store(self.directory.name))
+        self.assertEqual(self.store.versions(), ['v1', 'v2'])
+
+    def test_publish_makes_version_current(self):
+        self.store.publish('v1')
+        self.assertTrue(ModelStore.is_store(self.directory.name))
+        self.assertEqual(self.store.current(), 'v1')
+        manifest = self.store.manifest()
+        self.assertEqual(manifest['history'], ['v1'])
+        self.assertEqual(manifest['versions']['v1']['meta'], {'version' : 'v1'})
+
+    def test_publish_leaves_no_temporary_files(self):
+        self.store.publish('v1')
+        self.store.publish('v2')
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['CURRENT', 'manifest.json', 'v1', 'v2'])
+
+    def test_incomplete_version_can_not_be_published(self):
+        os.makedirs(self.store.version_path('v3'))
+
+        with self.assertRaises(StoreError):
+            self.store.publish('v3')
+
+        with self.assertRaises(StoreError):
+            self.store.publish('../v1')
+
+        self.assertIsNone(self.store.current())
+
+    def test_publishing_the_current_version_leaves_history_unchanged(self):
+        self.store.publish('v1')
+        self.store.publish('v2')
+        self.store.publish('v2')
+        self.assertEqual(self.store.manifest()['history'], ['v1', 'v2'])
+        self.assertEqual(self.store.rollback(), 'v1')
+
+    def test_rollback_to_previous_version(self):
+        self.store.publish('v1')
+        self.store.publish('v2')
+        self.assertEqual(self.store.rollback(), 'v1')
+        self.assertEqual(self.store.current(), 'v1')
+
+        with self.assertRaises(StoreError):
+            self.store.rollback()
+
+    def test_rollback_to_given_version(self):
+        self.store.publish('v1')
+        self.store.publish('v2')
+        self.assertEqual(self.store.rollback('v1'), 'v1')
+        self.assertEqual(self.store.rollback(), 'v2')
+
+        with self.assertRaises(StoreError):
+            self.store.rollback('v3')
+
+    def test_rolling_back_to_the_current_version_leaves_history_unchanged(self):
+        self.store.publish('v1')
+        self.store.publish('v2')
+        self.assertEqual(self.store.rollback('v2'), 'v2')
+        self.assertEqual(self.store.manifest()['history'], ['v1', 'v2'])
+        self.assertEqual(self.store.rollback(), 'v1')
+
+    def test_registry_swaps_to_published_version(self):
+        model_registry = registry.ModelRegistry(self.directory.name)
+        self.assertIsNone(model_registry.get())
+        self.store.publish('v1')
+        model = model_registry.get()
+        self.assertEqual(model.version, 'v1')
+        self.assertIs(model_registry.get(), model)
+        self.store.publish('v2')
+        self.assertEqual(model_registry.get().version, 'v2')
+        self.store.rollback()
+        self.assertEqual(model_registry.get().version, 'v1')
+
+    def test_registry_serves_fallback_until_a_version_is_published(self):
+        fallback_path = os.path.join(self.directory.name, 'v1')
+        model_registry = registry.ModelRegistry(self.directory.name, fallback_path)
+        self.assertEqual(model_registry.get().version, 'v1')
+        self.store.publish('v2')
+        self.assertEqual(model_registry.get().version, 'v2')
+
+    def test_registry_falls_back_for_default_path_only(self):
+        fallback_path = os.path.join(self.directory.name, 'v1')
+
+        with override_settings(RECOMMENDER_MODEL_PATH = self.directory.name, RECOMMENDER_FALLBACK_MODEL_PATH = fallback_path):
+            self.assertEqual(registry.get_model().version, 'v1')
+            self.assertIsNone(registry.get_registry(self.store.version_path('v3')).fallback_path)
+
+    def test_saved_artifact_is_served_over_fallback(self):
+        model_registry = registry.ModelRegistry(self.store.version_path('v2'), self.store.version_path('v1'))
+        self.assertEqual(model_registry.get().version, 'v2')
+
+    def test_registry_keeps_model_when_published_version_can_not_be_loaded(self):
+        model_registry = registry.ModelRegistry(self.directory.name)
+        self.store.publish('v1')
+        model = model_registry.get()
+        self.store.publish('v2')
+        os.remove(os.path.join(self.store.version_path('v2'), 'item_factors.npy'))
+
+        with self.assertLogs('book_clubs.recommender.registry', level = 'ERROR'):
+            self.assertIs(model_registry.get(), model)
+
+    def test_registry_serves_previous_model_while_loading(self):
+        model_registry = registry.ModelRegistry(self.directory.name)
+        self.store.publish('v1')
+        model = model_registry.get()
+        self.assertIsNotNone(model)
+        self.store.publish('v2')
+
+        with model_registry._lock:
+            self.assertIs(model_registry.get(), model)
+
+        self.assertEqual(model_registry.get().version, 'v2')
+
+    def test_commands_publish_and_roll_back(self):
+        with override_settings(RECOMMENDER_MODELS_DIR = self.directory.name):
+            call_command('publish_recommender', 'v1')
+            call_command('publish_recommender', 'v2')
+            self.assertEqual(self.store.current(), 'v2')
+            call_command('rollback_recommender')
+            self.assertEqual(self.store.current(), 'v1')
+            call_command('rollback_recommender', '--to', 'v2')
+            self.assertEqual(self.store.current(), 'v2')
+
+            with self.assertRaises(CommandError):
+                call_command('publish_recommender', 'v3')
+
+    def test_train_command_publishes(self):
+        with override_settings(RECOMMENDER_MODELS_DIR = self.directory.name):
+            call_command('train_recommender', '--model-version', 'v3', '--publish')
+
+        self.assertEqual(self.store.current(), 'v3')
@@ -0,0 +1,79 @@
+import numpy as np
+from django.test import TestCase
+from surprise import KNNBasic, NormalPredictor, SVD
+from book_clubs.tests.helpers import build_generated_dataset, import_recommender_system_testing
+
+import_recommender_system_testing()
+from RecommenderMetrics import RecommenderMetrics
+from StreamingTopN import StreamingTopN
+
+class StreamingTopNTestCase(TestCase):
+    """Tests for the top-N recommendations of the evaluation scripts, streamed one user at a time."""
+
+    def setUp(self):
+        self.trainset = build_generated_dataset().build_full_trainset()
+
+    def _assert_top_n_matches_anti_testset(self, algorithm, n = 5, minimumRating = 0.0, chunkSize = 7, seed = None):
+        """Checks that StreamingTopN gives the top-N that GetTopN does for the predictions of the whole anti-test-set."""
+        algorithm.fit(self.trainset)
+
+        if (seed != None):
+            np.random.seed(seed)
+
+        expected = RecommenderMetrics.GetTopN(algorithm.test(self.trainset.build_anti_testset()), n, minimumRating)
+
+        if (seed != None):
+            np.random.seed(seed)
+
+        topN = StreamingTopN(algorithm, chunkSize = chunkSize).GetTopN(n, minimumRating)
+        self.assertEqual(dict(topN), dict(expected))
+        return topN
+
+    def test_svd_top_n_matches_anti_testset(self):
+        self._assert_top_n_matches_anti_testset(SVD(n_factors = 4, n_epochs = 10, random_state = 1))
+
+    def test_svd_top_n_matches_anti_testset_in_a_single_chunk(self):
+        self._assert_top_n_matches_anti_testset(SVD(n_factors = 4, n_epochs = 10, random_state = 1), n = 3, chunkSize = StreamingTopN.CHUNK_SIZE)
+
+    def test_unbiased_svd_top_n_matches_anti_testset_with_clipped_ties(self):
+        # A large learning rate pushes many estimates past the rating scale, so they are clipped to equal ratings
+        topN = self._assert_top_n_matches_anti_testset(SVD(n_factors = 4, n_epochs = 10, biased = False, lr_all = 0.05, random_state = 1))
+        self.assertTrue(any(len(userTopN) > len(set(rating for (_, rating) in userTopN)) for userTopN in topN.values()))
+
+    def test_svd_prefilter_keeps_every_item_that_can_make_the_top_n(self):
+        algorithm = SVD(n_factors = 4, n_epochs = 10, random_state = 1)
+        algorithm.fit(self.trainset)
+        streaming = StreamingTopN(algorithm, chunkSize = 7)
+        chunk = next(streaming.GetUnratedItemChunks(0))
+        estimates = [algorithm.predict(self.trainset.to_raw_uid(0), self.trainset.to_raw_iid(i), clip = True).est for i in chunk]
+        self.assertTrue(np.allclose(streaming.EstimateSVD(0, chunk), estimates, rtol = 0, atol = StreamingTopN.TOLERANCE))
+
+        scored = list(streaming.ScoreChunk(0, chunk, 2))
+        self.assertLess(len(scored), len(chunk))
+        self.assertEqual(scored, [pair for pair in zip([self.trainset.to_raw_iid(i) for i in chunk], estimates) if (pair[1] >= sorted(estimates)[-2])])
+
+    def test_knn_top_n_matches_anti_testset_with_tied_ratings(self):
+        # With a single neighbour, estimates are the integer ratings of that neighbour, so they are often tied
+        topN = self._assert_top_n_matches_anti_testset(KNNBasic(k = 1, verbose = False))
+        self.assertTrue(any(len(userTopN) > len(set(rating for (_, rating) in userTopN)) for userTopN in topN.values()))
+
+    def test_random_top_n_matches_anti_testset(self):
+        self._assert_top_n_matches_anti_testset(NormalPredictor(), seed = 1)
+
+    def test_top_n_leaves_out_ratings_below_minimum_rating(self):
+        topN = self._assert_top_n_matches_anti_testset(NormalPredictor(), minimumRating = 8.0, seed = 2)
+        self.assertTrue(all(rating >= 8.0 for userTopN in topN.values() for (_, rating) in userTopN))
+        self.assertLess(len(topN), self.trainset.n_users)
+
+    def test_unrated_item_chunks_follow_the_anti_testset(self):
+        streaming = StreamingTopN(NormalPredictor().fit(self.trainset), chunkSize = 7)
+        antiTestset = self.trainset.build_anti_testset()
+
+        for innerUserID in self.trainset.all_users():
+            chunks = list(streaming.GetUnratedItemChunks(innerUserID))
+            userID = self.trainset.to_raw_uid(innerUserID)
+            self.assertTrue(all(0 < len(chunk) <= 7 for chunk in chunks))
+            self.assertEqual(
+                [self.trainset.to_raw_iid(i) for chunk in chunks for i in chunk.tolist()],
+                [bookID for (rawUserID, bookID, _) in antiTestset if (rawUserID == userID)]
+            )
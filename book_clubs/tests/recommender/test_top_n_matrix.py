@@ -0,0 +1,104 @@
+import contextlib
+import io
+import numpy as np
+from django.test import TestCase
+from surprise import KNNBasic, NormalPredictor, SVD
+from surprise.model_selection import LeaveOneOut
+from book_clubs.tests.helpers import build_generated_dataset, import_recommender_system_testing
+
+import_recommender_system_testing()
+from DataHandler import PopularityRanks
+from RecommenderMetrics import RecommenderMetrics
+from TopNMatrix import TopNMatrix
+
+class TopNMatrixTestCase(TestCase):
+    """Tests for the top-N metrics of the evaluation scripts, computed on matrices of recommendations."""
+
+    def setUp(self):
+        self.data = build_generated_dataset()
+        (self.trainset, self.testset) = next(LeaveOneOut(n_splits = 1, random_state = 1).split(self.data))
+        ratingBookIDs = [self.trainset.to_raw_iid(i) for (_, i, _) in self.trainset.all_ratings()]
+        self.popularityRanks = PopularityRanks.fromRatings(np.array(ratingBookIDs, dtype = str))
+
+    def _top_n(self, algorithm, n = 10):
+        """Returns the top-N of algorithm fitted on the leave-one-out trainset, and its predictions for the left-out ratings."""
+        np.random.seed(1)
+        algorithm.fit(self.trainset)
+        topNPredicted = RecommenderMetrics.GetTopN(algorithm.test(self.trainset.build_anti_testset()), n)
+        return (topNPredicted, algorithm.test(self.testset))
+
+    def _printed(self, function, *args):
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+            function(*args)
+
+        return output.getvalue()
+
+    def _assert_metrics_match(self, topNPredicted, leftOutPredictions):
+        """Checks that every metric of the TopNMatrix equals the one RecommenderMetrics computes for topNPredicted."""
+        topNMatrix = TopNMatrix.fromTopN(topNPredicted)
+        self.assertEqual(topNMatrix.HitRate(leftOutPredictions), RecommenderMetrics.HitRate(topNPredicted, leftOutPredictions))
+        self.assertEqual(topNMatrix.CumulativeHitRate(leftOutPredictions, 7), RecommenderMetrics.CumulativeHitRate(topNPredicted, leftOutPredictions, 7))
+        self.assertEqual(topNMatrix.AverageReciprocalHitRank(leftOutPredictions), RecommenderMetrics.AverageReciprocalHitRank(topNPredicted, leftOutPredictions))
+        self.assertEqual(self._printed(topNMatrix.RatingHitRate, leftOutPredictions), self._printed(RecommenderMetrics.RatingHitRate, topNPredicted, leftOutPredictions))
+        self.assertEqual(topNMatrix.hitMetrics(leftOutPredictions, 7), {
+            'HR' : RecommenderMetrics.HitRate(topNPredicted, leftOutPredictions),
+            'cHR' : RecommenderMetrics.CumulativeHitRate(topNPredicted, leftOutPredictions, 7),
+            'ARHR' : RecommenderMetrics.AverageReciprocalHitRank(topNPredicted, leftOutPredictions)
+        })
+
+        # The highest predicted rating is a threshold that only the users it is recommended to reach
+        highestRating = max([rating for userTopN in topNPredicted.values() for (_, rating) in userTopN], default = 0)
+
+        for ratingThreshold in [0, 4.0, 9.5, highestRating]:
+            self.assertEqual(
+                topNMatrix.UserCoverage(self.trainset.n_users, ratingThreshold),
+                RecommenderMetrics.UserCoverage(topNPredicted, self.trainset.n_users, ratingThreshold)
+            )
+
+        rankings = {bookID : rank for (bookID, rank) in zip(self.popularityRanks.bookIDs.tolist(), self.popularityRanks.ranks.tolist())}
+        self.assertEqual(topNMatrix.Novelty(self.popularityRanks), RecommenderMetrics.Novelty(topNPredicted, self.popularityRanks))
+        self.assertEqual(topNMatrix.Novelty(rankings), RecommenderMetrics.Novelty(topNPredicted, rankings))
+
+    def test_svd_metrics_match_recommender_metrics(self):
+        (topNPredicted, leftOutPredictions) = self._top_n(SVD(n_factors = 4, n_epochs = 10, random_state = 1))
+        self._assert_metrics_match(topNPredicted, leftOutPredictions)
+        self.assertGreater(RecommenderMetrics.HitRate(topNPredicted, leftOutPredictions), 0)
+
+    def test_knn_metrics_match_recommender_metrics(self):
+        (topNPredicted, leftOutPredictions) = self._top_n(KNNBasic(k = 1, verbose = False))
+        self._assert_metrics_match(topNPredicted, leftOutPredictions)
+
+    def test_random_metrics_match_recommender_metrics(self):
+        (topNPredicted, leftOutPredictions) = self._top_n(NormalPredictor())
+        self._assert_metrics_match(topNPredicted, leftOutPredictions)
+
+    def test_metrics_match_for_users_with_fewer_or_no_recommendations(self):
+        (topNPredicted, leftOutPredictions) = self._top_n(SVD(n_factors = 4, n_epochs = 10, random_state = 1))
+        userIDs = sorted(topNPredicted.keys())
+
+        for (position, userID) in enumerate(userIDs[:len(userIDs) // 2]):
+            if ((position % 3) == 0):
+                del topNPredicted[userID]
+            else:
+                topNPredicted[userID] = topNPredicted[userID][:position % 4]
+
+        self._assert_metrics_match(topNPredicted, leftOutPredictions)
+
+    def test_from_top_n_keeps_the_order_of_recommendations(self):
+        topNPredicted = {3 : [('B002', 9.0), ('B000', 9.0), ('B001', 2.5)], 1 : [('B001', 4.0)], 2 : []}
+        topNMatrix = TopNMatrix.fromTopN(topNPredicted)
+        self.assertEqual(topNMatrix.userIDs.tolist(), [1, 2, 3])
+        self.assertEqual(topNMatrix.bookIDs.tolist(), ['B000', 'B001', 'B002'])
+        self.assertEqual(topNMatrix.items.tolist(), [[1, -1, -1], [-1, -1, -1], [2, 0, 1]])
+        self.assertTrue(np.array_equal(topNMatrix.scores, [[4.0, np.nan, np.nan], [np.nan] * 3, [9.0, 9.0, 2.5]], equal_nan = True))
+
+    def test_metrics_of_empty_top_n(self):
+        leftOutPredictions = [(1, 'B000', 5.0, 4.0, {})]
+        topNMatrix = TopNMatrix.fromTopN({})
+        self.assertEqual(topNMatrix.HitRate(leftOutPredictions), 0)
+        self.assertEqual(topNMatrix.AverageReciprocalHitRank(leftOutPredictions), 0)
+        self.assertEqual(topNMatrix.UserCoverage(1), 0)
+        self.assertEqual(topNMatrix.Novelty(self.popularityRanks), -1)
+        self.assertEqual(self._printed(topNMatrix.RatingHitRate, leftOutPredictions), '')
@@ -0,0 +1,89 @@
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from book_clubs.models import Rating
+from book_clubs.recommender import training
+from book_clubs.recommender.factors import FactorModel
+
+class TrainingTestCase(TestCase):
+    """Tests for training the recommender model on the Rating table."""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'model')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_ratings_in_chunks(self):
+        rating_arrays = training.load_ratings(chunk_size = 3)
+        self.assertEqual(len(rating_arrays), Rating.objects.count())
+        loaded = set(zip(
+            rating_arrays.user_raw_ids[rating_arrays.users].tolist(),
+            rating_arrays.item_raw_ids[rating_arrays.items].tolist(),
+            rating_arrays.ratings.tolist()
+        ))
+        self.assertEqual(loaded, set(Rating.objects.values_list('user_id', 'book_id', 'rating')))
+
+    def test_load_ratings_only_indexes_rated_books(self):
+        rating_arrays = training.load_ratings()
+        self.assertEqual(len(rating_arrays.item_raw_ids), 7)
+        self.assertNotIn('0000000008', rating_arrays.item_raw_ids)
+
+    def test_build_trainset(self):
+        trainset = training.build_trainset(training.load_ratings())
+        self.assertEqual(trainset.n_ratings, Rating.objects.count())
+        self.assertEqual(trainset.n_users, 3)
+        self.assertEqual(len(trainset.ur[trainset.to_inner_uid(3)]), 4)
+        self.assertAlmostEqual(trainset.global_mean, np.mean(list(Rating.objects.values_list('rating', flat = True))))
+
+    def test_train_saves_versioned_model_with_metadata(self):
+        meta = training.train(self.path, 'v1')
+        model = FactorModel.load(self.path)
+        self.assertEqual(model.meta['version'], 'v1')
+        self.assertEqual(model.meta['ratings'], Rating.objects.count())
+        self.assertTrue(model.meta['fit_seconds'] >= 0)
+        self.assertTrue(model.meta['peak_memory'] > 0)
+        self.assertEqual(meta, model.meta)
+        self.assertEqual(model.n_users, 3)
+
+    def test_train_refuses_to_exceed_memory_budget(self):
+        budget = (Rating.objects.count() * training.TRAINSET_BYTES_PER_RATING) - 1
+
+        with override_settings(RECOMMENDER_TRAINING = {'algorithm' : 'surprise.SVD', 'memory_budget' : budget}):
+            with self.assertRaises(ValueError):
+                training.train(self.path, 'v1')
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_peak_memory_is_unknown_without_resource_module(self):
+        with mock.patch.dict('sys.modules', {'resource' : None}):
+            self.assertIsNone(training.peak_memory())
+
+    def test_train_without_ratings(self):
+        Rating.objects.all().delete()
+
+        with self.assertRaises(ValueError):
+            training.train(self.path)
+
+    def test_command_saves_to_models_directory(self):
+        with override_settings(RECOMMENDER_MODELS_DIR = self.directory.name):
+            call_command('train_recommender', model_version = 'v2')
+
+        self.assertTrue(FactorModel.is_saved_in(os.path.join(self.directory.name, 'v2')))
+
+    def test_command_refuses_an_existing_version(self):
+        with override_settings(RECOMMENDER_MODELS_DIR = self.directory.name):
+            call_command('train_recommender', model_version = 'v2')
+            saved = FactorModel.load(os.path.join(self.directory.name, 'v2'))
+
+            with self.assertRaises(CommandError):
+                call_command('train_recommender', model_version = 'v2')
+
+        self.assertEqual(FactorModel.load(os.path.join(self.directory.name, 'v2')).meta, saved.meta)
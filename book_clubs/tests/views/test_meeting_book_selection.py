@@ -1,6 +1,6 @@
 from django.test import TestCase
 from django.urls import reverse
-from book_clubs.models import Book, Club, Meeting, MeetingRecommendation, User
+from book_clubs.models import Book, Club, Meeting, MeetingRecommendation, RecommendationJob, User
 from book_clubs.tests.helpers import LogInTester, reverse_with_next
 
 class CreateMeetingBookSelectionTestCase(TestCase, LogInTester):
@@ -30,6 +30,24 @@ class CreateMeetingBookSelectionTestCase(TestCase, LogInTester):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'meeting_book_selection.html')
 
+    def test_get_meeting_book_selection_with_pending_recommendations(self):
+        self.client.login(username=self.user1.username, password="Password123")
+        self.assertTrue(self._is_logged_in())
+        Meeting.objects.filter(id = 1).update(book_chooser = self.user1)
+        RecommendationJob.objects.create(meeting = self.meeting, recommendations_limit = 8)
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['recommendations_pending'])
+        self.assertContains(response, 'Recommendations are still being generated')
+
+    def test_get_meeting_book_selection_with_finished_recommendations(self):
+        self.client.login(username=self.user1.username, password="Password123")
+        self.assertTrue(self._is_logged_in())
+        Meeting.objects.filter(id = 1).update(book_chooser = self.user1)
+        RecommendationJob.objects.create(meeting = self.meeting, recommendations_limit = 8, status = RecommendationJob.Statuses.DONE)
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['recommendations_pending'])
+        self.assertNotContains(response, 'Recommendations are still being generated')
+
     def test_get_meeting_book_selection_when_not_logged_in(self):
         self.assertFalse(self._is_logged_in())
         response = self.client.get(self.url)
@@ -0,0 +1,114 @@
+import datetime
+import os
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from book_clubs.models import User, Club, Book, Meeting
+from book_clubs.tests.helpers import LogInTester, RecommenderModelTester
+
+class RecommendationsApiTestCase(TestCase, LogInTester, RecommenderModelTester):
+    """Tests for the batched recommendations API"""
+
+    fixtures = ['book_clubs/tests/fixtures/multiple_memberships_and_ratings.json']
+
+    def setUp(self):
+        self._serve_test_model()
+        self.user1 = User.objects.get(id = 1)
+        self.user4 = User.objects.get(id = 4)
+        self.club1 = Club.objects.get(id = 1)
+        self.club2 = Club.objects.get(id = 2)
+        self.url = reverse('recommendations_api')
+
+    def _log_in(self, user):
+        self.client.login(username = user.username, password = 'Password123')
+        self.assertTrue(self._is_logged_in())
+
+    def test_url(self):
+        self.assertEqual(self.url, '/api/recommendations/')
+
+    def test_not_logged_in(self):
+        response = self.client.get(self.url, {'club' : self.club1.id})
+        self.assertEqual(response.status_code, 401)
+
+    def test_club_and_user_recommendations(self):
+        self._log_in(self.user1)
+        response = self.client.get(self.url, {'club' : self.club1.id, 'user' : self.user1.id, 'k' : 3})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['k'], 3)
+        self.assertIsNotNone(data['model_version'])
+        self.assertEqual([club['id'] for club in data['clubs']], [self.club1.id])
+        self.assertEqual([user['id'] for user in data['users']], [self.user1.id])
+        club_recommendations = data['clubs'][0]['recommendations']
+        user_recommendations = data['users'][0]['recommendations']
+        self.assertEqual(len(club_recommendations), 3)
+        self.assertEqual(len(user_recommendations), 3)
+        isbns = set(Book.objects.values_list('isbn', flat = True))
+
+        for recommendation in club_recommendations + user_recommendations:
+            self.assertIn(recommendation['isbn'], isbns)
+
+        scores = [recommendation['score'] for recommendation in user_recommendations]
+        self.assertEqual(scores, sorted(scores, reverse = True))
+
+    def test_club_recommendations_are_repeatable(self):
+        self._log_in(self.user1)
+        first = self.client.get(self.url, {'club' : self.club1.id}).json()
+        second = self.client.get(self.url, {'club' : self.club1.id}).json()
+        self.assertEqual(first, second)
+
+    def test_club_recommendations_exclude_used_books(self):
+        self._log_in(self.user1)
+        first = self.client.get(self.url, {'club' : self.club1.id, 'k' : 2}).json()['clubs'][0]['recommendations']
+        used_isbn = first[0]['isbn']
+        Meeting.objects.create(club = self.club1, deadline = timezone.now() + datetime.timedelta(days = 1), chosen_book = Book.objects.get(isbn = used_isbn))
+        second = self.client.get(self.url, {'club' : self.club1.id, 'k' : 2}).json()['clubs'][0]['recommendations']
+        self.assertNotIn(used_isbn, [recommendation['isbn'] for recommendation in second])
+
+    def test_comma_separated_ids(self):
+        self.user1.is_staff = True
+        self.user1.save()
+        self._log_in(self.user1)
+        response = self.client.get(self.url, {'club' : f'{self.club1.id},{self.club2.id}', 'user' : [self.user1.id, self.user4.id]})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([club['id'] for club in data['clubs']], [self.club1.id, self.club2.id])
+        self.assertEqual([user['id'] for user in data['users']], [self.user1.id, self.user4.id])
+
+    def test_invalid_k(self):
+        self._log_in(self.user1)
+        self.assertEqual(self.client.get(self.url, {'club' : self.club1.id, 'k' : 'ten'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'club' : self.club1.id, 'k' : 0}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'club' : self.club1.id, 'k' : 101}).status_code, 400)
+
+    def test_empty_batch(self):
+        self._log_in(self.user1)
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    @override_settings(RECOMMENDER_API = {'default_k' : 10, 'max_k' : 100, 'max_batch' : 1})
+    def test_oversized_batch(self):
+        self._log_in(self.user1)
+        response = self.client.get(self.url, {'club' : self.club1.id, 'user' : self.user1.id})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_ids(self):
+        self._log_in(self.user1)
+        response = self.client.get(self.url, {'club' : 0, 'user' : self.user1.id})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['clubs'], [0])
+
+    def test_club_of_other_members_is_forbidden(self):
+        self._log_in(self.user1)
+        self.assertEqual(self.client.get(self.url, {'club' : self.club2.id}).status_code, 403)
+
+    def test_other_user_is_forbidden(self):
+        self._log_in(self.user1)
+        self.assertEqual(self.client.get(self.url, {'user' : self.user4.id}).status_code, 403)
+
+    def test_no_model(self):
+        self._log_in(self.user1)
+
+        with override_settings(RECOMMENDER_MODEL_PATH = os.path.join(self.directory.name, 'missing')):
+            response = self.client.get(self.url, {'club' : self.club1.id})
+
+        self.assertEqual(response.status_code, 503)
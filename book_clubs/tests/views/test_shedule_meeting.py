@@ -1,7 +1,7 @@
 from django.utils import timezone
 from django.test import TestCase
 from django.urls import reverse
-from book_clubs.models import User, Club, Membership, Meeting
+from book_clubs.models import User, Club, Membership, Meeting, RecommendationJob
 from book_clubs.tests.helpers import LogInTester, reverse_with_next
 
 class SheduleMeetingTestCase(TestCase, LogInTester):
@@ -76,3 +76,13 @@ class SheduleMeetingTestCase(TestCase, LogInTester):
         after_meetings_count = Meeting.objects.count()
         self.assertRedirects(response, reverse('meeting_list', kwargs = {'club_id' : self.club1.id}), status_code=302, target_status_code=200)
         self.assertEqual(after_meetings_count, before_meetings_count + 1)
+
+    def test_post_valid_queues_recommendation_job(self):
+        self.client.login(username=self.user1.username, password='Password123')
+        self.assertTrue(self._is_logged_in())
+        self.form_input['deadline'] = self.form_input['deadline'].replace(year = timezone.now().year + 1)
+        self.client.post(self.url, self.form_input)
+        meeting = Meeting.objects.latest('id')
+        job = RecommendationJob.objects.get(meeting = meeting)
+        self.assertEqual(job.status, RecommendationJob.Statuses.PENDING)
+        self.assertEqual(job.recommendations_limit, 8)
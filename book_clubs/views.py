@@ -4,11 +4,13 @@ from django.contrib.auth import authenticate, login, logout
 from django.http import HttpResponse, JsonResponse
 from .forms import LogInForm, ClubCreationForm, SignUpForm, ConfirmationForm, SearchBooksForm, MeetingCreationForm
 from django.contrib.auth.decorators import login_required
-from .models import User, Club, Membership, Application, Book, Meeting, MeetingRecommendation, Message
+from .models import User, Club, Membership, Application, Book, Meeting, Message
 from django.core.exceptions import ObjectDoesNotExist
 from django.urls import reverse
 from django.views.generic.list import ListView
 from book_clubs import helpers
+from book_clubs.recommender import batch, jobs
+from django.conf import settings
 from django.utils import timezone
 
 @helpers.login_prohibited
@@ -279,10 +281,7 @@ def shedule_meeting(request, club_id):
 
             club.save()
             meeting = Meeting.objects.create(club = club, book_chooser = chooser, active = True, deadline = deadline)
-            recommendations = helpers.get_recommendations_for_club(club_id, 8)
-
-            for recommendation in recommendations:
-                MeetingRecommendation.objects.create(meeting = meeting, book = Book.objects.get(isbn = recommendation))
+            jobs.enqueue_meeting_recommendations(meeting, 8)
 
             msgs.add_message(request, msgs.SUCCESS, "Created meeting!")
             return redirect(reverse('meeting_list', kwargs = {'club_id' : club_id}))
@@ -299,6 +298,7 @@ def meeting_book_selection(request, club_id, meeting_id, page):
     membership = Membership.objects.get(club = club, member = current_user)
     meeting = Meeting.objects.get(id = meeting_id)
     recommended_books = meeting.recommendations.all()
+    recommendations_pending = jobs.recommendations_pending(meeting)
     all_books_info = []
 
     if (request.method == 'POST'):
@@ -364,6 +364,7 @@ def meeting_book_selection(request, club_id, meeting_id, page):
             'meeting' : meeting,
             'books_info' : books_info,
             'recommended_books' : recommended_books,
+            'recommendations_pending' : recommendations_pending,
             'page' : page,
             'next_page' : next_page,
             'previous_page' : previous_page,
@@ -449,3 +450,59 @@ def end_meeting(request, club_id, meeting_id):
     meeting.save()
     msgs.add_message(request, msgs.SUCCESS, 'Ended meeting!')
     return redirect(reverse('meeting_list', kwargs = {'club_id' : club_id}))
+
+def _parse_ids(request, name):
+    return [int(value) for values in request.GET.getlist(name) for value in values.split(',') if value]
+
+def _recommendations_json(recommendations):
+    return [
+        {'id' : entity_id, 'recommendations' : [{'isbn' : book_isbn, 'score' : score} for (book_isbn, score) in ranking]}
+        for (entity_id, ranking) in recommendations.items()
+    ]
+
+@helpers.api_login_required
+def recommendations_api(request):
+    """
+        Responds with the recommendations of the clubs and users given as
+        club and user query parameters, each repeatable or comma separated,
+        k recommendations each. Users that are not staff may only request
+        clubs they are a member of, and themselves.
+    """
+    options = settings.RECOMMENDER_API
+
+    try:
+        club_ids = list(dict.fromkeys(_parse_ids(request, 'club')))
+        user_ids = list(dict.fromkeys(_parse_ids(request, 'user')))
+        k = int(request.GET.get('k', options['default_k']))
+    except ValueError:
+        return JsonResponse({'error' : 'Club ids, user ids and k must be integers.'}, status = 400)
+
+    if ((k < 1) or (k > options['max_k'])):
+        return JsonResponse({'error' : f'k must be between 1 and {options["max_k"]}.'}, status = 400)
+
+    if ((len(club_ids) + len(user_ids) < 1) or (len(club_ids) + len(user_ids) > options['max_batch'])):
+        return JsonResponse({'error' : f'Between 1 and {options["max_batch"]} clubs and users must be requested.'}, status = 400)
+
+    missing_club_ids = set(club_ids) - set(Club.objects.filter(id__in = club_ids).values_list('id', flat = True))
+    missing_user_ids = set(user_ids) - set(User.objects.filter(id__in = user_ids).values_list('id', flat = True))
+
+    if (missing_club_ids or missing_user_ids):
+        return JsonResponse({'error' : 'Unknown clubs or users.', 'clubs' : sorted(missing_club_ids), 'users' : sorted(missing_user_ids)}, status = 404)
+
+    if not request.user.is_staff:
+        member_club_ids = set(Membership.objects.filter(member = request.user, club_id__in = club_ids).values_list('club_id', flat = True))
+
+        if ((set(club_ids) - member_club_ids) or (set(user_ids) - {request.user.id})):
+            return JsonResponse({'error' : 'Only your own clubs and recommendations can be requested.'}, status = 403)
+
+    try:
+        (model_version, club_recommendations, user_recommendations) = batch.recommend(club_ids, user_ids, k)
+    except jobs.RecommendationsUnavailable:
+        return JsonResponse({'error' : 'No recommender model is available.'}, status = 503)
+
+    return JsonResponse({
+        'model_version' : model_version,
+        'k' : k,
+        'clubs' : _recommendations_json(club_recommendations),
+        'users' : _recommendations_json(user_recommendations)
+    })
@@ -0,0 +1,81 @@
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from DataHandler import DataHandler
+from RecommenderMetrics import RecommenderMetrics
+from StreamingTopN import StreamingTopN
+from TopNMatrix import TopNMatrix
+from surprise import SVD
+from surprise.model_selection import LeaveOneOut
+
+# Compares the top-N metrics of RecommenderMetrics with those of TopNMatrix on
+# the leave-one-out split that the Evaluator uses, checking that they give the
+# same numbers and timing both. Usage: python BenchmarkMetrics.py [every_nth] [n]
+
+def Time(function, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if (best is None) else min(best, elapsed)
+    return (result, best)
+
+def Printed(function):
+    output = io.StringIO()
+    with redirect_stdout(output):
+        function()
+    return output.getvalue()
+
+every_nth = int(sys.argv[1]) if (len(sys.argv) > 1) else 0
+n = int(sys.argv[2]) if (len(sys.argv) > 2) else 10
+
+dh = DataHandler()
+data = dh.loadData(every_nth)
+rankings = dh.getPopularityRanks()
+
+for train, test in LeaveOneOut(n_splits=1, random_state=1).split(data):
+    (LOOCVTrain, LOOCVTest) = (train, test)
+
+print("Computing top-N recommendations...")
+algorithm = SVD(random_state=10)
+algorithm.fit(LOOCVTrain)
+leftOutPredictions = algorithm.test(LOOCVTest)
+topNPredicted = StreamingTopN(algorithm).GetTopN(n)
+(topNMatrix, buildTime) = Time(lambda: TopNMatrix.fromTopN(topNPredicted))
+print("Built the {} x {} top-N matrix in {:.4f}s\n".format(topNMatrix.items.shape[0], topNMatrix.items.shape[1], buildTime))
+
+benchmarks = [
+    ("HitRate",
+     lambda: RecommenderMetrics.HitRate(topNPredicted, leftOutPredictions),
+     lambda: topNMatrix.HitRate(leftOutPredictions)),
+    ("CumulativeHitRate",
+     lambda: RecommenderMetrics.CumulativeHitRate(topNPredicted, leftOutPredictions, 7),
+     lambda: topNMatrix.CumulativeHitRate(leftOutPredictions, 7)),
+    ("RatingHitRate",
+     lambda: Printed(lambda: RecommenderMetrics.RatingHitRate(topNPredicted, leftOutPredictions)),
+     lambda: Printed(lambda: topNMatrix.RatingHitRate(leftOutPredictions))),
+    ("AverageReciprocalHitRank",
+     lambda: RecommenderMetrics.AverageReciprocalHitRank(topNPredicted, leftOutPredictions),
+     lambda: topNMatrix.AverageReciprocalHitRank(leftOutPredictions)),
+    ("UserCoverage",
+     lambda: RecommenderMetrics.UserCoverage(topNPredicted, LOOCVTrain.n_users, ratingThreshold=7.0),
+     lambda: topNMatrix.UserCoverage(LOOCVTrain.n_users, ratingThreshold=7.0)),
+    ("Novelty",
+     lambda: RecommenderMetrics.Novelty(topNPredicted, rankings),
+     lambda: topNMatrix.Novelty(rankings)),
+    ("HR + cHR + ARHR",
+     lambda: {"HR": RecommenderMetrics.HitRate(topNPredicted, leftOutPredictions),
+              "cHR": RecommenderMetrics.CumulativeHitRate(topNPredicted, leftOutPredictions, 7),
+              "ARHR": RecommenderMetrics.AverageReciprocalHitRank(topNPredicted, leftOutPredictions)},
+     lambda: topNMatrix.hitMetrics(leftOutPredictions, 7)),
+]
+
+print("{:<26} {:<10} {:<10} {:<10} {:<10}".format("Metric", "Loops", "Matrix", "Speedup", "Identical"))
+for (name, loops, matrix) in benchmarks:
+    (expected, loopsTime) = Time(loops)
+    (result, matrixTime) = Time(matrix)
+    print("{:<26} {:<10.4f} {:<10.4f} {:<10.1f} {:<10}".format(
+            name, loopsTime, matrixTime, loopsTime / max(matrixTime, 1e-9), str(result == expected)))
@@ -2,131 +2,187 @@ import os
 import csv
 import sys
 import re
+import hashlib
 
 from surprise import Dataset
 from surprise import Reader
 
-from collections import defaultdict
+from itertools import repeat
 import numpy as np
-import pandas as pd
 
-class DataHandler:
+# The rating matrix is shared with the book_clubs app, which is in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from book_clubs.recommender.directories import save_directory
+from book_clubs.recommender.rating_matrix import RatingMatrix
 
-    bookID_to_name = {}
-    name_to_bookID = {}
-    ratingsPath = 'book-review-dataset/BX-Book-Ratings.csv'
-    booksPath = 'book-review-dataset/BX_Books.csv'
+class PopularityRanks:
 
-    def loadData(self, every_nth):
+    """
+        The popularity rank of each rated book, 1 being the book with the
+        most ratings, and books with as many ratings ranked in the order
+        they were first rated. The ranks are held in a dense array indexed
+        by the position of a book in the sorted array of bookIDs. Unknown
+        books have a rank of 0, as they did when the ranks were a defaultdict.
+    """
 
-        # Look for files relative to the directory we are running from
-        os.chdir(os.path.dirname(sys.argv[0]))
+    def __init__(self, bookIDs, ranks):
+        self.bookIDs = bookIDs
+        self.ranks = ranks
 
-        ratingsDataset = 0
-        self.bookID_to_name = {}
-        self.name_to_bookID = {}
-        self.every_nth = every_nth
-        self.doAllRatings = False
+    @classmethod
+    def fromRatings(cls, ratingBookIDs):
+        """Ranks the books of ratingBookIDs, an array of the bookID of each loaded rating, in load order."""
+        (bookIDs, firstIndex, counts) = np.unique(ratingBookIDs, return_index = True, return_counts = True)
+        ranks = np.zeros(len(bookIDs), dtype = np.int64)
+        ranks[np.lexsort((firstIndex, -counts))] = np.arange(1, len(bookIDs) + 1)
+        return cls(bookIDs, ranks)
 
-        with open(self.booksPath, newline='', encoding='Windows-1252') as csvfile:
-                bookReader = csv.reader(csvfile, delimiter = ';', quoting = csv.QUOTE_ALL)
-                next(bookReader)
+    def indicesOf(self, bookIDs):
+        """Returns the index of each of bookIDs in the rank array, or -1 for unknown books."""
+        bookIDs = np.asarray(bookIDs, dtype = str)
 
-                for row in bookReader:
-                    bookID = row[0]
-                    bookName = row[1]
-                    self.bookID_to_name[bookID] = bookName
-                    self.name_to_bookID[bookName] = bookID
+        if (len(self.bookIDs) == 0):
+            return np.full(len(bookIDs), -1)
 
-        if (self.every_nth <= 0):
-            self.doAllRatings = True
+        positions = np.minimum(np.searchsorted(self.bookIDs, bookIDs), len(self.bookIDs) - 1)
+        return np.where(self.bookIDs[positions] == bookIDs, positions, -1)
 
-        ratings_dict = {
-            'userID' : [],
-            'itemID' : [],
-            'rating' : []
-        }
+    def ranksOf(self, bookIDs):
+        """Returns an array of the rank of each of bookIDs."""
+        indices = self.indicesOf(bookIDs)
+        return np.where(indices >= 0, self.ranks[indices], 0)
 
-        total_ratings_loaded = 0
+    def __getitem__(self, bookID):
+        return int(self.ranksOf([bookID])[0])
 
-        with open(self.ratingsPath, newline = '', encoding = 'Windows-1252') as csv_file:
-            csv_reader = csv.reader(csv_file, delimiter = ';', quoting = csv.QUOTE_ALL)
-            next(csv_reader)
-            i = 0
+    def __contains__(self, bookID):
+        return bool(self.indicesOf([bookID])[0] >= 0)
 
-            for row in csv_reader:
-                i = i + 1
+    def __len__(self):
+        return len(self.bookIDs)
 
-                if ((self.doAllRatings or (i >= self.every_nth)) and (row[1] in self.bookID_to_name)):
-                    ratings_dict['userID'].append(int(row[0]))
-                    ratings_dict['itemID'].append(row[1])
-                    ratings_dict['rating'].append(int(row[2]))
-                    total_ratings_loaded = total_ratings_loaded + 1
-                    i = 0
+    def items(self):
+        """Returns (bookID, rank) pairs, most popular first."""
+        order = np.argsort(self.ranks)
+        return list(zip(self.bookIDs[order].tolist(), self.ranks[order].tolist()))
 
+class DataHandler:
 
+    bookID_to_name = {}
+    name_to_bookID = {}
+    ratingsPath = 'book-review-dataset/BX-Book-Ratings.csv'
+    booksPath = 'book-review-dataset/BX_Books.csv'
+    cachePath = 'book-review-dataset/cache'
 
-        df = pd.DataFrame(ratings_dict)
+    # Changed whenever the layout of the cache files changes, so that old caches are not read.
+    CACHE_FORMAT = 5
 
-        reader = Reader(rating_scale = (0, 10))
+    def loadData(self, every_nth):
+        """
+            Loads the ratings of books in the books CSV file, keeping a rating
+            when it is at least every_nth rows after the last kept rating if
+            every_nth is above zero. The ratings are read into the RatingMatrix
+            that training loads too, which is cached with the ids and names of
+            the books and their popularity ranks in a directory keyed by the size and modification time
+            of both CSV files and every_nth, so later runs load them instead
+            of parsing either CSV file again.
+        """
 
-        ratingsDataset = Dataset.load_from_df(df[['userID', 'itemID', 'rating']], reader = reader)
+        # Look for files relative to the directory we are running from
+        os.chdir(os.path.dirname(sys.argv[0]))
 
-        print("Total ratings loaded: " + str(total_ratings_loaded))
+        self.every_nth = every_nth
+        self.doAllRatings = (self.every_nth <= 0)
+
+        cacheDirectory = self.getCacheDirectory(every_nth)
+
+        if os.path.exists(cacheDirectory):
+            self.ratingMatrix = RatingMatrix.load(os.path.join(cacheDirectory, 'ratings'))
+            allBookIDs = np.load(os.path.join(cacheDirectory, 'bookIDs.npy'))
+            bookNames = np.load(os.path.join(cacheDirectory, 'bookNames.npy'))
+            self.popularityRanks = PopularityRanks(
+                np.load(os.path.join(cacheDirectory, 'popularBookIDs.npy')),
+                np.load(os.path.join(cacheDirectory, 'popularityRanks.npy'))
+            )
+        else:
+            (allBookIDs, bookNames) = self.parseBooks()
+            self.ratingMatrix = RatingMatrix.from_csv(self.ratingsPath, self.booksPath, every_nth)
+            self.popularityRanks = PopularityRanks.fromRatings(self.ratingMatrix.to_dataframe()['itemID'].to_numpy(dtype = str))
+            self.writeCache(
+                cacheDirectory, bookIDs = allBookIDs, bookNames = bookNames,
+                popularBookIDs = self.popularityRanks.bookIDs, popularityRanks = self.popularityRanks.ranks
+            )
 
-        return ratingsDataset
+        self.bookID_to_name = dict(zip(allBookIDs.tolist(), bookNames.tolist()))
+        self.name_to_bookID = dict(zip(bookNames.tolist(), allBookIDs.tolist()))
 
-    def getUserRatings(self, user):
-        userRatings = []
-        hitUser = False
+        df = self.ratingMatrix.to_dataframe()
+        df['itemID'] = df['itemID'].astype(object)
 
-        with open(self.ratingsPath, newline='', encoding='Windows-1252') as csvfile:
-            ratingReader = csv.reader(csvfile, delimiter = ';', quoting = csv.QUOTE_ALL)
-            next(ratingReader)
-            i = 0
+        reader = Reader(rating_scale = (0, 10))
 
-            for row in ratingReader:
-                i = i + 1
-                userID = int(row[0])
+        # Loading the whole DataFrame would build the raw ratings one row at a time,
+        # so they are built from the arrays instead, as the same (user, item, float rating, None) tuples.
+        ratingsDataset = Dataset.load_from_df(df[['userID', 'itemID', 'rating']].iloc[:0], reader = reader)
+        ratingsDataset.df = df
+        ratingsDataset.raw_ratings = list(zip(df['userID'].tolist(), df['itemID'].tolist(), df['rating'].astype(float).tolist(), repeat(None)))
 
-                if ((self.doAllRatings or (i >= self.every_nth)) and (row[1] in self.bookID_to_name)):
-                    if (user == userID):
-                        bookID = row[1]
-                        rating = float(row[2])
-                        userRatings.append((bookID, rating))
-                        hitUser = True
+        print("Total ratings loaded: " + str(len(df)))
 
-                    if (hitUser and (user != userID)):
-                        break
+        return ratingsDataset
 
-                    i = 0
+    def parseBooks(self):
+        """Returns arrays of the ids and names of the books in the books CSV file, in file order."""
+        bookIDs = []
+        bookNames = []
 
-        return userRatings
+        with open(self.booksPath, newline = '', encoding = 'Windows-1252') as csvfile:
+            bookReader = csv.reader(csvfile, delimiter = ';', quoting = csv.QUOTE_ALL)
+            next(bookReader)
 
-    def getPopularityRanks(self):
-        ratings = defaultdict(int)
-        rankings = defaultdict(int)
+            for row in bookReader:
+                bookIDs.append(row[0])
+                bookNames.append(row[1])
+
+        return (np.array(bookIDs, dtype = str), np.array(bookNames, dtype = str))
+
+    def getCacheDirectory(self, every_nth):
+        """
+            Returns the path of the cache of the ratings loaded with every_nth
+            from the current CSV files, which are told apart by their size
+            and modification time so that they are not read to find the cache.
+        """
+        key = hashlib.sha1()
 
-        with open(self.ratingsPath, newline='', encoding = 'Windows-1252') as csvfile:
-            ratingReader = csv.reader(csvfile, delimiter = ';', quoting = csv.QUOTE_ALL)
-            next(ratingReader)
-            i = 0
+        for path in [self.ratingsPath, self.booksPath]:
+            stat = os.stat(path)
+            key.update(f'{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|'.encode())
 
-            for row in ratingReader:
-                i = i + 1
+        key.update(f'{max(every_nth, 0)}|{self.CACHE_FORMAT}'.encode())
+        return os.path.join(self.cachePath, 'ratings-' + key.hexdigest())
 
-                if ((self.doAllRatings or (i >= self.every_nth)) and (row[1] in self.bookID_to_name)):
-                    bookID = row[1]
-                    ratings[bookID] += 1
-                    i = 0
+    def writeCache(self, cacheDirectory, **arrays):
+        """
+            Writes the RatingMatrix, in its ratings subdirectory, and arrays,
+            as .npy files, to cacheDirectory, which is renamed into place once
+            they are all written so that a cache is never read half written.
+        """
+        def write(directory):
+            self.ratingMatrix.save(os.path.join(directory, 'ratings'))
 
-        rank = 1
+            for (name, array) in arrays.items():
+                np.save(os.path.join(directory, name + '.npy'), array, allow_pickle = False)
 
-        for bookID, ratingCount in sorted(ratings.items(), key=lambda x: x[1], reverse=True):
-            rankings[bookID] = rank
-            rank += 1
+        save_directory(cacheDirectory, write)
 
-        return rankings
+    def getUserRatings(self, user):
+        """Returns the (bookID, rating) ratings of user that loadData loaded, in file order."""
+        (bookIDs, ratings) = self.ratingMatrix.user_ratings(user, source_order = True)
+        return list(zip(bookIDs.tolist(), ratings.astype(float).tolist()))
+
+    def getPopularityRanks(self):
+        """Returns the PopularityRanks of the books in the ratings that loadData loaded."""
+        return self.popularityRanks
 
     # def getGenres(self):
     #     genres = defaultdict(list)
@@ -6,6 +6,8 @@ Created on Thu May  3 10:45:33 2018
 """
 from RecommenderMetrics import RecommenderMetrics
 from EvaluationData import EvaluationData
+from StreamingTopN import StreamingTopN
+from TopNMatrix import TopNMatrix
 
 class EvaluatedAlgorithm:
 
@@ -29,37 +31,30 @@ class EvaluatedAlgorithm:
                 print("Evaluating top-N with leave-one-out...")
             self.algorithm.fit(evaluationData.GetLOOCVTrainSet())
             leftOutPredictions = self.algorithm.test(evaluationData.GetLOOCVTestSet())
-            # Build predictions for all ratings not in the training set
-            allPredictions = self.algorithm.test(evaluationData.GetLOOCVAntiTestSet())
-            # Compute top 10 recs for each user
-            topNPredicted = RecommenderMetrics.GetTopN(allPredictions, n)
+            # Compute top 10 recs for each user from predictions for all ratings not in the training set
+            topNPredicted = StreamingTopN(self.algorithm).GetTopN(n)
             if (verbose):
                 print("Computing hit-rate and rank metrics...")
-            # See how often we recommended a book the user actually rated
-            metrics["HR"] = RecommenderMetrics.HitRate(topNPredicted, leftOutPredictions)
-            # See how often we recommended a book the user actually liked
-            metrics["cHR"] = RecommenderMetrics.CumulativeHitRate(topNPredicted, leftOutPredictions, 7)
-            # Compute ARHR
-            metrics["ARHR"] = RecommenderMetrics.AverageReciprocalHitRank(topNPredicted, leftOutPredictions)
+            # See how often we recommended a book the user actually rated (HR),
+            # how often one the user actually liked (cHR), and at which rank (ARHR)
+            metrics.update(TopNMatrix.fromTopN(topNPredicted).hitMetrics(leftOutPredictions, 7))
 
             #Evaluate properties of recommendations on full training set
             if (verbose):
                 print("Computing recommendations with full data set...")
             self.algorithm.fit(evaluationData.GetFullTrainSet())
-            allPredictions = self.algorithm.test(evaluationData.GetFullAntiTestSet())
-            topNPredicted = RecommenderMetrics.GetTopN(allPredictions, n)
+            topNPredicted = StreamingTopN(self.algorithm).GetTopN(n)
+            topNMatrix = TopNMatrix.fromTopN(topNPredicted)
             if (verbose):
                 print("Analyzing coverage, diversity, and novelty...")
             # Print user coverage with a minimum predicted rating of 7.0:
-            metrics["Coverage"] = RecommenderMetrics.UserCoverage(  topNPredicted,
-                                                                   evaluationData.GetFullTrainSet().n_users,
-                                                                   ratingThreshold=7.0)
+            metrics["Coverage"] = topNMatrix.UserCoverage(evaluationData.GetFullTrainSet().n_users,
+                                                          ratingThreshold=7.0)
             # Measure diversity of recommendations:
             metrics["Diversity"] = RecommenderMetrics.Diversity(topNPredicted, evaluationData.GetSimilarities())
 
             # Measure novelty (average popularity rank of recommendations):
-            metrics["Novelty"] = RecommenderMetrics.Novelty(topNPredicted,
-                                                            evaluationData.GetPopularityRankings())
+            metrics["Novelty"] = topNMatrix.Novelty(evaluationData.GetPopularityRankings())
 
         if (verbose):
             print("Analysis complete.")
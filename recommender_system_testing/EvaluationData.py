@@ -20,24 +20,20 @@ class EvaluationData:
         #Build a 75/25 train/test split for measuring accuracy
         self.trainSet, self.testSet = train_test_split(data, test_size=.25, random_state=1)
 
-        self.fullAntiTestSet = None
         self.LOOCVTrain = None
         self.LOOCVTest = None
-        self.LOOCVAntiTestSet = None
         self.simsAlgo = None
 
+        #Anti-test-sets hold every unrated (user, item) pair, far too many to keep in
+        #memory for the full data set, so top-N recommenders are evaluated with
+        #StreamingTopN instead and the anti-test-sets are only built when asked for
         if create_anti_test_sets_and_matrix:
-            self.fullAntiTestSet = self.fullTrainSet.build_anti_testset()
-
             #Build a "leave one out" train/test split for evaluating top-N recommenders
-            #And build an anti-test-set for building predictions
             LOOCV = LeaveOneOut(n_splits=1, random_state=1)
             for train, test in LOOCV.split(data):
                 self.LOOCVTrain = train
                 self.LOOCVTest = test
 
-            self.LOOCVAntiTestSet = self.LOOCVTrain.build_anti_testset()
-
             #Compute similarty matrix between items so we can measure diversity
             sim_options = {'name': 'cosine', 'user_based': False}
             self.simsAlgo = KNNBaseline(sim_options=sim_options)
@@ -47,7 +43,7 @@ class EvaluationData:
         return self.fullTrainSet
 
     def GetFullAntiTestSet(self):
-        return self.fullAntiTestSet
+        return self.fullTrainSet.build_anti_testset()
 
     def GetAntiTestSetForUser(self, testSubject):
         trainset = self.fullTrainSet
@@ -73,7 +69,9 @@ class EvaluationData:
         return self.LOOCVTest
 
     def GetLOOCVAntiTestSet(self):
-        return self.LOOCVAntiTestSet
+        if (self.LOOCVTrain is None):
+            return None
+        return self.LOOCVTrain.build_anti_testset()
 
     def GetSimilarities(self):
         return self.simsAlgo
@@ -146,15 +146,13 @@ class RecommenderMetrics:
         return (1-S)
 
     def Novelty(topNPredicted, rankings):
-        n = 0
-        total = 0
-        for userID in topNPredicted.keys():
-            for rating in topNPredicted[userID]:
-                bookID = rating[0]
-                rank = rankings[bookID]
-                total += rank
-                n += 1
-        if (n > 0):
-            return total / n
-        else:
+        bookIDs = [rating[0] for userID in topNPredicted.keys() for rating in topNPredicted[userID]]
+
+        if (len(bookIDs) == 0):
             return -1
+
+        # PopularityRanks are read by array index, other rankings one book at a time
+        if hasattr(rankings, 'ranksOf'):
+            return int(rankings.ranksOf(bookIDs).sum()) / len(bookIDs)
+
+        return sum(rankings[bookID] for bookID in bookIDs) / len(bookIDs)
@@ -0,0 +1,77 @@
+import heapq
+from collections import defaultdict
+
+import numpy as np
+from surprise import SVD
+
+class StreamingTopN:
+
+    # Number of unrated items of a user that are scored together
+    CHUNK_SIZE = 10000
+
+    # Largest difference between a batch estimate and the one predict() makes, which
+    # comes from the matrix product summing the factors in a different order
+    TOLERANCE = 1e-9
+
+    def __init__(self, algorithm, chunkSize=CHUNK_SIZE):
+        self.algorithm = algorithm
+        self.chunkSize = chunkSize
+
+    # Top-N recommendations of every user of the trainset the algorithm was fitted on,
+    # equal to RecommenderMetrics.GetTopN(algorithm.test(trainset.build_anti_testset()), n),
+    # without ever holding more than one chunk of a user's unrated items and N
+    # recommendations per user
+    def GetTopN(self, n=10, minimumRating=0.0):
+        topN = defaultdict(list)
+        trainset = self.algorithm.trainset
+
+        for innerUserID in trainset.all_users():
+            userID = trainset.to_raw_uid(innerUserID)
+            predictions = (prediction for chunk in self.GetUnratedItemChunks(innerUserID)
+                           for prediction in self.ScoreChunk(innerUserID, chunk, n)
+                           if (prediction[1] >= minimumRating))
+            # Like sorted(..., reverse=True)[:n], ties keep the order of the anti-test set
+            ratings = heapq.nlargest(n, predictions, key=lambda x: x[1])
+            if (len(ratings) > 0):
+                topN[int(userID)] = ratings
+
+        return topN
+
+    # Inner ids of the items a user has not rated, in the order of build_anti_testset()
+    def GetUnratedItemChunks(self, innerUserID):
+        trainset = self.algorithm.trainset
+        rated = np.zeros(trainset.n_items, dtype=bool)
+        rated[[j for (j, _) in trainset.ur[innerUserID]]] = True
+
+        for start in range(0, trainset.n_items, self.chunkSize):
+            chunk = np.arange(start, min(start + self.chunkSize, trainset.n_items))
+            chunk = chunk[~rated[start:start + len(chunk)]]
+            if (len(chunk) > 0):
+                yield chunk
+
+    # Pairs of raw book id and estimated rating for the items of a chunk that may be in the top n
+    def ScoreChunk(self, innerUserID, chunk, n):
+        trainset = self.algorithm.trainset
+        userID = trainset.to_raw_uid(innerUserID)
+
+        # SVD scores the whole chunk at once, and only the items that can make its top n
+        # are predicted again one at a time so their ratings are exactly those test() gives
+        if (type(self.algorithm) is SVD) and (len(chunk) > n):
+            estimates = self.EstimateSVD(innerUserID, chunk)
+            cutoff = np.partition(estimates, len(estimates) - n)[len(estimates) - n]
+            chunk = chunk[estimates >= cutoff - self.TOLERANCE]
+
+        # Items are predicted in the same order as test() would, which matters to random algorithms
+        bookIDs = [trainset.to_raw_iid(i) for i in chunk]
+        return ((bookID, self.algorithm.predict(userID, bookID, clip=True).est) for bookID in bookIDs)
+
+    # SVD.estimate for every item of the chunk in one matrix product, clipped like predict()
+    def EstimateSVD(self, innerUserID, chunk):
+        algo = self.algorithm
+        estimates = algo.qi[chunk] @ algo.pu[innerUserID]
+
+        if (algo.biased):
+            estimates = algo.trainset.global_mean + algo.bu[innerUserID] + algo.bi[chunk] + estimates
+
+        (lowerBound, higherBound) = algo.trainset.rating_scale
+        return np.clip(estimates, lowerBound, higherBound)
@@ -0,0 +1,136 @@
+import numpy as np
+
+class TopNMatrix:
+
+    """
+        Top-N recommendations held as a (users x N) matrix of book indices
+        into the sorted array of bookIDs, -1 where a user has fewer than N
+        recommendations, and a matching matrix of predicted ratings, NaN
+        where there is no recommendation. The rows follow the sorted array
+        of userIDs. Every metric gives the same number as the function of
+        RecommenderMetrics with the same name does for the topN dict.
+    """
+
+    def __init__(self, userIDs, bookIDs, items, scores):
+        self.userIDs = userIDs
+        self.bookIDs = bookIDs
+        self.items = items
+        self.scores = scores
+
+    @classmethod
+    def fromTopN(cls, topNPredicted):
+        """Builds the matrices from a dict of userID to a list of (bookID, predictedRating), best first, as GetTopN returns."""
+        userIDs = np.array(sorted(topNPredicted.keys()), dtype = np.int64)
+        lengths = np.array([len(topNPredicted[userID]) for userID in userIDs.tolist()], dtype = np.int64)
+        ratings = [rating for userID in userIDs.tolist() for rating in topNPredicted[userID]]
+        n = int(lengths.max()) if (len(lengths) > 0) else 0
+
+        items = np.full((len(userIDs), n), -1, dtype = np.int64)
+        scores = np.full((len(userIDs), n), np.nan)
+
+        if (len(ratings) == 0):
+            return cls(userIDs, np.array([], dtype = str), items, scores)
+
+        (bookIDs, codes) = np.unique(np.array([bookID for (bookID, _) in ratings], dtype = str), return_inverse = True)
+        rows = np.repeat(np.arange(len(userIDs)), lengths)
+        columns = np.arange(len(ratings)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        items[rows, columns] = codes.reshape(-1)
+        scores[rows, columns] = [predictedRating for (_, predictedRating) in ratings]
+        return cls(userIDs, bookIDs, items, scores)
+
+    def rowsOf(self, userIDs):
+        """Returns the row of each of userIDs, or -1 for users without recommendations."""
+        userIDs = np.asarray(userIDs, dtype = np.int64)
+
+        if (len(self.userIDs) == 0):
+            return np.full(len(userIDs), -1)
+
+        positions = np.minimum(np.searchsorted(self.userIDs, userIDs), len(self.userIDs) - 1)
+        return np.where(self.userIDs[positions] == userIDs, positions, -1)
+
+    def indicesOf(self, bookIDs):
+        """Returns the index of each of bookIDs in bookIDs, or -2 for books that are never recommended."""
+        bookIDs = np.asarray(bookIDs, dtype = str)
+
+        if (len(self.bookIDs) == 0):
+            return np.full(len(bookIDs), -2)
+
+        positions = np.minimum(np.searchsorted(self.bookIDs, bookIDs), len(self.bookIDs) - 1)
+        return np.where(self.bookIDs[positions] == bookIDs, positions, -2)
+
+    def hitRanks(self, leftOutPredictions):
+        """
+            Returns an array of the rank, counted from 1, of each left-out
+            book in the top-N of its user, or 0 if it is not recommended to
+            them, and an array of the actual rating of each left-out book.
+            All left-out books are looked up in one broadcast comparison.
+        """
+        if (len(leftOutPredictions) == 0):
+            return (np.zeros(0, dtype = np.int64), np.zeros(0))
+
+        (userIDs, leftOutBookIDs, actualRatings) = list(zip(*leftOutPredictions))[:3]
+        rows = self.rowsOf([int(userID) for userID in userIDs])
+        found = rows >= 0
+        ranks = np.zeros(len(rows), dtype = np.int64)
+
+        if (found.any() and (self.items.shape[1] > 0)):
+            matches = self.items[rows[found]] == self.indicesOf(leftOutBookIDs)[found][:, np.newaxis]
+            ranks[found] = np.where(matches.any(axis = 1), matches.argmax(axis = 1) + 1, 0)
+
+        return (ranks, np.array(actualRatings, dtype = np.float64))
+
+    def hitMetrics(self, leftOutPredictions, ratingCutoff = 0):
+        """Returns the HitRate, CumulativeHitRate with ratingCutoff and AverageReciprocalHitRank from one lookup of the left-out books."""
+        (ranks, actualRatings) = self.hitRanks(leftOutPredictions)
+        return {
+            'HR' : self.hitRate(ranks),
+            'cHR' : self.hitRate(ranks[actualRatings >= ratingCutoff]),
+            'ARHR' : self.reciprocalHitRank(ranks)
+        }
+
+    def hitRate(self, ranks):
+        return int(np.count_nonzero(ranks)) / len(ranks)
+
+    def reciprocalHitRank(self, ranks):
+        # The reciprocals are added up one after another, like the loop of RecommenderMetrics, so the sum is the same to the last bit
+        reciprocals = 1.0 / ranks[ranks > 0]
+        summation = float(np.cumsum(reciprocals)[-1]) if (len(reciprocals) > 0) else 0
+        return summation / len(ranks)
+
+    def HitRate(self, leftOutPredictions):
+        return self.hitRate(self.hitRanks(leftOutPredictions)[0])
+
+    def CumulativeHitRate(self, leftOutPredictions, ratingCutoff = 0):
+        (ranks, actualRatings) = self.hitRanks(leftOutPredictions)
+        return self.hitRate(ranks[actualRatings >= ratingCutoff])
+
+    def RatingHitRate(self, leftOutPredictions):
+        (ranks, actualRatings) = self.hitRanks(leftOutPredictions)
+        (ratings, codes) = np.unique(actualRatings, return_inverse = True)
+        hits = np.bincount(codes, weights = ranks > 0, minlength = len(ratings))
+        total = np.bincount(codes, minlength = len(ratings))
+
+        # Only ratings with at least one hit are printed
+        for (rating, ratingHits, ratingTotal) in zip(ratings.tolist(), hits.tolist(), total.tolist()):
+            if (ratingHits > 0):
+                print (rating, ratingHits / float(ratingTotal))
+
+    def AverageReciprocalHitRank(self, leftOutPredictions):
+        return self.reciprocalHitRank(self.hitRanks(leftOutPredictions)[0])
+
+    def UserCoverage(self, numUsers, ratingThreshold = 0):
+        return int(np.count_nonzero((self.scores >= ratingThreshold).any(axis = 1))) / numUsers
+
+    def Novelty(self, rankings):
+        recommended = self.items[self.items >= 0]
+
+        if (len(recommended) == 0):
+            return -1
+
+        # Each recommended book is ranked once, however many users it is recommended to
+        if hasattr(rankings, 'ranksOf'):
+            bookRanks = rankings.ranksOf(self.bookIDs)
+        else:
+            bookRanks = np.array([rankings[bookID] for bookID in self.bookIDs.tolist()])
+
+        return int(bookRanks[recommended].sum()) / len(recommended)
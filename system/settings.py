@@ -86,6 +86,27 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Club recommendations are cached in the database, so that the web processes and the
+# recommendation worker share their entries and the generations that invalidate them.
+# Its table is made by a migration, or by the createcachetable command.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'recommendations': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'book_clubs_recommendations_cache',
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -143,6 +164,77 @@ MESSAGE_TAGS = {
     message_constants.ERROR : 'danger',
 }
 
+# Directory that the train_recommender command saves versioned models in.
+# Its CURRENT file names the version that is served, see the publish_recommender
+# and rollback_recommender commands.
+RECOMMENDER_MODELS_DIR = BASE_DIR / 'book_clubs' / 'recommender_models'
+
+# Path of the trained recommender artifact used for club recommendations.
+# Either a model store such as RECOMMENDER_MODELS_DIR, whose current version is served,
+# a surprise dump, or a directory made by the export_recommender command.
+RECOMMENDER_MODEL_PATH = RECOMMENDER_MODELS_DIR
+
+# Artifact served while RECOMMENDER_MODEL_PATH is a model store without a current version,
+# which is the surprise dump that was served before models were versioned.
+RECOMMENDER_FALLBACK_MODEL_PATH = BASE_DIR / 'book_clubs' / 'recommender_algorithm'
+
+# Algorithm fitted by the train_recommender command, and the options it is created with.
+# Training an SVD model is refused if its surprise Trainset would take more than
+# memory_budget bytes, or is not limited if it is None.
+RECOMMENDER_TRAINING = {
+    'algorithm' : 'surprise.SVD',
+    'options' : {'random_state' : 10},
+    'memory_budget' : None,
+}
+
+# Approximate retrieval of candidates for SVD models. train_recommender clusters the items
+# into 'lists' clusters, defaulting to the square root of the number of items. If 'candidates'
+# is set, each member only has the items of the clusters closest to them, at least 'candidates'
+# of them, scored exactly. More candidates trade latency for recall, None scores every item.
+RECOMMENDER_ANN = {
+    'lists' : None,
+    'candidates' : None,
+}
+
+# Ranking that members an SVD model can not score are recommended from, one of 'popular',
+# 'bayesian' and 'recent'. 'half_life' is the number of later ratings that halve the weight
+# of a rating in the 'recent' ranking built by train_recommender.
+RECOMMENDER_FALLBACK = {
+    'ranking' : 'bayesian',
+    'half_life' : 10000,
+}
+
+# Clubs with at least 'threshold' members to score have them scored by a pool of 'workers'
+# processes, defaulting to one less than the number of cores. Only the recommendation worker
+# uses the pool. A threshold of None scores every club in-process.
+RECOMMENDER_PARALLEL = {
+    'threshold' : 64,
+    'workers' : None,
+}
+
+# Sources that narrow the books scored for a club's members, each giving at most 'limit' books.
+# An empty list scores every book. Candidates from these sources take precedence over
+# RECOMMENDER_ANN. For example:
+#     {'source' : 'book_clubs.recommender.candidates.PopularSource', 'limit' : 2000},
+#     {'source' : 'book_clubs.recommender.candidates.CoRatedSource', 'limit' : 1000},
+#     {'source' : 'book_clubs.recommender.candidates.RecentSource', 'limit' : 500},
+RECOMMENDER_CANDIDATES = []
+
+# Item-based KNN models keep the 'k' most similar items of every item. train_recommender
+# computes the similarities of 'block_size' items at a time.
+RECOMMENDER_NEIGHBOURS = {
+    'k' : 50,
+    'block_size' : 1000,
+}
+
+# Recommendations given per club or user by the recommendations API when k is not given,
+# the most that can be asked for, and the most clubs and users that one request can ask for.
+RECOMMENDER_API = {
+    'default_k' : 10,
+    'max_k' : 100,
+    'max_batch' : 100,
+}
+
 # Activate django_heroku
 if '/app' in os.environ['HOME']:
     import django_heroku
@@ -44,5 +44,6 @@ urlpatterns = [
     path('meeting/<int:club_id>/<int:meeting_id>/', views.meeting, name = 'meeting'),
     path('send/<int:club_id>/<int:meeting_id>/', views.send, name = 'send'),
     path('get_messages/<int:club_id>/<int:meeting_id>/', views.get_messages, name = 'get_messages'),
-    path('end_meeting/<int:club_id>/<int:meeting_id>/', views.end_meeting, name = 'end_meeting')
+    path('end_meeting/<int:club_id>/<int:meeting_id>/', views.end_meeting, name = 'end_meeting'),
+    path('api/recommendations/', views.recommendations_api, name = 'recommendations_api')
 ]